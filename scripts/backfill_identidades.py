@@ -0,0 +1,21 @@
+"""
+Cria as identidades (índice global de emails) de usuários já existentes
+
+Uso:
+    python -m scripts.backfill_identidades
+"""
+from dotenv import load_dotenv
+from mongoengine import connect
+
+load_dotenv()
+
+from src.config.config import get_mongodb_url, get_database_name
+from src.utils.identidades import backfill_identities
+
+
+if __name__ == "__main__":
+    connect(db=get_database_name(), host=get_mongodb_url())
+    resultado = backfill_identities()
+    print(f"Identidades criadas: {resultado['criadas']}")
+    for email in resultado["conflitos"]:
+        print(f"Conflito (email em mais de uma conta): {email}")
@@ -0,0 +1,71 @@
+"""
+Benchmark de renderização de emails em lote
+
+Compara o fluxo antigo (ler o HTML do disco e aplicar str.replace por
+placeholder a cada envio) com os templates Jinja2 pré-compilados, e mede a
+montagem da mensagem MIME multipart (texto + HTML).
+
+Uso:
+    python -m scripts.bench_email_templates --n 5000
+"""
+import argparse
+import time
+
+from src.utils.email_service import email_service
+from src.utils.email_templates import TEMPLATES_DIR, email_templates
+
+
+def contexto(i):
+    return {
+        "email": f"cliente{i}@exemplo.com",
+        "nome": f"Cliente <{i}>",
+        "senha_temporaria": "Tmp#12345",
+        "role": "Funcionário",
+        "login_url": "http://localhost:5173/login",
+        "reset_url": f"http://localhost:5173/redefinir-senha?token=tok{i}",
+        "datetime": "19/10/2026 às 12:00",
+    }
+
+
+def render_antigo(ctx):
+    # como EmailService fazia antes: leitura do arquivo + um replace (cópia) por placeholder
+    with open(TEMPLATES_DIR / "email_de_registro.html", "r", encoding="utf-8") as file:
+        template = file.read()
+    for chave, valor in ctx.items():
+        template = template.replace("{{ " + chave + " }}", valor)
+    return template
+
+
+def render_compilado(ctx):
+    return email_templates.render_pair("email_de_registro", **ctx)
+
+
+def medir(nome, func, n):
+    inicio = time.perf_counter()
+    for i in range(n):
+        func(contexto(i))
+    total = time.perf_counter() - inicio
+    print(f"{nome:<32} {n / total:>10.0f} emails/s  ({total * 1000 / n:.3f} ms/email)")
+
+
+def medir_mime(n):
+    inicio = time.perf_counter()
+    for i in range(n):
+        html, texto = render_compilado(contexto(i))
+        email_service._build_message("Bem-vindo", f"cliente{i}@exemplo.com", html, texto).as_bytes()
+    total = time.perf_counter() - inicio
+    print(f"{'compilado + MIME multipart':<32} {n / total:>10.0f} emails/s  ({total * 1000 / n:.3f} ms/email)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=5000)
+    args = parser.parse_args()
+
+    medir("antigo (disco + str.replace)", render_antigo, args.n)
+    medir("compilado (html + texto)", render_compilado, args.n)
+    medir_mime(args.n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark da decodificação de fotos de celular no pipeline de imagens
+
+Gera fotos sintéticas do tamanho de uma câmera de celular (JPEG 12 MP com
+orientação EXIF "girar 90°") e compara, por foto:
+- decodificação completa + ImageOps.exif_transpose (caminho anterior)
+- open_image com draft na escala que cobre a maior variante (1280 px)
+- geração das variantes responsivas e uma miniatura de /img nos dois caminhos
+- recusa pelo limite de pixels (só lê o cabeçalho)
+
+Uso:
+    python -m scripts.bench_image_decode --fotos 5 --largura 4032 --altura 3024
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from PIL import Image, ImageFilter, ImageOps
+
+from src.utils.image_processing import (
+    EXIF_ORIENTATION, VARIANT_WIDTHS, ImageTooLarge, generate_variants, open_image, resize_image, write_variants,
+)
+
+
+def gerar_foto(path: str, largura: int, altura: int, seed: int) -> None:
+    """Gradiente com ruído suavizado: comprime como uma foto (alguns MB), não como ruído puro"""
+    ruido = Image.effect_noise((largura // 8, altura // 8), 60 + seed).resize((largura, altura), Image.Resampling.BICUBIC)
+    gradiente = Image.linear_gradient("L").resize((largura, altura))
+    image = Image.merge("RGB", (ruido, gradiente, ImageOps.invert(ruido))).filter(ImageFilter.DETAIL)
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 6
+    image.save(path, "JPEG", quality=92, exif=exif)
+
+
+def decode_completo(path: str) -> Image.Image:
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    return image
+
+
+def medir(func, *args, repeticoes: int = 3) -> float:
+    """Mediana em milissegundos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func(*args)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de decodificação de fotos de celular")
+    parser.add_argument("--fotos", type=int, default=5)
+    parser.add_argument("--largura", type=int, default=4032)
+    parser.add_argument("--altura", type=int, default=3024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        fotos = []
+        for i in range(args.fotos):
+            path = os.path.join(directory, f"foto{i}.jpg")
+            gerar_foto(path, args.largura, args.altura, i)
+            fotos.append(path)
+        tamanho = statistics.mean(os.path.getsize(p) for p in fotos) / 1024 / 1024
+        print(f"{len(fotos)} fotos {args.largura}x{args.altura} ({tamanho:.1f} MB em média), orientação EXIF 6")
+
+        variants_dir = os.path.join(directory, "variants")
+        thumb = os.path.join(directory, "thumb.webp")
+        cenarios = [
+            ("decode", lambda p: decode_completo(p), lambda p: open_image(p, min_size=(max(VARIANT_WIDTHS), None))),
+            (
+                "variantes",
+                lambda p: write_variants(decode_completo(p), "x", variants_dir, "/v"),
+                lambda p: generate_variants(p, variants_dir, "/v"),
+            ),
+            (
+                "/img w=320",
+                lambda p: decode_completo(p).thumbnail((320, 320), Image.Resampling.LANCZOS, reducing_gap=3.0),
+                lambda p: resize_image(p, thumb, 320, None, "inside", "webp"),
+            ),
+        ]
+        for nome, antes, depois in cenarios:
+            t_antes = statistics.mean(medir(antes, p) for p in fotos)
+            t_depois = statistics.mean(medir(depois, p) for p in fotos)
+            print(f"{nome:12} completo {t_antes:8.1f} ms   draft {t_depois:8.1f} ms   {t_antes / t_depois:5.1f}x")
+
+        orientada = open_image(fotos[0], min_size=(max(VARIANT_WIDTHS), None))
+        print(f"open_image com draft: {orientada.size} (orientada), original {decode_completo(fotos[0]).size}")
+
+        def recusar(path):
+            try:
+                open_image(path, max_pixels=1_000_000)
+            except ImageTooLarge:
+                pass
+
+        print(f"recusa pelo limite de pixels: {medir(recusar, fotos[0]):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
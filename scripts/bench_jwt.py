@@ -0,0 +1,54 @@
+"""
+Micro-benchmark de verificação de JWT (verificações por segundo)
+
+Compara, para cada algoritmo, a verificação completa (assinatura) com a
+verificação memoizada de um token quente.
+
+Uso:
+    python -m scripts.bench_jwt --n 20000
+"""
+import argparse
+import time
+
+from src.utils.jwt_utils import TokenKey, TokenService
+
+
+def gerar_chaves():
+    chaves = [TokenKey("hs", "HS256", "segredo-de-benchmark", "segredo-de-benchmark")]
+    try:
+        from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+        ec_key = ec.generate_private_key(ec.SECP256R1())
+        ed_key = ed25519.Ed25519PrivateKey.generate()
+        chaves.append(TokenKey("es", "ES256", ec_key, ec_key.public_key()))
+        chaves.append(TokenKey("ed", "EdDSA", ed_key, ed_key.public_key()))
+    except ImportError:
+        print("cryptography não instalado: apenas HS256")
+    return chaves
+
+
+def por_segundo(func, n):
+    inicio = time.perf_counter()
+    for _ in range(n):
+        func()
+    return n / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20000)
+    args = parser.parse_args()
+
+    for chave in gerar_chaves():
+        servico = TokenService({chave.kid: chave}, chave.kid, cache_size=args.n + 1)
+        token = servico.create_access_token("usuario", {"user_type": "cliente", "role": "cliente"})
+        tokens = [servico.create_access_token(str(i), {"role": "cliente"}) for i in range(args.n)]
+
+        frios = iter(tokens)
+        frio = por_segundo(lambda: servico.verify(next(frios)), args.n)
+        servico.verify(token)
+        quente = por_segundo(lambda: servico.verify(token), args.n)
+        print(f"{chave.algorithm:<6} sem cache {frio:>12,.0f}/s   memoizado {quente:>12,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark das listagens: Documents hidratados (to_dict) x documentos brutos com projeção
+
+Uso (usa um banco separado, criado e apagado pelo próprio script):
+    python -m scripts.bench_listagens --produtos 2000 --pedidos 2000
+"""
+import argparse
+import time
+import tracemalloc
+from decimal import Decimal
+
+from dotenv import load_dotenv
+from mongoengine import connect, disconnect
+
+load_dotenv()
+
+from src.config.config import get_mongodb_url
+from src.models import Categoria, Cliente, Endereco, Pedido, PedidoItem, Produto
+from src.routes.produtos import listar_produtos_brutos
+from src.utils.queries import raw_query, fetch_field_map
+
+
+def medir(nome, func):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = func()
+    duracao = (time.perf_counter() - inicio) * 1000
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{nome:<32} {len(resultado):>6} itens  {duracao:>9.1f} ms  pico {pico / 1024:>9.0f} KiB")
+
+
+def popular(n_produtos, n_pedidos):
+    categorias = [Categoria(nome=f"Categoria {i}").save() for i in range(10)]
+    produtos = Produto.objects.insert([
+        Produto(
+            categoria=categorias[i % 10],
+            titulo=f"Produto {i}",
+            descricao_capa="Descrição curta",
+            descricao_geral="Descrição longa " * 40,
+            preco=Decimal("29.90"),
+        )
+        for i in range(n_produtos)
+    ])
+    cliente = Cliente(
+        nome="Cliente", email="bench@example.com", senha="x" * 60, telefone="11999999999",
+        enderecos=[Endereco(rua="Rua", numero=str(i), bairro="B", cidade="C", cep="01000000") for i in range(5)],
+    ).save()
+    Pedido.objects.insert([
+        Pedido(
+            cliente=cliente,
+            endereco=cliente.enderecos[0],
+            itens=[PedidoItem(produto=produtos[(i + j) % n_produtos], quantidade=1, preco_unitario=Decimal("29.90")) for j in range(3)],
+            status="Pronto",
+        )
+        for i in range(n_pedidos)
+    ])
+
+
+def pedidos_brutos():
+    pedidos = list(raw_query(Pedido.objects().order_by("-created_at")))
+    clientes = fetch_field_map(Cliente, (p.get("cliente") for p in pedidos), "nome")
+    produtos = fetch_field_map(Produto, (i.get("produto") for p in pedidos for i in p.get("itens", [])), "titulo")
+    return [Pedido.raw_to_dict(p, clientes, produtos) for p in pedidos]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--produtos", type=int, default=2000)
+    parser.add_argument("--pedidos", type=int, default=2000)
+    args = parser.parse_args()
+
+    db = "bench_listagens"
+    connect(db=db, host=get_mongodb_url())
+    try:
+        popular(args.produtos, args.pedidos)
+        medir("produtos: Documents", lambda: [p.to_dict() for p in Produto.objects()])
+        medir("produtos: brutos + projeção", lambda: listar_produtos_brutos(Produto.objects()))
+        medir("pedidos: Documents", lambda: [p.to_dict() for p in Pedido.objects().order_by("-created_at")])
+        medir("pedidos: brutos + $in", pedidos_brutos)
+    finally:
+        Categoria._get_db().client.drop_database(db)
+        disconnect()
+
+
+if __name__ == "__main__":
+    main()
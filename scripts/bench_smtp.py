@@ -0,0 +1,84 @@
+"""
+Benchmark de throughput SMTP: conexão por mensagem x pool persistente
+
+Sobe o servidor SMTP local (scripts/smtp_local.py) e envia o mesmo lote de
+emails de status de pedido de duas formas:
+- uma conexão nova por mensagem (como o FastMail.send_message fazia)
+- SMTPPool, reaproveitando conexões
+
+O servidor local não tem TLS; --latencia simula a ida e volta de rede por
+resposta SMTP. Com um servidor real o ganho é maior, pois cada conexão nova
+também paga o handshake STARTTLS + AUTH.
+
+Uso:
+    python -m scripts.bench_smtp --n 2000 --concorrencia 4 --latencia 5
+"""
+import argparse
+import asyncio
+import time
+
+import aiosmtplib
+
+from scripts.smtp_local import LocalSMTPServer
+from src.utils.email_service import email_service
+from src.utils.email_templates import email_templates
+from src.utils.smtp_pool import SMTPPool
+
+
+def mensagem(i):
+    html, texto = email_templates.render_pair(
+        "email_status_pedido",
+        nome=f"Cliente {i}",
+        numero=f"{i:06d}",
+        status="Saiu para entrega",
+        mensagem="Seu pedido saiu para entrega e logo chegará até você.",
+        total="R$ 89,90",
+        metodo_entrega="delivery",
+        pedidos_url="http://localhost:5173/meus-pedidos",
+        datetime="19/10/2026 às 12:00",
+    )
+    return email_service._build_message(f"Pedido #{i:06d}", f"cliente{i}@exemplo.com", html, texto)
+
+
+async def em_paralelo(mensagens, concorrencia, enviar):
+    fila = iter(mensagens)
+
+    async def worker():
+        for message in fila:
+            await enviar(message)
+
+    await asyncio.gather(*(worker() for _ in range(concorrencia)))
+
+
+async def main(n, concorrencia, latencia):
+    server = LocalSMTPServer(port=0, latency=latencia / 1000)
+    await server.start()
+    mensagens = [mensagem(i) for i in range(n)]
+
+    async def conexao_por_mensagem(message):
+        await aiosmtplib.send(message, hostname=server.host, port=server.port, start_tls=False)
+
+    inicio = time.perf_counter()
+    await em_paralelo(mensagens, concorrencia, conexao_por_mensagem)
+    total = time.perf_counter() - inicio
+    print(f"{'conexão por mensagem':<24} {n / total:>8.0f} msg/s  sessões SMTP: {server.sessions}")
+
+    server.sessions = 0
+    pool = SMTPPool(server.host, server.port, size=concorrencia, max_messages=500)
+    inicio = time.perf_counter()
+    await em_paralelo(mensagens, concorrencia, pool.send)
+    total = time.perf_counter() - inicio
+    await pool.close()
+    print(f"{'SMTPPool':<24} {n / total:>8.0f} msg/s  sessões SMTP: {server.sessions}")
+
+    await server.stop()
+    assert len(server.messages) == 2 * n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=4)
+    parser.add_argument("--latencia", type=float, default=0.0, help="atraso por resposta SMTP, em ms")
+    args = parser.parse_args()
+    asyncio.run(main(args.n, args.concorrencia, args.latencia))
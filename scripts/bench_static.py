@@ -0,0 +1,137 @@
+"""
+Benchmark do serviço estático de /uploads
+
+Sobe um uvicorn local (em thread) com o StaticFiles puro e com o
+UploadsStaticFiles sobre o mesmo diretório de imagens sintéticas e mede:
+- vazão (req/s e MB/s) de GETs completos e de requisições com Range
+- a segunda visita ao cardápio: quantas requisições o navegador ainda faz
+  (StaticFiles sem Cache-Control: uma revalidação 304 por foto; immutable: nenhuma)
+
+Uso:
+    python -m scripts.bench_static --arquivos 200 --n 5000 --concorrencia 32
+"""
+import argparse
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+from src.utils.static_uploads import UploadsStaticFiles
+
+
+def gerar_arquivos(directory: str, quantidade: int, largura: int) -> list:
+    """Grava fotos sintéticas com nome sha256 (e o irmão .webp) e retorna os nomes .jpg"""
+    nomes = []
+    for i in range(quantidade):
+        image = Image.effect_noise((largura, largura * 3 // 4), 40 + i % 50).convert("RGB")
+        nome = f"{i:064x}"
+        image.save(os.path.join(directory, f"{nome}.jpg"), "JPEG", quality=82)
+        image.save(os.path.join(directory, f"{nome}.webp"), "WEBP", quality=80)
+        nomes.append(f"{nome}.jpg")
+    return nomes
+
+
+class ServidorLocal:
+    """uvicorn em uma thread própria, em porta livre"""
+
+    def __init__(self, app):
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False))
+        self.thread = threading.Thread(target=self.server.run, kwargs={"sockets": [self.sock]}, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+        self.sock.close()
+
+
+async def carga(base_url: str, nomes: list, n: int, concorrencia: int, headers: dict) -> tuple:
+    """Dispara n GETs com `concorrencia` clientes; retorna (segundos, bytes recebidos, status)"""
+    recebidos, status = 0, {}
+    fila = iter(range(n))
+    limits = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, headers=headers) as client:
+
+        async def worker():
+            nonlocal recebidos
+            for i in fila:
+                response = await client.get(f"/uploads/{nomes[i % len(nomes)]}")
+                recebidos += len(response.content)
+                status[response.status_code] = status.get(response.status_code, 0) + 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concorrencia)))
+        return time.perf_counter() - inicio, recebidos, status
+
+
+async def segunda_visita(base_url: str, nomes: list) -> int:
+    """Simula o cache do navegador: conta as requisições feitas ao rever as mesmas fotos"""
+    cache = {}
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for nome in nomes:
+            response = await client.get(f"/uploads/{nome}")
+            cache[nome] = response.headers
+        requisicoes = 0
+        for nome in nomes:
+            headers = cache[nome]
+            if "immutable" in headers.get("cache-control", ""):
+                continue
+            requisicoes += 1
+            await client.get(f"/uploads/{nome}", headers={"If-None-Match": headers["etag"]})
+        return requisicoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do serviço estático de /uploads")
+    parser.add_argument("--arquivos", type=int, default=200)
+    parser.add_argument("--largura", type=int, default=640, help="largura das fotos sintéticas (px)")
+    parser.add_argument("--n", type=int, default=5000, help="requisições por cenário")
+    parser.add_argument("--concorrencia", type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        nomes = gerar_arquivos(directory, args.arquivos, args.largura)
+        tamanho = sum(os.path.getsize(os.path.join(directory, nome)) for nome in nomes) / len(nomes)
+        print(f"{len(nomes)} fotos de {tamanho / 1024:.0f} KB em média; {args.n} requisições, concorrência {args.concorrencia}")
+
+        apps = {
+            "StaticFiles": StaticFiles(directory=directory),
+            "UploadsStaticFiles": UploadsStaticFiles(directory=directory, accel_redirect=""),
+        }
+        cenarios = {
+            "GET": {},
+            "GET Accept webp": {"Accept": "image/webp,*/*"},
+            "Range 64 KB": {"Range": "bytes=0-65535"},
+        }
+        for nome_app, static in apps.items():
+            app = Starlette(routes=[Mount("/uploads", static)])
+            with ServidorLocal(app) as base_url:
+                for nome_cenario, headers in cenarios.items():
+                    segundos, recebidos, status = asyncio.run(carga(base_url, nomes, args.n, args.concorrencia, headers))
+                    print(
+                        f"{nome_app:20} {nome_cenario:16} {args.n / segundos:8.0f} req/s "
+                        f"{recebidos / segundos / 1024 / 1024:8.1f} MB/s  status={status}"
+                    )
+                requisicoes = asyncio.run(segunda_visita(base_url, nomes))
+                print(f"{nome_app:20} segunda visita: {requisicoes} requisições para {len(nomes)} fotos")
+
+
+if __name__ == "__main__":
+    main()
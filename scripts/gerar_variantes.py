@@ -0,0 +1,91 @@
+"""
+Gera (ou regenera) as variantes responsivas das imagens já enviadas
+
+Percorre o armazenamento de uploads (disco local ou bucket S3), gera as
+variantes que faltam em paralelo (um processo por núcleo), publica-as no
+armazenamento e atualiza `image_variants` dos produtos que usam cada imagem.
+
+Uso:
+    python -m scripts.gerar_variantes            # só imagens sem variantes
+    python -m scripts.gerar_variantes --force    # regenera todas
+    python -m scripts.gerar_variantes --sem-banco
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+from mongoengine import connect
+
+load_dotenv()
+
+from src.config.config import get_mongodb_url, get_database_name
+from src.utils.image_processing import VARIANT_FORMATS, VARIANT_WIDTHS, generate_variants, variant_filename
+from src.utils.image_variants import (
+    UPLOAD_URL_PREFIX, VARIANTS_DIR, VARIANTS_KEY_PREFIX, VARIANTS_URL_PREFIX, publish_variants, variants_for_url,
+)
+from src.utils.storage import storage
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff")
+
+
+def imagens_pendentes(force: bool):
+    """Chaves das imagens originais sem variantes (uma listagem do armazenamento)"""
+    keys = {obj.key for obj in storage.list()}
+    for key in sorted(keys):
+        if "/" in key or key.startswith(".") or not key.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        stem = os.path.splitext(key)[0]
+        menor = variant_filename(stem, min(VARIANT_WIDTHS), next(iter(VARIANT_FORMATS)))
+        if force or f"{VARIANTS_KEY_PREFIX}/{menor}" not in keys:
+            yield key
+
+
+def atualizar_produtos() -> int:
+    from src.models import Produto
+
+    atualizados = 0
+    for produto in Produto.objects(image_url__startswith=f"{UPLOAD_URL_PREFIX}/").only("image_url", "image_variants"):
+        variants = variants_for_url(produto.image_url)
+        if variants != (produto.image_variants or {}):
+            Produto.objects(id=produto.id).update_one(set__image_variants=variants)
+            atualizados += 1
+    return atualizados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera variantes responsivas das imagens de uploads/")
+    parser.add_argument("--force", action="store_true", help="regenera mesmo as que já têm variantes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--sem-banco", action="store_true", help="não atualiza os produtos no MongoDB")
+    args = parser.parse_args()
+
+    keys = list(imagens_pendentes(args.force))
+    print(f"{len(keys)} imagens para processar com {args.workers} processos")
+
+    inicio = time.perf_counter()
+    geradas, falhas = 0, 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        # no backend S3, local_path baixa o original para o cache local
+        futures = {
+            executor.submit(generate_variants, storage.local_path(key), VARIANTS_DIR, VARIANTS_URL_PREFIX): key
+            for key in keys
+        }
+        for future in as_completed(futures):
+            try:
+                publish_variants(future.result())
+                geradas += 1
+            except Exception as e:
+                falhas += 1
+                print(f"Falha em {futures[future]}: {str(e)}")
+    print(f"Variantes geradas para {geradas} imagens ({falhas} falhas) em {time.perf_counter() - inicio:.1f}s")
+
+    if not args.sem_banco:
+        connect(db=get_database_name(), host=get_mongodb_url())
+        print(f"Produtos atualizados: {atualizar_produtos()}")
+
+
+if __name__ == "__main__":
+    main()
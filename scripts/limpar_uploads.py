@@ -0,0 +1,75 @@
+"""
+Remove uploads órfãos (imagens que nenhum produto usa) e suas variantes
+
+Por padrão só mostra o que seria removido (dry-run); use --executar para apagar.
+Arquivos modificados dentro da carência nunca são removidos: um upload recém
+feito pode ainda não ter sido salvo no produto.
+
+Uso:
+    python -m scripts.limpar_uploads                       # relatório
+    python -m scripts.limpar_uploads --executar --carencia-horas 48
+    python -m scripts.limpar_uploads --executar --json     # resumo para métricas/cron
+"""
+import argparse
+import json
+import time
+
+from dotenv import load_dotenv
+from mongoengine import connect
+
+load_dotenv()
+
+from src.config.config import get_mongodb_url, get_database_name
+from src.utils.upload_gc import GC_BATCH_SIZE, collect_orphans
+
+
+def formatar_bytes(n: float) -> str:
+    if n < 1024:
+        return f"{int(n)} B"
+    for unidade in ("KB", "MB", "GB"):
+        n /= 1024
+        if n < 1024 or unidade == "GB":
+            return f"{n:.1f} {unidade}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove uploads que nenhum produto referencia")
+    parser.add_argument("--executar", action="store_true", help="apaga de fato (sem isso é dry-run)")
+    parser.add_argument("--carencia-horas", type=float, default=24.0)
+    parser.add_argument("--lote", type=int, default=GC_BATCH_SIZE, help="arquivos por lote")
+    parser.add_argument("--pausa", type=float, default=0.0, help="segundos de espera entre lotes")
+    parser.add_argument("--json", action="store_true", help="imprime só o resumo em JSON")
+    args = parser.parse_args()
+
+    connect(db=get_database_name(), host=get_mongodb_url())
+
+    agora = time.time()
+
+    def listar(orphan):
+        if not args.json:
+            idade = (agora - orphan.mtime) / 86400
+            print(f"{'removido' if args.executar else 'órfão'}: {orphan.name} ({formatar_bytes(orphan.size)}, {idade:.1f} dias)")
+
+    resumo = collect_orphans(
+        grace_hours=args.carencia_horas,
+        batch_size=args.lote,
+        dry_run=not args.executar,
+        pause=args.pausa,
+        on_orphan=listar,
+    )
+
+    if args.json:
+        print(json.dumps(resumo))
+        return
+    acao = "recuperados" if args.executar else "recuperáveis (dry-run)"
+    print(
+        f"\n{resumo['analisados']} arquivos analisados em {resumo['segundos']}s: "
+        f"{resumo['em_uso']} em uso, {resumo['recentes']} dentro da carência, {resumo['orfaos']} órfãos"
+    )
+    if args.executar:
+        print(f"{resumo['removidos']} removidos em {resumo['lotes']} lotes ({resumo['falhas']} falhas)")
+    print(f"{formatar_bytes(resumo['bytes_recuperados'])} {acao}")
+
+
+if __name__ == "__main__":
+    main()
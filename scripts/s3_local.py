@@ -0,0 +1,179 @@
+"""
+Servidor S3 local mínimo para desenvolvimento e testes do backend de armazenamento
+
+Implementa só o que src/utils/s3_client.py usa (PUT/GET/HEAD/DELETE de objeto e
+ListObjectsV2), com endereçamento por caminho como o MinIO. Aceita qualquer
+credencial (a assinatura não é conferida) e cria buckets sob demanda. Os
+objetos ficam em disco; metadados (Content-Type, Cache-Control) em memória.
+Para usar com a API:
+
+    STORAGE_BACKEND=s3 S3_ENDPOINT_URL=http://127.0.0.1:9000 S3_BUCKET=uploads
+
+Uso:
+    python -m scripts.s3_local --port 9000 --dir /tmp/s3-local
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from typing import Dict, Optional
+from xml.sax.saxutils import escape
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.routing import Route
+
+
+def _error(status_code: int, code: str, message: str) -> Response:
+    body = f"<?xml version=\"1.0\" encoding=\"UTF-8\"?><Error><Code>{code}</Code><Message>{escape(message)}</Message></Error>"
+    return Response(body, status_code=status_code, media_type="application/xml")
+
+
+class LocalS3Server:
+    """Servidor S3 em uma thread própria (uvicorn), guardando os objetos em `directory`"""
+
+    def __init__(self, directory: Optional[str] = None, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self._tmp = None if directory else tempfile.TemporaryDirectory()
+        self.directory = directory or self._tmp.name
+        self.host = host
+        self.port = port
+        # atraso (segundos) antes de cada resposta, para simular a ida e volta na rede
+        self.latency = latency
+        self.metadata: Dict[str, Dict[str, str]] = {}
+        self.requests: Counter = Counter()
+        self.app = Starlette(routes=[
+            Route("/{bucket}", self.list_objects, methods=["GET"]),
+            Route("/{bucket}/{key:path}", self.object, methods=["GET", "HEAD", "PUT", "DELETE"]),
+        ])
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self._sock: Optional[socket.socket] = None
+
+    @property
+    def endpoint_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> None:
+        self._sock = socket.socket()
+        self._sock.bind((self.host, self.port))
+        self.port = self._sock.getsockname()[1]
+        self._server = uvicorn.Server(uvicorn.Config(self.app, log_level="warning", access_log=False))
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._sock]}, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join()
+            self._sock.close()
+            self._server = None
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+    def _path(self, bucket: str, key: str) -> Optional[str]:
+        root = os.path.abspath(os.path.join(self.directory, bucket))
+        path = os.path.abspath(os.path.join(root, key))
+        return path if path.startswith(root + os.sep) else None
+
+    async def object(self, request: Request) -> Response:
+        bucket, key = request.path_params["bucket"], request.path_params["key"]
+        self.requests[request.method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        path = self._path(bucket, key)
+        if path is None:
+            return _error(400, "InvalidArgument", "Chave inválida")
+        meta_key = f"{bucket}/{key}"
+
+        if request.method == "PUT":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            digest = hashlib.md5()
+            tmp = f"{path}.upload"
+            with open(tmp, "wb") as out:
+                async for chunk in request.stream():
+                    digest.update(chunk)
+                    out.write(chunk)
+            os.replace(tmp, path)
+            self.metadata[meta_key] = {
+                "Content-Type": request.headers.get("content-type", "application/octet-stream"),
+                "Cache-Control": request.headers.get("cache-control", ""),
+                "ETag": f'"{digest.hexdigest()}"',
+            }
+            return Response(status_code=200, headers={"ETag": self.metadata[meta_key]["ETag"]})
+
+        if request.method == "DELETE":
+            if os.path.isfile(path):
+                os.remove(path)
+            self.metadata.pop(meta_key, None)
+            return Response(status_code=204)
+
+        if not os.path.isfile(path):
+            return _error(404, "NoSuchKey", "The specified key does not exist.")
+        meta = self.metadata.get(meta_key, {})
+        headers = {k: v for k, v in meta.items() if v and k != "Content-Type"}
+        headers["Last-Modified"] = formatdate(os.path.getmtime(path), usegmt=True)
+        return FileResponse(path, media_type=meta.get("Content-Type"), headers=headers)
+
+    async def list_objects(self, request: Request) -> Response:
+        bucket = request.path_params["bucket"]
+        self.requests["LIST"] += 1
+        prefix = request.query_params.get("prefix", "")
+        max_keys = int(request.query_params.get("max-keys", "1000"))
+        start_after = request.query_params.get("continuation-token", "")
+
+        root = os.path.join(self.directory, bucket)
+        keys = []
+        for directory, _, files in os.walk(root):
+            for name in files:
+                if name.endswith(".upload"):
+                    continue
+                key = os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/")
+                if key.startswith(prefix) and key > start_after:
+                    keys.append(key)
+        keys.sort()
+        page, truncated = keys[:max_keys], len(keys) > max_keys
+
+        items = []
+        for key in page:
+            st = os.stat(os.path.join(root, key))
+            modified = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(st.st_mtime))
+            items.append(
+                f"<Contents><Key>{escape(key)}</Key><LastModified>{modified}</LastModified>"
+                f"<Size>{st.st_size}</Size><StorageClass>STANDARD</StorageClass></Contents>"
+            )
+        token = f"<NextContinuationToken>{escape(page[-1])}</NextContinuationToken>" if truncated else ""
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            f"<Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix><KeyCount>{len(page)}</KeyCount>"
+            f"<MaxKeys>{max_keys}</MaxKeys><IsTruncated>{'true' if truncated else 'false'}</IsTruncated>"
+            f"{token}{''.join(items)}</ListBucketResult>"
+        )
+        return Response(body, media_type="application/xml")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor S3 local para desenvolvimento")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--dir", default=None, help="diretório dos objetos (padrão: temporário)")
+    args = parser.parse_args()
+    server = LocalS3Server(args.dir, args.host, args.port)
+    server.start()
+    print(f"S3 local escutando em {server.endpoint_url} (objetos em {server.directory})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,138 @@
+"""
+Servidor SMTP local mínimo para desenvolvimento e benchmarks de envio
+
+Aceita qualquer remetente/destinatário e qualquer credencial (AUTH PLAIN/LOGIN),
+não implementa STARTTLS e guarda as mensagens recebidas em memória. Para usar
+com a API:
+
+    MAIL_SERVER=127.0.0.1 MAIL_PORT=1025 MAIL_STARTTLS=false MAIL_USE_CREDENTIALS=false
+
+Uso:
+    python -m scripts.smtp_local --port 1025
+"""
+import argparse
+import asyncio
+from email import message_from_bytes
+from email.policy import default as default_policy
+from typing import List, Optional
+
+
+class LocalSMTPServer:
+    """Servidor SMTP assíncrono que só recebe e guarda mensagens"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 1025, verbose: bool = False, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.verbose = verbose
+        # atraso (segundos) antes de cada resposta, para simular a ida e volta na rede
+        self.latency = latency
+        self.messages: List[dict] = []
+        self.sessions = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.sessions += 1
+
+        async def reply(line: str) -> None:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 localhost SMTP local")
+        remetente, destinatarios = None, []
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                command = line[:4].upper()
+
+                if command in ("EHLO", "HELO"):
+                    if command == "EHLO":
+                        writer.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n")
+                    await reply("250 OK")
+                elif command == "AUTH":
+                    parts = line.split()
+                    if len(parts) >= 2 and parts[1].upper() == "LOGIN":
+                        # usuário e senha chegam em duas linhas base64; qualquer valor é aceito
+                        if len(parts) == 2:
+                            await reply("334 VXNlcm5hbWU6")
+                            await reader.readline()
+                        await reply("334 UGFzc3dvcmQ6")
+                        await reader.readline()
+                    elif len(parts) == 2:
+                        await reply("334 ")
+                        await reader.readline()
+                    await reply("235 Autenticado")
+                elif command == "MAIL":
+                    remetente, destinatarios = line.split(":", 1)[1].strip(), []
+                    await reply("250 OK")
+                elif command == "RCPT":
+                    destinatarios.append(line.split(":", 1)[1].strip())
+                    await reply("250 OK")
+                elif command == "DATA":
+                    await reply("354 Termine com <CRLF>.<CRLF>")
+                    data = bytearray()
+                    while True:
+                        chunk = await reader.readline()
+                        if not chunk or chunk in (b".\r\n", b".\n"):
+                            break
+                        # remove o ponto extra de linhas iniciadas com "." (RFC 5321, 4.5.2)
+                        data += chunk[1:] if chunk.startswith(b"..") else chunk
+                    self._store(remetente, destinatarios, bytes(data))
+                    remetente, destinatarios = None, []
+                    await reply("250 Mensagem aceita")
+                elif command == "RSET":
+                    remetente, destinatarios = None, []
+                    await reply("250 OK")
+                elif command == "NOOP":
+                    await reply("250 OK")
+                elif command == "QUIT":
+                    await reply("221 Até logo")
+                    break
+                else:
+                    await reply("502 Comando não implementado")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _store(self, remetente: Optional[str], destinatarios: List[str], data: bytes) -> None:
+        message = {"from": remetente, "to": list(destinatarios), "data": data}
+        self.messages.append(message)
+        if self.verbose:
+            parsed = message_from_bytes(data, policy=default_policy)
+            print(f"--- {remetente} -> {', '.join(destinatarios)}: {parsed['Subject']} ({len(data)} bytes)")
+
+
+async def main(host: str, port: int) -> None:
+    server = LocalSMTPServer(host, port, verbose=True)
+    await server.start()
+    print(f"SMTP local escutando em {server.host}:{server.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor SMTP local para desenvolvimento")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -27,3 +27,154 @@ def get_host():
 def get_port():
     """Retorna a porta do servidor"""
     return int(os.getenv("PORT", "8000"))
+
+def get_compression_min_size():
+    """Retorna o tamanho mínimo (bytes) para comprimir respostas"""
+    return int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+def get_response_cache_ttl():
+    """Retorna o tempo de vida (segundos) das respostas cacheadas do cardápio"""
+    return int(os.getenv("RESPONSE_CACHE_TTL", "60"))
+
+def get_response_cache_max_entries():
+    """Retorna o máximo de respostas mantidas no cache do cardápio (as menos usadas saem primeiro)"""
+    return int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+
+def get_rate_limit_backend():
+    """Retorna o backend do rate limit de autenticação ("memory" ou "mongo")"""
+    return os.getenv("RATE_LIMIT_BACKEND", "memory")
+
+def get_email_outbox_workers():
+    """Retorna quantas tarefas de envio o outbox de emails roda por processo"""
+    return int(os.getenv("EMAIL_OUTBOX_WORKERS", "2"))
+
+def get_smtp_pool_size():
+    """Retorna o máximo de conexões SMTP abertas simultaneamente pelo pool"""
+    return int(os.getenv("SMTP_POOL_SIZE", "4"))
+
+def get_smtp_max_messages_per_connection():
+    """Retorna quantas mensagens uma conexão SMTP envia antes de ser reciclada"""
+    return int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+
+def get_smtp_idle_timeout():
+    """Retorna após quantos segundos ociosa uma conexão SMTP é encerrada"""
+    return float(os.getenv("SMTP_IDLE_TIMEOUT", "30"))
+
+def get_image_workers():
+    """Retorna quantos processos o pool de processamento de imagens usa"""
+    return int(os.getenv("IMAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+def get_image_queue_size():
+    """Retorna o máximo de jobs de imagem em andamento/na fila antes de recusar uploads"""
+    return int(os.getenv("IMAGE_QUEUE_SIZE", "16"))
+
+def get_image_job_timeout():
+    """Retorna o tempo limite (segundos) de cada job de imagem"""
+    return int(os.getenv("IMAGE_JOB_TIMEOUT", "30"))
+
+def get_image_resize_workers():
+    """Retorna quantos processos o pool do redimensionamento sob demanda (/img) usa, separado do pool dos uploads"""
+    return int(os.getenv("IMAGE_RESIZE_WORKERS", str(max(1, min(2, (os.cpu_count() or 1) // 2)))))
+
+def get_image_resize_queue_size():
+    """Retorna o máximo de renderizações do /img em andamento/na fila antes de responder 503"""
+    return int(os.getenv("IMAGE_RESIZE_QUEUE_SIZE", "8"))
+
+def get_image_async_threshold():
+    """Retorna o tamanho (bytes) a partir do qual o upload com transformação responde com job_id"""
+    return int(os.getenv("IMAGE_ASYNC_THRESHOLD", str(8 * 1024 * 1024)))
+
+def get_upload_dir():
+    """Retorna o diretório onde os uploads são gravados (servido em /uploads)"""
+    default = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "uploads")
+    return os.path.abspath(os.getenv("UPLOAD_DIR", default))
+
+def get_upload_max_size():
+    """Retorna o tamanho máximo (bytes) de um arquivo enviado"""
+    return int(os.getenv("UPLOAD_MAX_SIZE", str(10 * 1024 * 1024)))
+
+def get_uploads_cache_max_age():
+    """Retorna o max-age (segundos) de /uploads para arquivos que não têm nome pelo conteúdo"""
+    return int(os.getenv("UPLOADS_CACHE_MAX_AGE", "3600"))
+
+def get_uploads_accel_redirect():
+    """Retorna o prefixo interno do nginx para X-Accel-Redirect em /uploads (vazio = o app envia o arquivo)"""
+    return os.getenv("UPLOADS_ACCEL_REDIRECT", "").rstrip("/")
+
+def get_image_cache_dir():
+    """Retorna o diretório do cache em disco das imagens redimensionadas por /img"""
+    default = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".cache", "img")
+    return os.path.abspath(os.getenv("IMAGE_CACHE_DIR", default))
+
+def get_image_cache_max_size():
+    """Retorna o tamanho máximo (bytes) do cache de imagens redimensionadas antes de descartar as menos usadas"""
+    return int(os.getenv("IMAGE_CACHE_MAX_SIZE", str(512 * 1024 * 1024)))
+
+def get_image_max_pixels():
+    """Retorna o máximo de pixels (largura x altura) aceito numa imagem antes de decodificá-la"""
+    return int(os.getenv("IMAGE_MAX_PIXELS", str(40_000_000)))
+
+def get_storage_backend():
+    """Retorna o backend de armazenamento dos uploads: "local" (UPLOAD_DIR) ou "s3" (bucket S3/MinIO)"""
+    return os.getenv("STORAGE_BACKEND", "local").strip().lower()
+
+def get_s3_endpoint_url():
+    """Retorna a URL do serviço S3 (ex.: http://minio:9000 ou https://s3.us-east-1.amazonaws.com)"""
+    return os.getenv("S3_ENDPOINT_URL", "http://127.0.0.1:9000")
+
+def get_s3_bucket():
+    """Retorna o bucket onde os uploads são gravados"""
+    return os.getenv("S3_BUCKET", "uploads")
+
+def get_s3_access_key():
+    """Retorna a chave de acesso do S3"""
+    return os.getenv("S3_ACCESS_KEY", "")
+
+def get_s3_secret_key():
+    """Retorna o segredo da chave de acesso do S3"""
+    return os.getenv("S3_SECRET_KEY", "")
+
+def get_s3_region():
+    """Retorna a região usada na assinatura das requisições S3"""
+    return os.getenv("S3_REGION", "us-east-1")
+
+def get_storage_cache_dir():
+    """Retorna o diretório do cache local de leitura do armazenamento remoto"""
+    default = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".cache", "storage")
+    return os.path.abspath(os.getenv("STORAGE_CACHE_DIR", default))
+
+def get_storage_cache_max_size():
+    """Retorna o tamanho máximo (bytes) do cache local do armazenamento remoto"""
+    return int(os.getenv("STORAGE_CACHE_MAX_SIZE", str(1024 * 1024 * 1024)))
+
+def get_delivery_zones_refresh_seconds():
+    """Retorna de quantos em quantos segundos cada processo confere se as zonas de entrega mudaram no banco (0 desliga)"""
+    return float(os.getenv("DELIVERY_ZONES_REFRESH_SECONDS", "60"))
+
+def get_menu_search_refresh_seconds():
+    """Retorna de quantos em quantos segundos cada processo confere se produtos ou categorias mudaram no banco, para atualizar a busca (0 desliga)"""
+    return float(os.getenv("MENU_SEARCH_REFRESH_SECONDS", "60"))
+
+def get_product_import_max_rows():
+    """Retorna o número máximo de linhas aceitas por importação de produtos em lote"""
+    return int(os.getenv("PRODUCT_IMPORT_MAX_ROWS", "10000"))
+
+def get_promotions_refresh_seconds():
+    """Retorna de quantos em quantos segundos cada processo confere se as promoções mudaram no banco (0 desliga a conferência; as bordas das janelas são sempre respeitadas)"""
+    return float(os.getenv("PROMOTIONS_REFRESH_SECONDS", "60"))
+
+def get_event_loop_lag_interval():
+    """Retorna o intervalo (segundos) entre as medidas do atraso do event loop exportadas em /metrics (0 desliga)"""
+    return float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "1"))
+
+def get_metrics_token():
+    """Retorna o token exigido (Authorization: Bearer) para ler /metrics; vazio deixa o endpoint aberto"""
+    return os.getenv("METRICS_TOKEN", "")
+
+def get_profile_slow_query_ms():
+    """Retorna a duração (ms) a partir da qual uma consulta de uma requisição perfilada (X-Profile) tem o plano registrado no log"""
+    return float(os.getenv("PROFILE_SLOW_QUERY_MS", "100"))
+
+def get_profile_n_plus_one_threshold():
+    """Retorna quantas repetições do mesmo formato de consulta numa requisição perfilada (X-Profile) caracterizam um N+1"""
+    return int(os.getenv("PROFILE_N_PLUS_ONE_THRESHOLD", "5"))
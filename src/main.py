@@ -1,21 +1,37 @@
 """
 Aplicação principal do sistema de restaurante de delivery
 """
-from fastapi import FastAPI
+import hmac
+
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from mongoengine import connect
 from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
 
 
 load_dotenv()
 
-from src.routes import categorias_router, produtos_router, clientes_router, auth_router, funcionarios_router, pedidos_router, motoboy_router, files_router
-
-
-from fastapi.staticfiles import StaticFiles
-import os
-
-from src.config.config import get_mongodb_url, get_database_name, get_cors_origins
+from src.routes import categorias_router, produtos_router, clientes_router, auth_router, funcionarios_router, pedidos_router, motoboy_router, files_router, imagens_router, zonas_entrega_router, promocoes_router
+
+
+from src.config.config import get_mongodb_url, get_database_name, get_cors_origins, get_compression_min_size, get_delivery_zones_refresh_seconds, get_menu_search_refresh_seconds, get_promotions_refresh_seconds, get_event_loop_lag_interval, get_metrics_token
+from src.models import Cliente
+from src.utils.compression import CompressionMiddleware
+from src.utils.identidades import backfill_identities
+from src.utils.uploads import UploadSizeLimitMiddleware
+from src.utils.static_uploads import UploadsStaticFiles
+from src.utils.email_outbox import outbox_worker
+from src.utils.email_service import email_service
+from src.utils.image_jobs import image_jobs, resize_jobs
+from src.utils.image_cache import image_cache
+from src.utils.storage import storage
+from src.utils.delivery_zones import zone_index
+from src.utils.menu_search import menu_search
+from src.utils.promotions import promotion_index
+from src.utils.metrics import MetricsMiddleware, CONTENT_TYPE_LATEST, loop_lag_monitor, mongo_listeners, release_process, render_metrics
+from src.utils.profiler import ProfilingMiddleware, query_profiler
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -39,11 +55,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressão gzip/Brotli negociada (listas do cardápio e de pedidos são JSON grande e repetitivo)
+app.add_middleware(CompressionMiddleware, minimum_size=get_compression_min_size())
+
+# Limite de tamanho dos uploads aplicado antes do parse do multipart
+app.add_middleware(UploadSizeLimitMiddleware, path_prefix="/files/upload")
+
+# Perfil de consultas ao MongoDB por requisição (admin com o cabeçalho X-Profile: 1)
+app.add_middleware(ProfilingMiddleware)
+
+# Métricas Prometheus por rota (adicionado por último: mede também os middlewares acima)
+app.add_middleware(MetricsMiddleware)
+
 # Conectar ao MongoDB
 try:
     connect(
         db=get_database_name(),
-        host=get_mongodb_url()
+        host=get_mongodb_url(),
+        event_listeners=mongo_listeners() + [query_profiler]
     )
     print("✅ Conectado ao MongoDB com sucesso!")
 except Exception as e:
@@ -59,11 +88,64 @@ app.include_router(funcionarios_router)
 app.include_router(pedidos_router)
 app.include_router(motoboy_router)
 app.include_router(files_router)
-
-# Servir arquivos estáticos de uploads
-uploads_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "uploads"))
-os.makedirs(uploads_dir, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
+app.include_router(imagens_router)
+app.include_router(zonas_entrega_router)
+app.include_router(promocoes_router)
+
+# Servir os uploads a partir do armazenamento configurado (disco local ou S3 com cache local)
+app.mount("/uploads", UploadsStaticFiles(storage=storage), name="uploads")
+
+
+@app.on_event("startup")
+async def iniciar_workers():
+    """Sincroniza identidades e chaves de busca de contas antigas, inicia o worker do outbox de emails, indexa os caches de imagens em disco e carrega as zonas de entrega, a busca do cardápio e as promoções"""
+    # Identidades das contas que ainda não têm (anteriores à coleção ou de uma execução interrompida)
+    try:
+        resultado = await run_in_threadpool(backfill_identities)
+        if resultado["criadas"] or resultado["conflitos"]:
+            print(f"Identidades sincronizadas: {resultado}")
+    except Exception as e:
+        print(f"❌ Erro ao sincronizar identidades: {e}")
+    # Chaves de busca de clientes anteriores à busca da equipe (só os que ainda não têm)
+    try:
+        atualizados = await run_in_threadpool(Cliente.backfill_search_keys)
+        if atualizados:
+            print(f"Chaves de busca preenchidas para {atualizados} clientes")
+    except Exception as e:
+        print(f"❌ Erro ao preencher chaves de busca de clientes: {e}")
+    outbox_worker.start()
+    image_cache.load()
+    storage.load()
+    try:
+        zone_index.load()
+    except Exception as e:
+        print(f"❌ Erro ao carregar zonas de entrega: {e}")
+    zone_index.start(get_delivery_zones_refresh_seconds())
+    try:
+        menu_search.load()
+    except Exception as e:
+        print(f"❌ Erro ao carregar a busca do cardápio: {e}")
+    menu_search.start(get_menu_search_refresh_seconds())
+    try:
+        promotion_index.load()
+    except Exception as e:
+        print(f"❌ Erro ao carregar promoções: {e}")
+    promotion_index.start(get_promotions_refresh_seconds())
+    loop_lag_monitor.start(get_event_loop_lag_interval())
+
+
+@app.on_event("shutdown")
+async def parar_workers():
+    await outbox_worker.stop()
+    await zone_index.stop()
+    await menu_search.stop()
+    await promotion_index.stop()
+    await loop_lag_monitor.stop()
+    await email_service.transport.close()
+    image_jobs.shutdown()
+    resize_jobs.shutdown()
+    storage.close()
+    release_process()
 
 
 @app.get("/")
@@ -81,6 +163,14 @@ async def health_check():
     """Verificar saúde da API"""
     return {"status": "healthy", "message": "API funcionando normalmente"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Métricas no formato do Prometheus (com METRICS_TOKEN definido, exige Authorization: Bearer <token>)"""
+    token = get_metrics_token()
+    if token and not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de métricas inválido")
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -7,6 +7,10 @@ from .cliente import Cliente, Endereco
 from .funcionario import Funcionario
 from .pedido import Pedido, PedidoHistoricoStatus, PedidoItem
 from .password_reset import TokenResetSenha
+from .identidade import Identidade
+from .email_outbox import EmailOutbox
+from .zona_entrega import ZonaEntrega, FaixaCep
+from .promocao import Promocao
 
 __all__ = [
     'Categoria',
@@ -18,5 +22,10 @@ __all__ = [
     'Pedido',
     'PedidoHistoricoStatus',
     'PedidoItem',
-    'TokenResetSenha'
+    'TokenResetSenha',
+    'Identidade',
+    'EmailOutbox',
+    'ZonaEntrega',
+    'FaixaCep',
+    'Promocao'
 ]
@@ -1,10 +1,14 @@
 """
 Modelo Cliente para o sistema de restaurante de delivery
 """
-from mongoengine import Document, StringField, EmailField, ListField, EmbeddedDocumentField, EmbeddedDocument, DateTimeField
+from mongoengine import Document, StringField, EmailField, ListField, EmbeddedDocumentField, EmbeddedDocument, DateTimeField, FloatField
 from datetime import datetime
 import uuid
 
+from pymongo import UpdateOne
+
+from src.utils.text import digits, fold
+
 class Endereco(EmbeddedDocument):
     """
     Modelo para endereços de entrega dos clientes
@@ -16,6 +20,9 @@ class Endereco(EmbeddedDocument):
     cidade = StringField(required=True, max_length=100)
     cep = StringField(required=True, max_length=20)
     complemento = StringField(max_length=200)
+    # opcionais: com coordenadas a zona de entrega é resolvida pelo polígono, senão pelo CEP
+    latitude = FloatField(min_value=-90, max_value=90)
+    longitude = FloatField(min_value=-180, max_value=180)
     
     def to_dict(self):
         return {
@@ -25,7 +32,24 @@ class Endereco(EmbeddedDocument):
             'bairro': self.bairro,
             'cidade': self.cidade,
             'cep': self.cep,
-            'complemento': self.complemento
+            'complemento': self.complemento,
+            'latitude': self.latitude,
+            'longitude': self.longitude
+        }
+
+    @staticmethod
+    def raw_to_dict(raw: dict) -> dict:
+        """Converte endereço bruto (as_pymongo) no mesmo formato de to_dict"""
+        return {
+            'id': raw.get('id'),
+            'rua': raw.get('rua'),
+            'numero': raw.get('numero'),
+            'bairro': raw.get('bairro'),
+            'cidade': raw.get('cidade'),
+            'cep': raw.get('cep'),
+            'complemento': raw.get('complemento'),
+            'latitude': raw.get('latitude'),
+            'longitude': raw.get('longitude')
         }
 
 class Cliente(Document):
@@ -39,11 +63,42 @@ class Cliente(Document):
     enderecos = ListField(EmbeddedDocumentField(Endereco), default=[])
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
+    # Chaves normalizadas para a busca por prefixo da equipe (ver search_keys)
+    busca_nome = StringField()
+    busca_email = StringField()
+    busca_telefone = StringField()
     
     def save(self, *args, **kwargs):
-        """Override save para atualizar updated_at"""
+        """Override save para atualizar updated_at e as chaves de busca"""
         self.updated_at = datetime.utcnow()
+        for field, value in self.search_keys(self.nome, self.email, self.telefone).items():
+            setattr(self, field, value)
         return super().save(*args, **kwargs)
+
+    @staticmethod
+    def search_keys(nome: str, email: str, telefone: str) -> dict:
+        """Nome e email sem acentos/minúsculos e só os dígitos do telefone"""
+        return {
+            'busca_nome': fold(nome),
+            'busca_email': fold(email),
+            'busca_telefone': digits(telefone),
+        }
+
+    @classmethod
+    def backfill_search_keys(cls, batch_size: int = 500) -> int:
+        """Preenche as chaves de busca de clientes gravados antes delas existirem; retorna quantos foram atualizados"""
+        collection = cls._get_collection()
+        total, ops = 0, []
+        pendentes = collection.find({"busca_nome": None}, {"nome": 1, "email": 1, "telefone": 1}, batch_size=batch_size)
+        for raw in pendentes:
+            keys = cls.search_keys(raw.get("nome"), raw.get("email"), raw.get("telefone"))
+            ops.append(UpdateOne({"_id": raw["_id"]}, {"$set": keys}))
+            if len(ops) >= batch_size:
+                total += collection.bulk_write(ops, ordered=False).modified_count
+                ops = []
+        if ops:
+            total += collection.bulk_write(ops, ordered=False).modified_count
+        return total
     
     def to_dict(self):
         """Converte o documento para dicionário"""
@@ -69,9 +124,31 @@ class Cliente(Document):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
+    @staticmethod
+    def raw_to_dict_safe(raw: dict) -> dict:
+        """Converte documento bruto (as_pymongo) no mesmo formato de to_dict_safe"""
+        return {
+            'id': str(raw['_id']),
+            'nome': raw.get('nome'),
+            'email': raw.get('email'),
+            'telefone': raw.get('telefone'),
+            'enderecos': [Endereco.raw_to_dict(end) for end in raw.get('enderecos', [])],
+            'created_at': raw['created_at'].isoformat() if raw.get('created_at') else None,
+            'updated_at': raw['updated_at'].isoformat() if raw.get('updated_at') else None
+        }
+
     def __str__(self):
         return f"Cliente: {self.nome} - {self.email}"
     
     class Meta:
         collection = 'clientes'
         indexes = ['email', 'nome']
+
+    # A busca ordena pela chave e pelo _id (paginação por cursor): índices compostos
+    meta = {
+        'indexes': [
+            ('busca_nome', 'id'),
+            ('busca_email', 'id'),
+            ('busca_telefone', 'id'),
+        ]
+    }
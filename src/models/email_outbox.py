@@ -0,0 +1,60 @@
+"""
+Modelo EmailOutbox: fila persistente de emails a enviar
+"""
+from mongoengine import Document, StringField, EmailField, DictField, IntField, DateTimeField
+from datetime import datetime
+
+OUTBOX_STATUS_CHOICES = ("pendente", "enviando", "enviado", "falhou")
+
+
+class EmailOutbox(Document):
+    """
+    Job de envio de email
+
+    As rotas só enfileiram; o worker (src/utils/email_outbox.py) reivindica o job
+    atomicamente, envia e registra o resultado, reagendando com backoff em caso de falha.
+    """
+    tipo = StringField(required=True, max_length=50)
+    destinatario = EmailField(required=True)
+    dados = DictField()
+    status = StringField(default="pendente", choices=OUTBOX_STATUS_CHOICES)
+    tentativas = IntField(default=0)
+    max_tentativas = IntField(default=6)
+    proxima_tentativa = DateTimeField(default=datetime.utcnow)
+    # fim do "lease" de um job em envio; se o worker morrer, o job volta a ficar disponível
+    bloqueado_ate = DateTimeField()
+    ultimo_erro = StringField()
+    enviado_em = DateTimeField()
+    created_at = DateTimeField(default=datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.utcnow)
+
+    def save(self, *args, **kwargs):
+        """Override save para atualizar updated_at"""
+        self.updated_at = datetime.utcnow()
+        return super().save(*args, **kwargs)
+
+    def to_dict(self):
+        """Converte o documento para dicionário (sem os dados do email)"""
+        return {
+            'id': str(self.id),
+            'tipo': self.tipo,
+            'destinatario': self.destinatario,
+            'status': self.status,
+            'tentativas': self.tentativas,
+            'proxima_tentativa': self.proxima_tentativa.isoformat() if self.proxima_tentativa else None,
+            'ultimo_erro': self.ultimo_erro,
+            'enviado_em': self.enviado_em.isoformat() if self.enviado_em else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __str__(self):
+        return f"EmailOutbox: {self.tipo} -> {self.destinatario} ({self.status})"
+
+    meta = {
+        'collection': 'email_outbox',
+        'indexes': [
+            ('status', 'proxima_tentativa'),
+            # jobs enviados são apagados após 7 dias
+            {'fields': ['enviado_em'], 'expireAfterSeconds': 7 * 24 * 3600}
+        ]
+    }
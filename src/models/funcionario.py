@@ -34,6 +34,19 @@ class Funcionario(Document):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+    @staticmethod
+    def raw_to_dict_safe(raw: dict) -> dict:
+        """Converte documento bruto (as_pymongo) no mesmo formato de to_dict_safe"""
+        return {
+            'id': str(raw['_id']),
+            'nome': raw.get('nome'),
+            'email': raw.get('email'),
+            'status': raw.get('status', 'funcionario'),
+            'cpf': raw.get('cpf'),
+            'created_at': raw['created_at'].isoformat() if raw.get('created_at') else None,
+            'updated_at': raw['updated_at'].isoformat() if raw.get('updated_at') else None
+        }
+
     def __str__(self):
         return f"Funcionario: {self.nome} - {self.email} ({self.status})"
 
@@ -0,0 +1,27 @@
+"""
+Modelo Identidade: índice único de emails entre clientes e funcionários
+"""
+from mongoengine import Document, StringField, ObjectIdField, DateTimeField
+from datetime import datetime
+
+
+class Identidade(Document):
+    """
+    Mapeia um email normalizado para o tipo e o id do usuário
+
+    O índice único em `email` garante a unicidade global entre as coleções de
+    clientes e funcionários, e permite resolver qualquer conta com uma única
+    consulta indexada.
+    """
+    email = StringField(required=True, unique=True, max_length=254)
+    user_type = StringField(required=True, choices=("cliente", "funcionario"))
+    user_id = ObjectIdField(required=True)
+    created_at = DateTimeField(default=datetime.utcnow)
+
+    def __str__(self):
+        return f"Identidade: {self.email} ({self.user_type})"
+
+    meta = {
+        'collection': 'identidades',
+        'indexes': ['user_id']
+    }
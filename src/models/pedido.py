@@ -5,7 +5,7 @@ from datetime import datetime
 from decimal import Decimal
 from mongoengine import (
     Document, EmbeddedDocument, ReferenceField, IntField, DecimalField,
-    DateTimeField, StringField, EmbeddedDocumentField, ListField
+    DateTimeField, StringField, EmbeddedDocumentField, ListField, BooleanField
 )
 from src.models.cliente import Cliente, Endereco
 from src.models.produto import Produto
@@ -19,6 +19,8 @@ class PedidoItem(EmbeddedDocument):
     produto = ReferenceField(Produto, required=True)
     quantidade = IntField(required=True, min_value=1)
     preco_unitario = DecimalField(required=True, precision=2)
+    # unidades baixadas do estoque do produto (devolvidas se o pedido for cancelado)
+    estoque_reservado = BooleanField(default=False)
 
     def to_dict(self):
         try:
@@ -69,6 +71,9 @@ class Pedido(Document):
     taxa_entrega = DecimalField(precision=2, default=Decimal("0.00"))
     desconto = DecimalField(precision=2, default=Decimal("0.00"))
     total = DecimalField(precision=2, default=Decimal("0.00"))
+    # zona resolvida no servidor a partir do endereço (None em retirada ou sem zonas cadastradas)
+    zona_entrega = StringField(max_length=100, null=True)
+    tempo_estimado_min = IntField(null=True)
 
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
@@ -100,10 +105,60 @@ class Pedido(Document):
             "taxa_entrega": float(self.taxa_entrega or 0),
             "desconto": float(self.desconto or 0),
             "total": float(self.total or 0),
+            "zona_entrega": self.zona_entrega,
+            "tempo_estimado_min": self.tempo_estimado_min,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
+    @staticmethod
+    def raw_to_dict(raw: dict, clientes: dict, produtos: dict) -> dict:
+        """
+        Converte pedido bruto (as_pymongo) no mesmo formato de to_dict
+
+        `clientes` e `produtos` mapeiam ObjectId para nome/título e são carregados
+        com um $in por coleção, em vez de um dereference por pedido e por item.
+        """
+        cliente_id = raw.get('cliente')
+        endereco = raw.get('endereco')
+        return {
+            "id": str(raw['_id']),
+            "cliente": {
+                "id": str(cliente_id),
+                "nome": clientes.get(cliente_id, 'Cliente não encontrado')
+            } if cliente_id else None,
+            "endereco": {
+                "rua": endereco.get('rua', ''),
+                "numero": endereco.get('numero', ''),
+                "bairro": endereco.get('bairro', ''),
+                "cidade": endereco.get('cidade', '')
+            } if endereco else None,
+            "itens": [
+                {
+                    "produto": {
+                        "id": str(item['produto']),
+                        "titulo": produtos.get(item['produto'], 'Produto não encontrado')
+                    } if item.get('produto') else None,
+                    "quantidade": item.get('quantidade'),
+                    "preco_unitario": float(item.get('preco_unitario') or 0),
+                }
+                for item in raw.get('itens', [])
+            ],
+            "status": raw.get('status', 'Pendente'),
+            "data_hora": raw['data_hora'].isoformat() if raw.get('data_hora') else None,
+            "metodo_pagamento": raw.get('metodo_pagamento'),
+            "metodo_entrega": raw.get('metodo_entrega', 'delivery'),
+            "observacoes": raw.get('observacoes'),
+            "subtotal": float(raw.get('subtotal') or 0),
+            "taxa_entrega": float(raw.get('taxa_entrega') or 0),
+            "desconto": float(raw.get('desconto') or 0),
+            "total": float(raw.get('total') or 0),
+            "zona_entrega": raw.get('zona_entrega'),
+            "tempo_estimado_min": raw.get('tempo_estimado_min'),
+            "created_at": raw['created_at'].isoformat() if raw.get('created_at') else None,
+            "updated_at": raw['updated_at'].isoformat() if raw.get('updated_at') else None,
+        }
+
     class Meta:
         collection = "pedidos"
         indexes = ["cliente", "status", "-created_at"]
@@ -1,9 +1,11 @@
 """
 Modelo Produto para o sistema de restaurante de delivery
 """
-from mongoengine import Document, StringField, DecimalField, ReferenceField, ListField, EmbeddedDocumentField, EmbeddedDocument, DateTimeField, BooleanField
+from mongoengine import Document, StringField, DecimalField, ReferenceField, ListField, EmbeddedDocumentField, EmbeddedDocument, DateTimeField, BooleanField, DictField, IntField
 from datetime import datetime
 
+from src.utils.image_variants import build_srcset
+
 class Acompanhamento(EmbeddedDocument):
     """
     Modelo para acompanhamentos de produtos (ex: Queijo extra, Bacon)
@@ -29,8 +31,14 @@ class Produto(Document):
     preco = DecimalField(required=True, precision=2)
     preco_promocional = DecimalField(precision=2)
     image_url = StringField(max_length=500)  # Campo para URL da imagem
+    # variantes responsivas da imagem: {"webp": {"160": url, ...}, "jpeg": {...}}
+    image_variants = DictField(default=dict)
     status = StringField(default="Ativo", max_length=20, choices=["Ativo", "Inativo", "Indisponível"])
     estrelas_kaiserhaus = BooleanField(default=False)
+    # unidades disponíveis; None = sem controle de estoque (baixado pelos pedidos em src/utils/stock.py)
+    estoque = IntField(min_value=0)
+    # "Indisponível" por falta de estoque (não pelo admin): só esses voltam a "Ativo" na reposição
+    esgotado = BooleanField(default=False)
     acompanhamentos = ListField(EmbeddedDocumentField(Acompanhamento), default=[])
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
@@ -40,6 +48,17 @@ class Produto(Document):
         self.updated_at = datetime.utcnow()
         return super().save(*args, **kwargs)
     
+    def sync_stock_status(self):
+        """Estoque zerado deixa o produto "Indisponível"; a reposição reativa só o que foi esgotado"""
+        if self.estoque is None:
+            return
+        if self.estoque == 0 and self.status == "Ativo":
+            self.status = "Indisponível"
+            self.esgotado = True
+        elif self.estoque > 0 and self.status == "Indisponível" and self.esgotado:
+            self.status = "Ativo"
+            self.esgotado = False
+
     def to_dict(self):
         """Converte o documento para dicionário"""
         return {
@@ -55,13 +74,50 @@ class Produto(Document):
             'preco': float(self.preco),
             'preco_promocional': float(self.preco_promocional) if self.preco_promocional else None,
             'image_url': self.image_url,
+            'image_variants': self.image_variants or {},
+            'image_srcset': build_srcset(self.image_variants),
             'status': self.status,
             'estrelas_kaiserhaus': self.estrelas_kaiserhaus,
+            'estoque': self.estoque,
             'acompanhamentos': [acomp.to_dict() for acomp in self.acompanhamentos],
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
+    @staticmethod
+    def raw_to_dict(raw: dict, categorias: dict) -> dict:
+        """
+        Converte documento bruto (as_pymongo) no mesmo formato de to_dict
+
+        `categorias` mapeia o ObjectId da categoria para o nome, carregado com um só $in.
+        """
+        categoria_id = raw.get('categoria')
+        preco_promocional = raw.get('preco_promocional')
+        return {
+            'id': str(raw['_id']),
+            'categoria': {
+                'id': str(categoria_id),
+                'nome': categorias.get(categoria_id)
+            } if categoria_id in categorias else None,
+            'titulo': raw.get('titulo'),
+            'descricao_capa': raw.get('descricao_capa'),
+            'descricao_geral': raw.get('descricao_geral'),
+            'image_url': raw.get('image_url'),
+            'preco': float(raw.get('preco') or 0),
+            'preco_promocional': float(preco_promocional) if preco_promocional else None,
+            'image_variants': raw.get('image_variants') or {},
+            'image_srcset': build_srcset(raw.get('image_variants')),
+            'status': raw.get('status', 'Ativo'),
+            'estrelas_kaiserhaus': raw.get('estrelas_kaiserhaus', False),
+            'estoque': raw.get('estoque'),
+            'acompanhamentos': [
+                {'nome': a.get('nome'), 'preco': float(a.get('preco') or 0)}
+                for a in raw.get('acompanhamentos', [])
+            ],
+            'created_at': raw['created_at'].isoformat() if raw.get('created_at') else None,
+            'updated_at': raw['updated_at'].isoformat() if raw.get('updated_at') else None
+        }
+
     def __str__(self):
         return f"Produto: {self.titulo} - R$ {self.preco}"
     
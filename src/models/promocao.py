@@ -0,0 +1,67 @@
+"""
+Modelo Promocao: preço promocional de um produto dentro de uma janela de tempo
+"""
+from mongoengine import (
+    Document,
+    StringField,
+    BooleanField,
+    DecimalField,
+    ReferenceField,
+    DateTimeField,
+    ValidationError,
+)
+from datetime import datetime
+
+
+class Promocao(Document):
+    """
+    Preço promocional agendado para um produto
+
+    A janela é [inicio, fim) em UTC; sem `fim` a promoção vale até ser
+    desativada. As promoções ficam num índice em memória
+    (src/utils/promotions.py) que troca o conjunto ativo exatamente nas
+    bordas das janelas; se mais de uma estiver vigente para o mesmo produto,
+    vale o menor preço.
+    """
+    produto = ReferenceField('Produto', required=True)
+    preco_promocional = DecimalField(required=True, min_value=0, precision=2)
+    inicio = DateTimeField(required=True)
+    fim = DateTimeField()
+    ativa = BooleanField(default=True)
+    descricao = StringField(max_length=200)
+    created_at = DateTimeField(default=datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.utcnow)
+
+    def clean(self):
+        if self.preco_promocional is not None and self.preco_promocional <= 0:
+            raise ValidationError("Preço promocional deve ser maior que zero")
+        if self.fim is not None and self.inicio is not None and self.fim <= self.inicio:
+            raise ValidationError("O fim da promoção deve ser posterior ao início")
+
+    def save(self, *args, **kwargs):
+        """Override save para atualizar updated_at"""
+        self.updated_at = datetime.utcnow()
+        return super().save(*args, **kwargs)
+
+    def to_dict(self):
+        """Converte o documento para dicionário (sem carregar o produto)"""
+        produto = self._data.get('produto')
+        return {
+            'id': str(self.id),
+            'produto_id': str(getattr(produto, 'id', produto)) if produto else None,
+            'preco_promocional': float(self.preco_promocional),
+            'inicio': self.inicio.isoformat() if self.inicio else None,
+            'fim': self.fim.isoformat() if self.fim else None,
+            'ativa': self.ativa,
+            'descricao': self.descricao,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __str__(self):
+        return f"Promocao: {self.preco_promocional} ({self.inicio} - {self.fim})"
+
+    meta = {
+        'collection': 'promocoes',
+        'indexes': ['produto', '-updated_at']
+    }
@@ -0,0 +1,88 @@
+"""
+Modelo ZonaEntrega: áreas atendidas, com taxa e tempo estimado de entrega
+"""
+from mongoengine import (
+    Document,
+    EmbeddedDocument,
+    StringField,
+    BooleanField,
+    DecimalField,
+    IntField,
+    FloatField,
+    ListField,
+    EmbeddedDocumentField,
+    DateTimeField,
+    ValidationError,
+)
+from datetime import datetime
+from decimal import Decimal
+
+
+class FaixaCep(EmbeddedDocument):
+    """Intervalo fechado de CEPs (8 dígitos, sem máscara)"""
+    inicio = StringField(required=True, regex=r"^\d{8}$")
+    fim = StringField(required=True, regex=r"^\d{8}$")
+
+    def to_dict(self):
+        return {'inicio': self.inicio, 'fim': self.fim}
+
+
+class ZonaEntrega(Document):
+    """
+    Zona de entrega definida por um polígono (coordenadas), por faixas de CEP, ou pelos dois
+
+    As zonas são carregadas num índice em memória (src/utils/delivery_zones.py)
+    e o pedido resolve a zona do endereço sem consultar o banco. Quando o
+    endereço cai em mais de uma zona vale a de maior `prioridade`.
+    """
+    nome = StringField(required=True, max_length=100, unique=True)
+    ativa = BooleanField(default=True)
+    taxa = DecimalField(required=True, min_value=0, precision=2)
+    tempo_estimado_min = IntField(required=True, min_value=0)
+    prioridade = IntField(default=0)
+    # anel externo em [longitude, latitude] (ordem GeoJSON), sem repetir o primeiro ponto
+    poligono = ListField(ListField(FloatField()), default=[])
+    faixas_cep = ListField(EmbeddedDocumentField(FaixaCep), default=[])
+    created_at = DateTimeField(default=datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.utcnow)
+
+    def clean(self):
+        if not self.poligono and not self.faixas_cep:
+            raise ValidationError("A zona precisa de um polígono ou de ao menos uma faixa de CEP")
+        if self.poligono:
+            if len(self.poligono) < 3:
+                raise ValidationError("O polígono precisa de ao menos 3 pontos")
+            for ponto in self.poligono:
+                if len(ponto) != 2 or not (-180 <= ponto[0] <= 180 and -90 <= ponto[1] <= 90):
+                    raise ValidationError("Pontos do polígono devem ser [longitude, latitude]")
+        for faixa in self.faixas_cep:
+            if faixa.inicio > faixa.fim:
+                raise ValidationError(f"Faixa de CEP invertida: {faixa.inicio} > {faixa.fim}")
+
+    def save(self, *args, **kwargs):
+        """Override save para atualizar updated_at"""
+        self.updated_at = datetime.utcnow()
+        return super().save(*args, **kwargs)
+
+    def to_dict(self):
+        """Converte o documento para dicionário"""
+        return {
+            'id': str(self.id),
+            'nome': self.nome,
+            'ativa': self.ativa,
+            'taxa': float(self.taxa or Decimal("0")),
+            'tempo_estimado_min': self.tempo_estimado_min,
+            'prioridade': self.prioridade,
+            'poligono': self.poligono,
+            'faixas_cep': [faixa.to_dict() for faixa in self.faixas_cep],
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __str__(self):
+        return f"ZonaEntrega: {self.nome}"
+
+    meta = {
+        'collection': 'zonas_entrega',
+        'indexes': ['-updated_at']
+    }
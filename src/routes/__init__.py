@@ -9,6 +9,9 @@ from .funcionarios import router as funcionarios_router
 from .pedidos import router as pedidos_router 
 from .motoboy import router as motoboy_router
 from .files import router as files_router
+from .imagens import router as imagens_router
+from .zonas_entrega import router as zonas_entrega_router
+from .promocoes import router as promocoes_router
 
 
 __all__ = [
@@ -19,5 +22,8 @@ __all__ = [
     'funcionarios_router',
     'pedidos_router',
     'motoboy_router',
-    'files_router'
+    'files_router',
+    'imagens_router',
+    'zonas_entrega_router',
+    'promocoes_router'
 ]
@@ -1,36 +1,53 @@
 """
 Rotas de autenticação unificadas
 """
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
 import traceback
-import os
 from src.schemas.auth_schemas import LoginRequest, TokenResponse, SolicitacaoResetSenha, ConfirmacaoResetSenha
 from src.models import Cliente, Funcionario, TokenResetSenha
 from src.utils.security import verify_password, hash_password
 from src.utils.jwt_utils import create_access_token
 from src.utils.dependencies import get_current_user, AuthenticatedUser
-from src.utils.email_service import email_service
+from src.utils.email_outbox import enqueue_email
+from src.utils.rate_limit import login_throttle
+from src.utils.identidades import new_identity, resolve_identity
+from src.utils.metrics import timed
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "desconhecido"
+
+
 @router.post("/login", response_model=TokenResponse)
-async def login(payload: LoginRequest):
+@timed("login")
+async def login(payload: LoginRequest, request: Request):
     try:
+        # Recusa rajadas antes de consultar o banco e rodar o bcrypt
+        ip = _client_ip(request)
+        login_throttle.check_login(ip, payload.email)
+
         user = None
         role = "cliente"
-        if payload.user_type == "cliente":
-            user = Cliente.objects(email=payload.email).first()
-            role = "cliente"
-        else:
-            user = Funcionario.objects(email=payload.email).first()
-            if user:
-                role = user.status or "funcionario"
+        # Uma consulta indexada resolve o tipo e o id da conta; o usuário é lido pela chave primária
+        identidade = resolve_identity(payload.email)
+        if identidade and identidade.user_type == payload.user_type:
+            if payload.user_type == "cliente":
+                user = Cliente.objects(id=identidade.user_id).first()
+                role = "cliente"
+            else:
+                user = Funcionario.objects(id=identidade.user_id).first()
+                if user:
+                    role = user.status or "funcionario"
 
         if not user or not verify_password(payload.senha, getattr(user, 'senha', '')):
+            login_throttle.register_failure(ip, payload.email)
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
 
+        login_throttle.register_success(ip, payload.email)
+
         claims = {
             "user_type": payload.user_type,
             "role": role,
@@ -61,10 +78,6 @@ async def register_cliente(data: dict):
             if not data.get(field):
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Campo '{field}' é obrigatório")
 
-        # unicidade global de email
-        if Cliente.objects(email=data['email']).first() or Funcionario.objects(email=data['email']).first():
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email já cadastrado")
-
         # Debug da senha para identificar erro de 72 bytes
         try:
             senha_raw = data['senha']
@@ -74,13 +87,16 @@ async def register_cliente(data: dict):
         except Exception:
             pass
 
-        cliente = Cliente(
-            nome=data['nome'],
-            email=data['email'],
-            senha=hash_password(data['senha']),
-            telefone=data['telefone'],
-        )
-        cliente.save()
+        # unicidade global de email: a reserva em identidades falha se o email já existe
+        with new_identity(data['email'], "cliente") as user_id:
+            cliente = Cliente(
+                id=user_id,
+                nome=data['nome'],
+                email=data['email'],
+                senha=hash_password(data['senha']),
+                telefone=data['telefone'],
+            )
+            cliente.save(force_insert=True)
 
         token = create_access_token(str(cliente.id), {"user_type": "cliente", "role": "cliente"})
         return TokenResponse(
@@ -118,7 +134,7 @@ async def me(user: AuthenticatedUser = Depends(get_current_user)):
 
 
 @router.post("/esqueci-senha")
-async def forgot_password(payload: dict):
+async def forgot_password(payload: dict, request: Request):
     """
     Solicita reset de senha: envia token por email real
     Identifica automaticamente o tipo de usuário (cliente ou funcionário)
@@ -127,44 +143,26 @@ async def forgot_password(payload: dict):
         email = payload.get('email')
         if not email:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email é obrigatório")
+        # o corpo é um dict livre: número, lista etc. não chegam ao limitador nem à consulta
+        if not isinstance(email, str) or len(email) > 254:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email inválido")
+
+        # Limita pedidos por IP/email antes de gerar token e enviar email
+        login_throttle.check_reset(_client_ip(request), email)
         
-        # Buscar o usuário em ambas as collections
-        user = None
-        user_type = None
-        
-        # Primeiro tenta como cliente
-        user = Cliente.objects(email=email).first()
-        if user:
-            user_type = "cliente"
-        else:
-            # Se não encontrou como cliente, tenta como funcionário
-            user = Funcionario.objects(email=email).first()
-            if user:
-                user_type = "funcionario"
+        # Identifica o tipo de usuário com uma única consulta indexada
+        identidade = resolve_identity(email)
+        user_type = identidade.user_type if identidade else None
         
-        if not user:
+        if not identidade:
             # Não revela se o email existe ou não
             return {"message": "Se o email estiver cadastrado, você receberá instruções para redefinir sua senha."}
         
         # Criar token de reset com o tipo identificado
         reset_token = TokenResetSenha.create_token(email, user_type)
         
-        email_sent = await email_service.send_password_reset_email(
-            email=email,
-            token=reset_token.token,
-            user_type=user_type
-        )
-        
-        if email_sent:
-            print(f"Email de reset enviado com sucesso para: {email} (tipo: {user_type})")
-        else:
-            print(f" Erro ao enviar email para: {email}")
-            print(f"TOKEN FALLBACK - Email: {email}")
-            print(f"TOKEN FALLBACK - Token: {reset_token.token}")
-            print(f"TOKEN FALLBACK - Tipo: {user_type}")
-            
-            frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
-            print(f"TOKEN FALLBACK - Link: {frontend_url}/redefinir-senha?token={reset_token.token}")
+        # Envio fica com o worker do outbox; a resposta não espera o SMTP
+        enqueue_email("reset_senha", email, token=reset_token.token, user_type=user_type)
         
         return {"message": "Se o email estiver cadastrado, você receberá instruções para redefinir sua senha."}
         
@@ -192,10 +190,12 @@ async def reset_password(payload: ConfirmacaoResetSenha):
         
         # Buscar usuário
         user = None
-        if reset_token.user_type == "cliente":
-            user = Cliente.objects(email=reset_token.email).first()
-        else:
-            user = Funcionario.objects(email=reset_token.email).first()
+        identidade = resolve_identity(reset_token.email)
+        if identidade and identidade.user_type == reset_token.user_type:
+            if reset_token.user_type == "cliente":
+                user = Cliente.objects(id=identidade.user_id).first()
+            else:
+                user = Funcionario.objects(id=identidade.user_id).first()
         
         if not user:
             raise HTTPException(
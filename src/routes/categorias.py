@@ -1,23 +1,26 @@
 """
 Rotas para gerenciamento de categorias
 """
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
 from typing import List
 from src.models.categoria import Categoria
 from src.schemas.categoria_schemas import CategoriaCreate, CategoriaUpdate, CategoriaResponse
 from src.utils.validators import validate_object_id
 from src.utils.dependencies import require_role
+from src.utils.response_cache import cached_json_response, response_cache, CARDAPIO_CACHE
+from src.utils.menu_search import menu_search
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout
 from mongoengine.errors import ValidationError, NotUniqueError
 
 router = APIRouter(prefix="/categorias", tags=["categorias"])
 
 @router.get("/", response_model=List[CategoriaResponse])
-async def get_categorias():
+async def get_categorias(request: Request):
     """Listar todas as categorias"""
     try:
-        categorias = Categoria.objects()
-        return [categoria.to_dict() for categoria in categorias]
+        return cached_json_response(
+            request, CARDAPIO_CACHE, lambda: [categoria.to_dict() for categoria in Categoria.objects()]
+        )
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -47,6 +50,7 @@ async def add_categoria(categoria_data: CategoriaCreate):
         
         categoria = Categoria(**categoria_data.dict())
         categoria.save()
+        response_cache.invalidate(CARDAPIO_CACHE)
         return categoria.to_dict()
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
         raise HTTPException(
@@ -122,6 +126,8 @@ async def update_categoria(categoria_id: str, categoria_data: CategoriaUpdate):
                 setattr(categoria, field, value)
         
         categoria.save()
+        response_cache.invalidate(CARDAPIO_CACHE)
+        menu_search.update_category(categoria.id, categoria.nome)
         return categoria.to_dict()
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
         raise HTTPException(
@@ -156,6 +162,8 @@ async def delete_categoria(categoria_id: str):
             )
         
         categoria.delete()
+        response_cache.invalidate(CARDAPIO_CACHE)
+        menu_search.update_category(object_id, None)
         return None
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
         raise HTTPException(
@@ -1,27 +1,118 @@
 """
 Rotas para gerenciamento de clientes
 """
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+import re
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from typing import List, Literal, Optional
+from mongoengine.errors import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout
 from src.models.cliente import Cliente, Endereco
-from src.models.funcionario import Funcionario
 from src.utils.security import hash_password
 from src.utils.dependencies import get_current_user, require_role, AuthenticatedUser
+from src.utils.queries import keyset_page, raw_query
+from src.utils.text import digits, fold
+from src.utils.validators import safe_object_id
+from src.utils.identidades import new_identity, change_identity_email, remove_identity
 
 router = APIRouter(prefix="/clientes", tags=["clientes"])
 
+BUSCA_PAGE_SIZE = 20
+
+ENDERECO_FIELDS = ['rua', 'numero', 'bairro', 'cidade', 'cep', 'complemento', 'latitude', 'longitude']
+
+
+def _update_enderecos(filtro: dict, update: dict, array_filters: Optional[list] = None) -> Optional[dict]:
+    """
+    Aplica a atualização em uma única operação atômica e devolve só os endereços resultantes
+
+    Returns:
+        {"enderecos": [...]} do documento já atualizado, ou None se o filtro não casou
+    """
+    update.setdefault("$set", {}).setdefault("updated_at", datetime.utcnow())
+    return Cliente._get_collection().find_one_and_update(
+        filtro,
+        update,
+        projection={"_id": 0, "enderecos": 1},
+        array_filters=array_filters,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _enderecos_response(raw: dict) -> dict:
+    return {"enderecos": [Endereco.raw_to_dict(end) for end in raw.get("enderecos", [])]}
+
+
+def _endereco_not_found(cliente_id: str) -> HTTPException:
+    # o filtro não casou: distingue cliente inexistente de endereço inexistente só neste caminho
+    oid = safe_object_id(cliente_id)
+    if oid is None or not Cliente.objects(id=oid).count():
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente não encontrado")
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endereço não encontrado")
+
+
 @router.get("/", response_model=List[dict])
 async def get_clientes():
     """Listar todos os clientes"""
     try:
-        clientes = Cliente.objects()
-        return [cliente.to_dict_safe() for cliente in clientes]
+        clientes = raw_query(Cliente.objects(), exclude=["senha"])
+        return [Cliente.raw_to_dict_safe(cliente) for cliente in clientes]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao listar clientes: {str(e)}"
         )
 
+@router.get("/busca", response_model=dict, dependencies=[Depends(require_role("funcionario", "admin"))])
+async def buscar_clientes(
+    q: str = Query(..., min_length=1, max_length=100, description="Início do nome, do email ou do telefone"),
+    campo: Optional[Literal["nome", "email", "telefone"]] = Query(None, description="Padrão: deduzido do termo"),
+    limit: int = Query(BUSCA_PAGE_SIZE, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    """
+    Buscar clientes por prefixo do nome (sem acentos), do email ou dos dígitos do telefone - Acesso para funcionários e admin
+
+    Sem `campo`, termos com "@" buscam no email e termos só com dígitos (e
+    máscara) no telefone. Paginação por cursor: repita a busca com
+    `cursor=proximo_cursor` até ele vir nulo.
+    """
+    try:
+        if campo is None:
+            if "@" in q:
+                campo = "email"
+            elif digits(q) and not any(ch.isalpha() for ch in q):
+                campo = "telefone"
+            else:
+                campo = "nome"
+        key_field = f"busca_{campo}"
+        termo = digits(q) if campo == "telefone" else fold(q)
+        if not termo:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Termo de busca vazio")
+
+        # regex ancorada e sensível a maiúsculas: vira uma faixa do índice (busca_*, _id)
+        queryset = Cliente.objects(__raw__={key_field: {"$regex": f"^{re.escape(termo)}"}})
+        clientes, proximo = keyset_page(queryset, key_field, limit, cursor, exclude=["senha"])
+        return {
+            "clientes": [Cliente.raw_to_dict_safe(cliente) for cliente in clientes],
+            "proximo_cursor": proximo,
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar clientes: {str(e)}"
+        )
+
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def add_cliente(cliente_data: dict):
     """Criar novo cliente"""
@@ -35,13 +126,6 @@ async def add_cliente(cliente_data: dict):
                     detail=f"Campo '{field}' é obrigatório"
                 )
         
-        # Verificar se já existe cliente/funcionario com esse email (unicidade global)
-        if Cliente.objects(email=cliente_data['email']).first() or Funcionario.objects(email=cliente_data['email']).first():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Já existe um cliente com esse email"
-            )
-        
         # Processar endereços se fornecidos
         enderecos = []
         if cliente_data.get('enderecos'):
@@ -52,20 +136,24 @@ async def add_cliente(cliente_data: dict):
                     bairro=end_data['bairro'],
                     cidade=end_data['cidade'],
                     cep=end_data['cep'],
-                    complemento=end_data.get('complemento')
+                    complemento=end_data.get('complemento'),
+                    latitude=end_data.get('latitude'),
+                    longitude=end_data.get('longitude')
                 )
                 enderecos.append(endereco)
         
-        # Criar cliente
-        cliente = Cliente(
-            nome=cliente_data['nome'],
-            email=cliente_data['email'],
-            senha=hash_password(cliente_data['senha']),
-            telefone=cliente_data['telefone'],
-            enderecos=enderecos
-        )
-        
-        cliente.save()
+        # Criar cliente reservando o email em identidades (unicidade global)
+        with new_identity(cliente_data['email'], "cliente", detail="Já existe um cliente com esse email") as user_id:
+            cliente = Cliente(
+                id=user_id,
+                nome=cliente_data['nome'],
+                email=cliente_data['email'],
+                senha=hash_password(cliente_data['senha']),
+                telefone=cliente_data['telefone'],
+                enderecos=enderecos
+            )
+            
+            cliente.save(force_insert=True)
         return cliente.to_dict_safe()
     except HTTPException:
         raise
@@ -119,13 +207,7 @@ async def update_cliente(cliente_id: str, cliente_data: dict, user: Authenticate
                 detail="Cliente não encontrado"
             )
         
-        # Verificar se email já existe em outro cliente ou funcionario
-        if cliente_data.get('email') and cliente_data['email'] != cliente.email:
-            if Cliente.objects(email=cliente_data['email']).first() or Funcionario.objects(email=cliente_data['email']).first():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Já existe um cliente com esse email"
-                )
+        email_antigo = cliente.email
         
         # Atualizar endereços se fornecidos
         if cliente_data.get('enderecos'):
@@ -137,7 +219,9 @@ async def update_cliente(cliente_id: str, cliente_data: dict, user: Authenticate
                     bairro=end_data['bairro'],
                     cidade=end_data['cidade'],
                     cep=end_data['cep'],
-                    complemento=end_data.get('complemento')
+                    complemento=end_data.get('complemento'),
+                    latitude=end_data.get('latitude'),
+                    longitude=end_data.get('longitude')
                 )
                 enderecos.append(endereco)
             cliente.enderecos = enderecos
@@ -151,7 +235,11 @@ async def update_cliente(cliente_id: str, cliente_data: dict, user: Authenticate
             elif hasattr(cliente, field):
                 setattr(cliente, field, value)
         
-        cliente.save()
+        # Troca de email reserva o novo em identidades (unicidade global) antes de gravar
+        with change_identity_email(
+            cliente.id, "cliente", email_antigo, cliente.email, detail="Já existe um cliente com esse email"
+        ):
+            cliente.save()
         return cliente.to_dict_safe()
     except HTTPException:
         raise
@@ -173,6 +261,7 @@ async def delete_cliente(cliente_id: str):
             )
         
         cliente.delete()
+        remove_identity(cliente.id)
         return None
     except HTTPException:
         raise
@@ -193,13 +282,6 @@ async def adicionar_endereco(cliente_id: str, endereco_data: dict, user: Authent
                 detail="Você só pode adicionar endereços aos seus próprios dados"
             )
         
-        cliente = Cliente.objects(id=cliente_id).first()
-        if not cliente:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Cliente não encontrado"
-            )
-        
         # Validar campos obrigatórios do endereço
         required_fields = ['rua', 'numero', 'bairro', 'cidade', 'cep']
         for field in required_fields:
@@ -216,13 +298,34 @@ async def adicionar_endereco(cliente_id: str, endereco_data: dict, user: Authent
             bairro=endereco_data['bairro'],
             cidade=endereco_data['cidade'],
             cep=endereco_data['cep'],
-            complemento=endereco_data.get('complemento')
+            complemento=endereco_data.get('complemento'),
+            latitude=endereco_data.get('latitude'),
+            longitude=endereco_data.get('longitude')
         )
+        endereco.validate()
         
-        cliente.enderecos.append(endereco)
-        cliente.save()
+        # $push atômico: não reenvia o documento nem perde edições concorrentes
+        raw = _update_enderecos(
+            {"_id": safe_object_id(cliente_id)},
+            {"$push": {"enderecos": endereco.to_mongo().to_dict()}},
+        )
+        if raw is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cliente não encontrado"
+            )
         
-        return cliente.to_dict_safe()
+        return _enderecos_response(raw)
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Erro de validação: {str(e)}"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -263,26 +366,31 @@ async def atualizar_endereco(cliente_id: str, endereco_id: str, endereco_data: d
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Você só pode atualizar seus próprios endereços"
             )
-        
-        cliente = Cliente.objects(id=cliente_id).first()
-        if not cliente:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente não encontrado")
 
-        found = False
-        for idx, end in enumerate(cliente.enderecos):
-            if str(getattr(end, 'id', '')) == endereco_id:
-                # Atualizar campos
-                for field in ['rua', 'numero', 'bairro', 'cidade', 'cep', 'complemento']:
-                    if field in endereco_data and endereco_data[field] is not None:
-                        setattr(cliente.enderecos[idx], field, endereco_data[field])
-                found = True
-                break
-
-        if not found:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endereço não encontrado")
+        # $set só dos campos enviados, no elemento com o id pedido (arrayFilters)
+        changes = {"updated_at": datetime.utcnow()}
+        for field in ENDERECO_FIELDS:
+            value = endereco_data.get(field)
+            if value is None:
+                continue
+            Endereco._fields[field].validate(value)
+            changes[f"enderecos.$[e].{field}"] = value
 
-        cliente.save()
-        return cliente.to_dict_safe()
+        raw = _update_enderecos(
+            {"_id": safe_object_id(cliente_id), "enderecos.id": endereco_id},
+            {"$set": changes},
+            array_filters=[{"e.id": endereco_id}],
+        )
+        if raw is None:
+            raise _endereco_not_found(cliente_id)
+        return _enderecos_response(raw)
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Erro de validação: {str(e)}")
     except HTTPException:
         raise
     except Exception as e:
@@ -299,18 +407,20 @@ async def remover_endereco(cliente_id: str, endereco_id: str, user: Authenticate
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Você só pode remover seus próprios endereços"
             )
-        
-        cliente = Cliente.objects(id=cliente_id).first()
-        if not cliente:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente não encontrado")
 
-        original_len = len(cliente.enderecos)
-        cliente.enderecos = [e for e in cliente.enderecos if str(getattr(e, 'id', '')) != endereco_id]
-        if len(cliente.enderecos) == original_len:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endereço não encontrado")
-
-        cliente.save()
+        # a resposta é 204: basta saber se o filtro casou, sem devolver o documento
+        result = Cliente._get_collection().update_one(
+            {"_id": safe_object_id(cliente_id), "enderecos.id": endereco_id},
+            {"$pull": {"enderecos": {"id": endereco_id}}, "$set": {"updated_at": datetime.utcnow()}},
+        )
+        if not result.matched_count:
+            raise _endereco_not_found(cliente_id)
         return None
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -1,39 +1,87 @@
 """
 Rotas para upload e gestão de arquivos (imagens)
 """
+import hashlib
 import os
-import uuid
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends, Form
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends, Form, Response
+from src.config.config import get_image_async_threshold
 from src.utils.dependencies import require_role, AuthenticatedUser
-from PIL import Image
-import io
+from src.utils.image_jobs import image_jobs
+from src.utils.image_processing import ImageTooLarge, check_image_pixels, generate_variants, transform_image_with_variants
+from src.utils.image_variants import VARIANTS_DIR, VARIANTS_URL_PREFIX, publish_variants, variants_for_url
+from src.utils.storage import storage
+from src.utils.uploads import stream_to_temp, upload_extension
+from PIL import UnidentifiedImageError
+from starlette.concurrency import run_in_threadpool
 
 
 router = APIRouter(prefix="/files", tags=["files"])
 
-UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "uploads")
-UPLOAD_DIR = os.path.abspath(UPLOAD_DIR)
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+def _too_many_pixels(e: ImageTooLarge) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+# uploads são gravados e processados aqui antes de publicados no armazenamento
+STAGING_DIR = storage.staging_dir()
+os.makedirs(STAGING_DIR, exist_ok=True)
+
+
+async def gerar_variantes(filename: str) -> dict:
+    """Gera as variantes responsivas no pool de imagens e as publica; falhas não impedem o upload"""
+    try:
+        path = await run_in_threadpool(storage.local_path, filename)
+        if path is None:
+            return {}
+        variants = await image_jobs.run(generate_variants, path, VARIANTS_DIR, VARIANTS_URL_PREFIX)
+        await run_in_threadpool(publish_variants, variants)
+        return variants
+    except Exception as e:
+        # podem ser geradas depois com scripts/gerar_variantes.py
+        print(f"Variantes não geradas para {filename}: {str(e)}")
+        return {}
+
+
+def publicar_upload(path: str, filename: str, variants: dict) -> None:
+    """Publica no armazenamento o resultado processado em STAGING_DIR e suas variantes"""
+    storage.put_file(path, filename)
+    publish_variants(variants)
 
 
 @router.post("/upload", dependencies=[Depends(require_role("admin"))])
 async def upload_image(file: UploadFile = File(...)):
-    """Upload de imagens - Acesso apenas para admin"""
+    """
+    Upload de imagens - Acesso apenas para admin
+
+    O arquivo é gravado com o SHA-256 do conteúdo como nome; reenviar a mesma
+    imagem não grava nada e retorna a URL existente (duplicado=true).
+    """
     try:
         if not file.content_type or not file.content_type.startswith("image/"):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo deve ser uma imagem")
 
-        ext = os.path.splitext(file.filename or "")[1].lower() or ".jpg"
-        filename = f"{uuid.uuid4().hex}{ext}"
-        dest_path = os.path.join(UPLOAD_DIR, filename)
-
-        with open(dest_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        tmp_path, sha256, _ = await stream_to_temp(file, STAGING_DIR)
+        try:
+            try:
+                # só o cabeçalho: recusa bombas de descompressão antes de gravar
+                await run_in_threadpool(check_image_pixels, tmp_path)
+            except ImageTooLarge as e:
+                raise _too_many_pixels(e)
+            except UnidentifiedImageError:
+                pass
+            filename = f"{sha256}{upload_extension(file.filename)}"
+            created = await run_in_threadpool(storage.put_file, tmp_path, filename, False)
+        finally:
+            # put_file move (ou descarta) o temporário; sobra só se algo falhou antes
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
-        # URL pública servida pelo StaticFiles montado em /uploads
+        # URL pública servida pelo UploadsStaticFiles montado em /uploads
         public_url = f"/uploads/{filename}"
-        return {"url": public_url, "filename": filename}
+        variants = await run_in_threadpool(variants_for_url, public_url) if not created else {}
+        if not variants:
+            variants = await gerar_variantes(filename)
+        return {"url": public_url, "filename": filename, "variants": variants, "duplicado": not created}
     except HTTPException:
         raise
     except Exception as e:
@@ -42,79 +90,80 @@ async def upload_image(file: UploadFile = File(...)):
 
 @router.post("/upload-with-transform", dependencies=[Depends(require_role("admin"))])
 async def upload_image_with_transform(
+    response: Response,
     file: UploadFile = File(...),
     zoom: float = Form(1.0),
     offset_x: float = Form(0.0),
-    offset_y: float = Form(0.0)
+    offset_y: float = Form(0.0),
+    assincrono: Optional[bool] = Form(None)
 ):
-    """Upload de imagens com transformações aplicadas - Acesso apenas para admin"""
+    """
+    Upload de imagens com transformações aplicadas - Acesso apenas para admin
+
+    O processamento roda no pool de processos. Com assincrono=true (ou, se não
+    informado, para arquivos acima de IMAGE_ASYNC_THRESHOLD) a resposta é 202
+    com um job_id para consultar em /files/jobs/{job_id} (no mesmo processo:
+    ver src/utils/image_jobs.py).
+
+    O nome do resultado é o hash do conteúdo enviado junto com os parâmetros da
+    transformação: repetir o mesmo envio retorna o arquivo já processado.
+    """
     try:
         if not file.content_type or not file.content_type.startswith("image/"):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo deve ser uma imagem")
 
-        # Ler o conteúdo da imagem
-        content = await file.read()
-        
-        # Abrir a imagem com PIL
-        image = Image.open(io.BytesIO(content))
-        
-        # Converter para RGB se necessário (para JPEG)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            # Criar fundo branco para imagens com transparência
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            if image.mode == 'P':
-                image = image.convert('RGBA')
-            background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-            image = background
-        
-        # Aplicar transformações
-        if zoom != 1.0 or offset_x != 0.0 or offset_y != 0.0:
-            # Calcular novo tamanho baseado no zoom
-            new_width = int(image.width * zoom)
-            new_height = int(image.height * zoom)
-            
-            # Redimensionar a imagem
-            resized_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Calcular área de corte (crop) baseada no offset
-            crop_x = max(0, int(offset_x))
-            crop_y = max(0, int(offset_y))
-            crop_width = min(new_width - crop_x, image.width)
-            crop_height = min(new_height - crop_y, image.height)
-            
-            # Se a imagem redimensionada é menor que a original, centralizar
-            if new_width < image.width or new_height < image.height:
-                # Criar uma nova imagem com o tamanho original
-                final_image = Image.new('RGB', (image.width, image.height), (255, 255, 255))
-                paste_x = max(0, (image.width - new_width) // 2)
-                paste_y = max(0, (image.height - new_height) // 2)
-                final_image.paste(resized_image, (paste_x, paste_y))
-                image = final_image
-            else:
-                # Cortar a parte central da imagem redimensionada
-                left = crop_x
-                top = crop_y
-                right = left + image.width
-                bottom = top + image.height
-                image = resized_image.crop((left, top, right, bottom))
-
-        # Salvar a imagem processada
-        ext = os.path.splitext(file.filename or "")[1].lower() or ".jpg"
-        filename = f"{uuid.uuid4().hex}{ext}"
-        dest_path = os.path.join(UPLOAD_DIR, filename)
-        
-        # Salvar no formato apropriado
-        if ext.lower() in ['.png']:
-            image.save(dest_path, 'PNG', quality=95)
-        else:
-            image.save(dest_path, 'JPEG', quality=95)
-
-        # URL pública servida pelo StaticFiles montado em /uploads
+        tmp_path, sha256, size = await stream_to_temp(file, STAGING_DIR)
+
+        ext = upload_extension(file.filename)
+        ext = ext if ext == ".png" else ".jpg"
+        transform_key = hashlib.sha256(f"{sha256}:{zoom}:{offset_x}:{offset_y}".encode()).hexdigest()
+        filename = f"{transform_key}{ext}"
+        dest_path = os.path.join(STAGING_DIR, filename)
+
+        # URL pública servida pelo UploadsStaticFiles montado em /uploads
         public_url = f"/uploads/{filename}"
-        return {"url": public_url, "filename": filename}
+        result = {"url": public_url, "filename": filename}
+
+        if await run_in_threadpool(storage.exists, filename):
+            os.remove(tmp_path)
+            variants = await run_in_threadpool(variants_for_url, public_url) or await gerar_variantes(filename)
+            return {**result, "variants": variants, "duplicado": True}
+
+        if assincrono is None:
+            assincrono = size >= get_image_async_threshold()
+        args = (tmp_path, dest_path, zoom, offset_x, offset_y, VARIANTS_DIR, VARIANTS_URL_PREFIX)
+
+        async def publicar(variants: dict) -> dict:
+            await run_in_threadpool(publicar_upload, dest_path, filename, variants)
+            return {**result, "variants": variants, "duplicado": False}
+
+        try:
+            if assincrono:
+                job = image_jobs.submit(transform_image_with_variants, *args, on_done=publicar)
+                response.status_code = status.HTTP_202_ACCEPTED
+                return {**job.to_dict(), "status_url": f"/files/jobs/{job.id}"}
+
+            variants = await image_jobs.run(transform_image_with_variants, *args)
+        except HTTPException:
+            # fila cheia ou timeout: o job pode não ter removido o temporário
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return await publicar(variants)
     except HTTPException:
         raise
+    except ImageTooLarge as e:
+        raise _too_many_pixels(e)
+    except UnidentifiedImageError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo de imagem inválido")
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro no upload com transformação: {str(e)}")
 
 
+@router.get("/jobs/{job_id}", dependencies=[Depends(require_role("admin"))])
+async def get_image_job(job_id: str):
+    """Consulta o andamento de um upload com transformação assíncrono - Acesso apenas para admin"""
+    job = image_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job não encontrado")
+    return job.to_dict()
@@ -7,7 +7,9 @@ from src.models import Funcionario, TokenResetSenha
 from src.utils.security import hash_password
 from src.utils.validators import validate_cpf_format, validate_object_id
 from src.utils.dependencies import require_role, get_current_user, AuthenticatedUser
-from src.utils.email_service import email_service
+from src.utils.email_outbox import enqueue_email
+from src.utils.queries import raw_query
+from src.utils.identidades import new_identity, change_identity_email, remove_identity
 
 
 router = APIRouter(prefix="/funcionarios", tags=["funcionarios"])
@@ -16,7 +18,7 @@ router = APIRouter(prefix="/funcionarios", tags=["funcionarios"])
 @router.get("/", response_model=List[dict], dependencies=[Depends(require_role("admin"))])
 async def list_funcionarios():
     try:
-        return [f.to_dict_safe() for f in Funcionario.objects()]
+        return [Funcionario.raw_to_dict_safe(f) for f in raw_query(Funcionario.objects(), exclude=["senha"])]
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro ao listar funcionários: {str(e)}")
 
@@ -32,40 +34,34 @@ async def create_funcionario(data: dict):
         if not validate_cpf_format(data['cpf']):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CPF inválido")
 
-        if Funcionario.objects(email=data['email']).first():
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email já cadastrado")
-
-
         senha_temporaria = data['senha']
         role = data.get('status') or 'funcionario'
 
-        funcionario = Funcionario(
-            nome=data['nome'],
-            email=data['email'],
-            senha=hash_password(senha_temporaria),
-            cpf=data['cpf'],
-            status=role
-        )
-        funcionario.save()
+        # Reserva o email em identidades (unicidade global entre clientes e funcionários)
+        with new_identity(data['email'], "funcionario") as user_id:
+            funcionario = Funcionario(
+                id=user_id,
+                nome=data['nome'],
+                email=data['email'],
+                senha=hash_password(senha_temporaria),
+                cpf=data['cpf'],
+                status=role
+            )
+            funcionario.save(force_insert=True)
         
         # Criar token de reset para incluir no email (opcional para o funcionário)
         reset_token = TokenResetSenha.create_token(funcionario.email, "funcionario")
         
-        # email de boas vindasm, que vai ter a senhado usuario
-        email_sent = await email_service.enviar_email_registro(
-            email=funcionario.email,
+        # email de boas vindasm, que vai ter a senhado usuario (enviado em segundo plano pelo outbox)
+        enqueue_email(
+            "registro",
+            funcionario.email,
             nome=funcionario.nome,
             senha_temporaria=senha_temporaria,
             role=role,
             reset_token=reset_token.token
         )
         
-        if email_sent:
-            print(f"Email de boas-vindas enviado com sucesso para: {funcionario.email}")
-        else:
-            print(f"Erro ao enviar email de boas-vindas para: {funcionario.email}")
-            print(f"   Senha temporária: {senha_temporaria}")
-        
         return funcionario.to_dict_safe()
     except HTTPException:
         raise
@@ -116,6 +112,7 @@ async def update_funcionario(funcionario_id: str, data: dict, user: Authenticate
                 detail="Funcionário não encontrado"
             )
         
+        email_antigo = funcionario.email
         if 'nome' in data:
             funcionario.nome = data['nome']
         if 'email' in data:
@@ -123,7 +120,8 @@ async def update_funcionario(funcionario_id: str, data: dict, user: Authenticate
         if 'telefone' in data:
             funcionario.telefone = data['telefone']
         
-        funcionario.save()
+        with change_identity_email(funcionario.id, "funcionario", email_antigo, funcionario.email):
+            funcionario.save()
         return funcionario.to_dict_safe()
     except HTTPException:
         raise
@@ -139,6 +137,7 @@ async def delete_funcionario(funcionario_id: str):
         if not funcionario:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Funcionário não encontrado")
         funcionario.delete()
+        remove_identity(funcionario.id)
         return None
     except HTTPException:
         raise
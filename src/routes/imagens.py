@@ -0,0 +1,77 @@
+"""
+Rotas de imagens redimensionadas sob demanda
+"""
+import os
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse
+from src.config.config import get_uploads_cache_max_age
+from src.utils.image_cache import image_cache
+from src.utils.image_processing import ImageTooLarge, snap_dimension
+from src.utils.static_uploads import accepts_media_type
+from src.utils.storage import IMMUTABLE_CACHE_CONTROL, IMMUTABLE_NAME, storage
+from PIL import UnidentifiedImageError
+from starlette.concurrency import run_in_threadpool
+
+
+router = APIRouter(prefix="/img", tags=["imagens"])
+
+# Limite de cada dimensão pedida (evita renderizações gigantes por URL)
+MAX_DIMENSION = 2560
+
+MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+
+
+@router.get("/{filename}")
+async def get_imagem_redimensionada(
+    request: Request,
+    filename: str,
+    w: Optional[int] = Query(None, ge=1, le=MAX_DIMENSION, description="Largura em pixels"),
+    h: Optional[int] = Query(None, ge=1, le=MAX_DIMENSION, description="Altura em pixels"),
+    fit: Literal["inside", "cover", "contain", "fill"] = Query("inside"),
+    fmt: Optional[Literal["webp", "jpeg", "png"]] = Query(None, description="Sem fmt: WebP se o navegador aceitar, senão JPEG"),
+):
+    """
+    Imagem do armazenamento de uploads redimensionada para w x h
+
+    w e h são arredondados para a próxima dimensão de RESIZE_SIZES (e fit só
+    vale com as duas), então cada original tem um número limitado de
+    renderizações. O resultado fica no cache em disco (LRU limitado por
+    IMAGE_CACHE_MAX_SIZE); pedidos simultâneos da mesma variante são
+    renderizados uma vez só.
+    """
+    try:
+        if w is None and h is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Informe w e/ou h")
+        w, h = snap_dimension(w), snap_dimension(h)
+        if w is None or h is None:
+            # com uma dimensão só, todos os modos dão o mesmo resultado
+            fit = "inside"
+
+        # no backend S3 o original vem do cache local (baixado na primeira vez)
+        src_path = None if filename.startswith(".") else await run_in_threadpool(storage.local_path, filename)
+        if src_path is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Imagem não encontrada")
+
+        headers = {}
+        if fmt is None:
+            fmt = "webp" if accepts_media_type(request.headers.get("accept", ""), "image/webp") else "jpeg"
+            headers["Vary"] = "Accept"
+        # a URL inclui o nome do original: se ele é imutável, a variante também é
+        headers["Cache-Control"] = (
+            IMMUTABLE_CACHE_CONTROL if IMMUTABLE_NAME.match(filename) else f"public, max-age={get_uploads_cache_max_age()}"
+        )
+
+        path = await image_cache.get_or_render(src_path, w, h, fit, fmt)
+        response = FileResponse(path, media_type=MEDIA_TYPES[fmt], headers=headers, stat_result=os.stat(path))
+        if request.headers.get("if-none-match") == response.headers["etag"]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={**headers, "ETag": response.headers["etag"]})
+        return response
+    except HTTPException:
+        raise
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except UnidentifiedImageError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo de imagem inválido")
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro ao redimensionar imagem: {str(e)}")
@@ -5,6 +5,7 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from typing import List
 from src.models.pedido import Pedido
 from src.models.cliente import Cliente
+from src.models.produto import Produto
 from src.schemas.motoboy_schemas import (
     PedidoProntoResponse, 
     AceitarPedidoRequest, 
@@ -13,11 +14,16 @@ from src.schemas.motoboy_schemas import (
 )
 from src.utils.validators import validate_object_id
 from src.utils.dependencies import require_motoboy, AuthenticatedUser
+from src.utils.queries import raw_query, fetch_field_map
+from src.utils.email_outbox import notify_order_status
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout
 from mongoengine.errors import ValidationError, NotUniqueError
 
 router = APIRouter(prefix="/motoboy", tags=["motoboy"])
 
+# Campos usados pela listagem de pedidos prontos
+CAMPOS_PEDIDO_PRONTO = ["cliente", "endereco", "itens", "total", "data_hora", "observacoes", "status", "created_at"]
+
 def validar_codigo_entrega(codigo: str, telefone_cliente: str) -> bool:
     """
     Valida se o código de entrega corresponde aos últimos 4 dígitos do telefone
@@ -39,46 +45,47 @@ async def listar_pedidos_prontos(user: AuthenticatedUser = Depends(require_motob
     """Listar pedidos prontos para entrega"""
     try:
       
-        pedidos = Pedido.objects(status__in=["Pronto", "Saiu para entrega"]).order_by("-created_at")
+        pedidos = list(raw_query(
+            Pedido.objects(status__in=["Pronto", "Saiu para entrega"]).order_by("-created_at"),
+            only=CAMPOS_PEDIDO_PRONTO,
+        ))
+        clientes = fetch_field_map(Cliente, (p.get("cliente") for p in pedidos), "nome")
+        produtos = fetch_field_map(
+            Produto, (i.get("produto") for p in pedidos for i in p.get("itens", [])), "titulo"
+        )
         
         resultado = []
         for pedido in pedidos:
             # Gerar número do pedido baseado no ID
-            numero_pedido = f"#{str(pedido.id)[-6:].upper()}"
+            numero_pedido = f"#{str(pedido['_id'])[-6:].upper()}"
             
             # Formatar itens do pedido
             itens_formatados = []
-            for item in pedido.itens:
-                try:
-                    
-                    produto_nome = item.produto.titulo if item.produto else "Produto não encontrado"
-                except Exception:
-                    
-                    produto_nome = "Produto não encontrado"
-                
+            for item in pedido.get("itens", []):
                 itens_formatados.append({
-                    "produto": produto_nome,
-                    "quantidade": item.quantidade
+                    "produto": produtos.get(item.get("produto"), "Produto não encontrado"),
+                    "quantidade": item.get("quantidade")
                 })
             
+            endereco = pedido.get("endereco") or {}
             resultado.append({
-                "id": str(pedido.id),
+                "id": str(pedido["_id"]),
                 "numero": numero_pedido,
                 "cliente": {
-                    "nome": pedido.cliente.nome if pedido.cliente else "Cliente não encontrado",
+                    "nome": clientes.get(pedido.get("cliente"), "Cliente não encontrado"),
                     "endereco": {
-                        "rua": pedido.endereco.rua if pedido.endereco else "",
-                        "numero": pedido.endereco.numero if pedido.endereco else "",
-                        "bairro": pedido.endereco.bairro if pedido.endereco else "",
-                        "cidade": pedido.endereco.cidade if pedido.endereco else "",
-                        "complemento": pedido.endereco.complemento if pedido.endereco else None
+                        "rua": endereco.get("rua", ""),
+                        "numero": endereco.get("numero", ""),
+                        "bairro": endereco.get("bairro", ""),
+                        "cidade": endereco.get("cidade", ""),
+                        "complemento": endereco.get("complemento")
                     }
                 },
-                "total": float(pedido.total or 0),
-                "data": pedido.data_hora.strftime("%d/%m/%Y %H:%M") if pedido.data_hora else "",
+                "total": float(pedido.get("total") or 0),
+                "data": pedido["data_hora"].strftime("%d/%m/%Y %H:%M") if pedido.get("data_hora") else "",
                 "itens": itens_formatados,
-                "observacoes": pedido.observacoes,
-                "status": pedido.status
+                "observacoes": pedido.get("observacoes"),
+                "status": pedido.get("status")
             })
         
         return resultado
@@ -121,6 +128,7 @@ async def aceitar_pedido(
         if pedido.status == "Pronto":
             pedido.status = "Saiu para entrega"
             pedido.save()
+            notify_order_status(pedido)
         
         return {
             "message": "Pedido aceito com sucesso",
@@ -249,6 +257,7 @@ async def confirmar_entrega(
         # Atualizar status para "Entregue"
         pedido.status = "Entregue"
         pedido.save()
+        notify_order_status(pedido)
         
         return {
             "message": "Entrega confirmada com sucesso",
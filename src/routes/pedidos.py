@@ -1,6 +1,7 @@
 """
 Rotas para gerenciamento de pedidos
 """
+from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from typing import List, Optional
 
@@ -23,7 +24,13 @@ from src.schemas.pedido_schemas import (
     PedidoStatusUpdate,
 )
 from src.utils.validators import validate_object_id
+from src.utils.queries import raw_query, fetch_field_map
 from src.utils.dependencies import get_current_user, require_role, AuthenticatedUser
+from src.utils.email_outbox import notify_order_status
+from src.utils.delivery_zones import zone_index
+from src.utils.promotions import promotion_index
+from src.utils.stock import EstoqueInsuficiente, cancel_order, reserve_stock, release_stock
+from src.utils.metrics import timed
 
 router = APIRouter(prefix="/pedidos", tags=["pedidos"])
 
@@ -53,6 +60,7 @@ def para_decimal(value, field_label: str, allow_zero: bool = True) -> Decimal:
 
 
 @router.post("/", response_model=PedidoResponse, status_code=status.HTTP_201_CREATED)
+@timed("criar_pedido")
 async def add_pedido(
     payload: PedidoCreate,
     user: AuthenticatedUser = Depends(get_current_user)
@@ -93,34 +101,63 @@ async def add_pedido(
         itens_doc: list[PedidoItem] = []
         subtotal = Decimal("0")
 
-        for item in payload.itens:
-            prod_id = validate_object_id(item.produto_id, "ID do produto")
-            produto = Produto.objects(id=prod_id).first()
+        # todos os produtos do pedido numa consulta só
+        prod_ids = [validate_object_id(item.produto_id, "ID do produto") for item in payload.itens]
+        produtos = {produto.id: produto for produto in Produto.objects(id__in=prod_ids)}
+        # unidades a baixar dos produtos com controle de estoque
+        reserva: dict = {}
+
+        for prod_id, item in zip(prod_ids, payload.itens):
+            produto = produtos.get(prod_id)
             if not produto:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Produto não encontrado",
                 )
 
-            preco_unit = produto.preco_promocional or produto.preco
-            if preco_unit is None:
+            if produto.status != "Ativo":
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Produto '{produto.titulo}' está indisponível",
+                )
+
+            if produto.preco is None:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Produto '{produto.titulo}' está sem preço definido",
                 )
+            preco_unit = promotion_index.preco_efetivo(produto)
+
+            if produto.estoque is not None:
+                reserva[prod_id] = reserva.get(prod_id, 0) + item.quantidade
+                if reserva[prod_id] > produto.estoque:
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"Estoque insuficiente para '{produto.titulo}'",
+                    )
 
             itens_doc.append(
                 PedidoItem(
                     produto=produto,
                     quantidade=item.quantidade,
                     preco_unitario=preco_unit,
+                    estoque_reservado=produto.estoque is not None,
                 )
             )
             subtotal += preco_unit * Decimal(item.quantidade)
 
 
-        taxa_entrega = para_decimal(payload.taxa_entrega, "Taxa de entrega", allow_zero=True)
-        desconto = para_decimal(payload.desconto, "Desconto", allow_zero=True)
+        # Taxa e prazo calculados no servidor pela zona do endereço (o valor enviado pelo cliente é ignorado)
+        metodo_entrega = payload.metodo_entrega or 'delivery'
+        zona = zone_index.resolve(endereco) if metodo_entrega == 'delivery' else None
+        if metodo_entrega == 'delivery' and zona is None and not zone_index.empty:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Endereço fora da área de entrega",
+            )
+        taxa_entrega = zona.taxa if zona else Decimal("0")
+        # sem regra de desconto no servidor: o valor enviado pelo cliente é ignorado
+        desconto = Decimal("0")
 
         total = (subtotal + taxa_entrega) - desconto
         if total < 0:
@@ -132,14 +169,33 @@ async def add_pedido(
             itens=itens_doc,
             status="Pendente",
             metodo_pagamento=payload.metodo_pagamento,
-            metodo_entrega=payload.metodo_entrega or 'delivery',
+            metodo_entrega=metodo_entrega,
             observacoes=payload.observacoes,
             subtotal=subtotal,
             taxa_entrega=taxa_entrega,
             desconto=desconto,
             total=total,
+            zona_entrega=zona.nome if zona else None,
+            tempo_estimado_min=zona.tempo_estimado_min if zona else None,
         )
-        pedido.save()
+        pedido.validate()
+
+        # baixa atômica do estoque (tudo ou nada); se o pedido não gravar, as unidades voltam
+        try:
+            reservadas = reserve_stock(reserva)
+        except EstoqueInsuficiente as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Estoque insuficiente para '{produtos[e.produto_id].titulo}'",
+            )
+        for item_doc in itens_doc:
+            # produto que deixou de controlar estoque durante o pedido: nada a devolver no cancelamento
+            item_doc.estoque_reservado = item_doc.produto.id in reservadas
+        try:
+            pedido.save()
+        except Exception:
+            release_stock(reservadas)
+            raise
         return pedido.to_dict()
 
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
@@ -196,14 +252,19 @@ async def get_pedidos(
                 )
 
         try:
-            pedidos = Pedido.objects(**query).order_by("-created_at")
+            pedidos = list(raw_query(Pedido.objects(**query).order_by("-created_at")))
+            # Nomes de clientes e títulos de produtos em um $in cada, em vez de um dereference por pedido/item
+            clientes = fetch_field_map(Cliente, (p.get('cliente') for p in pedidos), 'nome')
+            produtos = fetch_field_map(
+                Produto, (i.get('produto') for p in pedidos for i in p.get('itens', [])), 'titulo'
+            )
             result = []
             for p in pedidos:
                 try:
-                    result.append(p.to_dict())
+                    result.append(Pedido.raw_to_dict(p, clientes, produtos))
                 except Exception as e:
                     # Se um pedido específico falha, pular ele mas continuar
-                    print(f"Erro ao serializar pedido {p.id}: {str(e)}")
+                    print(f"Erro ao serializar pedido {p.get('_id')}: {str(e)}")
                     continue
             return result
         except Exception as e:
@@ -347,13 +408,31 @@ async def update_status_pedido(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Status inválido"
             )
 
-        pedido.status = payload.novo_status
-        pedido.save()
+        status_anterior = pedido.status
+        if payload.novo_status == "Cancelado":
+            # condicional: o estoque volta uma vez só, mesmo com cancelamentos simultâneos
+            if not cancel_order(pedido.id):
+                status_anterior = "Cancelado"
+            pedido.reload()
+        else:
+            # pedido cancelado já devolveu o estoque: não volta para outro status
+            atualizados = Pedido.objects(id=pedido.id, status__ne="Cancelado").update(
+                set__status=payload.novo_status, set__updated_at=datetime.utcnow()
+            )
+            if not atualizados:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Pedido cancelado não pode mudar de status",
+                )
+            pedido.reload()
 
         PedidoHistoricoStatus(
             pedido=pedido, funcionario=funcionario, novo_status=payload.novo_status
         ).save()
 
+        if pedido.status != status_anterior:
+            notify_order_status(pedido)
+
         return pedido.to_dict()
 
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
@@ -1,25 +1,42 @@
 """
 Rotas para gerenciamento de produtos
 """
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, File, HTTPException, Query, Request, UploadFile, status, Depends
 from typing import List
 from src.models.produto import Produto, Acompanhamento
 from src.models.categoria import Categoria
-from src.schemas.produto_schemas import ProdutoCreate, ProdutoUpdate, ProdutoResponse
+from src.schemas.produto_schemas import ProdutoCreate, ProdutoUpdate, ProdutoResponse, ImportacaoProdutosResponse
 from src.utils.validators import validate_object_id
 from src.utils.dependencies import get_current_user, require_role
+from src.utils.queries import raw_query, fetch_field_map
+from src.utils.response_cache import cached_json_response, response_cache, CARDAPIO_CACHE
+from src.utils.image_variants import variants_for_url
+from src.utils.menu_search import menu_search
+from src.utils.promotions import promotion_index
+from src.utils.product_import import parse_rows, import_products
+from src.config.config import get_upload_max_size, get_product_import_max_rows
+from starlette.concurrency import run_in_threadpool
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout
 from mongoengine.errors import ValidationError, NotUniqueError
 from decimal import Decimal, InvalidOperation
 
 router = APIRouter(prefix="/produtos", tags=["produtos"])
 
+# Campos que as listagens do cardápio não exibem (o estoque muda a cada pedido e as listagens são cacheadas)
+PRODUTO_LIST_EXCLUDE = ["descricao_geral", "estoque"]
+
+
+def listar_produtos_brutos(queryset) -> list:
+    """Serializa uma listagem de produtos sem hidratar Documents, com um só $in para as categorias"""
+    raws = list(raw_query(queryset, exclude=PRODUTO_LIST_EXCLUDE))
+    categorias = fetch_field_map(Categoria, (raw.get('categoria') for raw in raws), 'nome')
+    return [promotion_index.apply(Produto.raw_to_dict(raw, categorias)) for raw in raws]
+
 @router.get("/", response_model=List[ProdutoResponse])
-async def get_produtos():
+async def get_produtos(request: Request):
     """Listar todos os produtos"""
     try:
-        produtos = Produto.objects()
-        return [produto.to_dict() for produto in produtos]
+        return cached_json_response(request, CARDAPIO_CACHE, lambda: listar_produtos_brutos(Produto.objects()))
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -105,15 +122,22 @@ async def add_produto(produto_data: ProdutoCreate):
             descricao_capa=produto_data.descricao_capa,
             descricao_geral=produto_data.descricao_geral,
             image_url=produto_data.image_url,
+            image_variants=await run_in_threadpool(variants_for_url, produto_data.image_url),
             preco=preco_decimal,
             preco_promocional=preco_promocional_decimal,
             status=produto_data.status,
             estrelas_kaiserhaus=produto_data.estrelas_kaiserhaus,
+            estoque=produto_data.estoque,
             acompanhamentos=acompanhamentos
         )
+        produto.sync_stock_status()
         
         produto.save()
-        return produto.to_dict()
+        response_cache.invalidate(CARDAPIO_CACHE)
+        produto_dict = produto.to_dict()
+        menu_search.upsert(produto_dict)
+        promotion_index.sync_product(produto_dict)
+        return produto_dict
         
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
         raise HTTPException(
@@ -133,12 +157,63 @@ async def add_produto(produto_data: ProdutoCreate):
             detail=f"Erro ao criar produto: {str(e)}"
         )
 
+@router.post("/importar", response_model=ImportacaoProdutosResponse, dependencies=[Depends(require_role("admin"))])
+async def importar_produtos(
+    arquivo: UploadFile = File(..., description="CSV (cabeçalho com os nomes dos campos) ou JSON (lista de produtos)"),
+    simular: bool = Query(False, description="Só valida e informa o que seria criado/atualizado"),
+):
+    """
+    Criar e atualizar produtos em lote
+
+    Linhas com `id` atualizam só as colunas informadas (ex.: id + preco para
+    reajuste); sem `id`, atualizam o produto de mesmo título ou criam um novo.
+    A categoria vai em `categoria_id` ou `categoria` (nome). Tudo é gravado com
+    um só bulk_write e a resposta traz o resultado de cada linha.
+    """
+    try:
+        max_size = get_upload_max_size()
+        content = await arquivo.read(max_size + 1)
+        if len(content) > max_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Arquivo excede o tamanho máximo de {max_size // (1024 * 1024)} MB"
+            )
+        try:
+            rows = parse_rows(arquivo.filename, arquivo.content_type, content)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        max_rows = get_product_import_max_rows()
+        if len(rows) > max_rows:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"O arquivo tem {len(rows)} linhas; o máximo por importação é {max_rows}"
+            )
+
+        relatorio = await run_in_threadpool(import_products, rows, simular)
+        if not simular and relatorio["criados"] + relatorio["atualizados"]:
+            response_cache.invalidate(CARDAPIO_CACHE)
+            await run_in_threadpool(promotion_index.load)
+        return relatorio
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao importar produtos: {str(e)}"
+        )
+
 @router.get("/estrelas-kaiserhaus", response_model=List[ProdutoResponse])
-async def listar_estrelas_kaiserhaus():
+async def listar_estrelas_kaiserhaus(request: Request):
     """Listar produtos que fazem parte das estrelas da Kaiserhaus"""
     try:
-        produtos = Produto.objects(estrelas_kaiserhaus=True)
-        return [produto.to_dict() for produto in produtos]
+        return cached_json_response(
+            request, CARDAPIO_CACHE, lambda: listar_produtos_brutos(Produto.objects(estrelas_kaiserhaus=True))
+        )
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -151,20 +226,15 @@ async def listar_estrelas_kaiserhaus():
         )
 
 @router.get("/promocoes", response_model=List[ProdutoResponse])
-async def listar_promocoes():
-    """Listar produtos com preço promocional ativo"""
+async def listar_promocoes(request: Request):
+    """Listar produtos com promoção vigente (agendada ou preço promocional fixo)"""
     try:
-        # Filtra produtos ativos em que o campo existe, não é nulo e é > 0.00
+        # o conjunto vigente vem do índice em memória; o banco só busca os produtos por _id
         produtos = (
-            Produto.objects(
-                status="Ativo",
-                preco_promocional__exists=True,
-                preco_promocional__ne=None,
-                preco_promocional__gt=Decimal("0.00"),
-            )
+            Produto.objects(id__in=promotion_index.produtos_em_promocao(), status="Ativo")
             .order_by("-updated_at")
         )
-        return [produto.to_dict() for produto in produtos]
+        return cached_json_response(request, CARDAPIO_CACHE, lambda: listar_produtos_brutos(produtos))
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -176,8 +246,29 @@ async def listar_promocoes():
             detail=f"Erro ao listar promoções: {str(e)}"
         )
 
+@router.get("/busca", response_model=List[ProdutoResponse])
+async def buscar_produtos(
+    q: str = Query(..., min_length=1, max_length=100, description="Termos da busca (acentos e maiúsculas são ignorados)"),
+    limit: int = Query(20, ge=1, le=50),
+):
+    """Buscar produtos por título, descrição de capa ou categoria (índice em memória, tolera erros de digitação)"""
+    try:
+        if not menu_search.ready:
+            menu_search.load()
+        return [promotion_index.apply(produto) for produto in menu_search.search(q, limit)]
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar produtos: {str(e)}"
+        )
+
 @router.get("/categoria/{categoria_id}", response_model=List[ProdutoResponse])
-async def listar_produtos_por_categoria(categoria_id: str):
+async def listar_produtos_por_categoria(categoria_id: str, request: Request):
     """Listar produtos por categoria"""
     try:
         # Validar ObjectId
@@ -190,8 +281,9 @@ async def listar_produtos_por_categoria(categoria_id: str):
                 detail="Categoria não encontrada"
             )
         
-        produtos = Produto.objects(categoria=categoria)
-        return [produto.to_dict() for produto in produtos]
+        return cached_json_response(
+            request, CARDAPIO_CACHE, lambda: listar_produtos_brutos(Produto.objects(categoria=categoria))
+        )
     except HTTPException:
         raise
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
@@ -218,7 +310,7 @@ async def get_produto(produto_id: str):
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Produto não encontrado"
             )
-        return produto.to_dict()
+        return promotion_index.apply(produto.to_dict())
     except HTTPException:
         raise
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
@@ -301,9 +393,20 @@ async def update_produto(produto_id: str, produto_data: ProdutoUpdate):
                         )
                 else:
                     setattr(produto, field, value)
+        if 'image_url' in update_data:
+            produto.image_variants = await run_in_threadpool(variants_for_url, produto.image_url)
+        if 'status' in update_data:
+            # status escolhido pelo admin: não é mais reativado pela reposição de estoque
+            produto.esgotado = False
+        elif 'estoque' in update_data:
+            produto.sync_stock_status()
         
         produto.save()
-        return produto.to_dict()
+        response_cache.invalidate(CARDAPIO_CACHE)
+        produto_dict = produto.to_dict()
+        menu_search.upsert(produto_dict)
+        promotion_index.sync_product(produto_dict)
+        return produto_dict
         
     except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
         raise HTTPException(
@@ -338,6 +441,9 @@ async def delete_produto(produto_id: str):
             )
         
         produto.delete()
+        response_cache.invalidate(CARDAPIO_CACHE)
+        menu_search.remove(produto_id)
+        promotion_index.remove_product(produto_id)
         return None
     except HTTPException:
         raise
@@ -0,0 +1,156 @@
+"""
+Rotas para gerenciamento das promoções agendadas
+
+Toda alteração recarrega o índice de promoções deste processo; os demais
+processos alcançam pela conferência periódica (PROMOTIONS_REFRESH_SECONDS).
+A listagem pública dos produtos em promoção é GET /produtos/promocoes.
+"""
+from fastapi import APIRouter, HTTPException, status, Depends
+from typing import List, Optional
+from decimal import Decimal
+from src.models.promocao import Promocao
+from src.models.produto import Produto
+from src.schemas.promocao_schemas import PromocaoCreate, PromocaoUpdate, PromocaoResponse
+from src.utils.validators import validate_object_id
+from src.utils.dependencies import require_role
+from src.utils.promotions import promotion_index
+from src.utils.response_cache import response_cache, CARDAPIO_CACHE
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout
+from mongoengine.errors import ValidationError, NotUniqueError
+
+router = APIRouter(prefix="/promocoes", tags=["promoções"])
+
+
+def _apply(promocao: Promocao, data: dict) -> None:
+    for field, value in data.items():
+        if field == "preco_promocional" and value is not None:
+            value = Decimal(str(value))
+        setattr(promocao, field, value)
+
+
+def _reload() -> None:
+    promotion_index.load()
+    response_cache.invalidate(CARDAPIO_CACHE)
+
+
+@router.get("/", response_model=List[PromocaoResponse], dependencies=[Depends(require_role("admin"))])
+async def get_promocoes(produto_id: Optional[str] = None):
+    """Listar promoções (inclusive encerradas e inativas), da mais recente para a mais antiga"""
+    try:
+        promocoes = Promocao.objects()
+        if produto_id:
+            promocoes = promocoes.filter(produto=validate_object_id(produto_id, "ID do produto"))
+        return [promocao.to_dict() for promocao in promocoes.order_by("-inicio")]
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao listar promoções: {str(e)}"
+        )
+
+
+@router.post("/", response_model=PromocaoResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_role("admin"))])
+async def add_promocao(promocao_data: PromocaoCreate):
+    """Agendar promoção para um produto"""
+    try:
+        produto_id = validate_object_id(promocao_data.produto_id, "ID do produto")
+        if not Produto.objects(id=produto_id).only("id").first():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Produto não encontrado"
+            )
+
+        promocao = Promocao(produto=produto_id)
+        _apply(promocao, promocao_data.dict(exclude={"produto_id"}))
+        promocao.save()
+        _reload()
+        return promocao.to_dict()
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except (ValidationError, NotUniqueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Erro de validação: {str(e)}"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao criar promoção: {str(e)}"
+        )
+
+
+@router.put("/{promocao_id}", response_model=PromocaoResponse, dependencies=[Depends(require_role("admin"))])
+async def update_promocao(promocao_id: str, promocao_data: PromocaoUpdate):
+    """Atualizar promoção (janela, preço ou ativação)"""
+    try:
+        object_id = validate_object_id(promocao_id, "ID da promoção")
+
+        promocao = Promocao.objects(id=object_id).first()
+        if not promocao:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Promoção não encontrada"
+            )
+
+        _apply(promocao, promocao_data.dict(exclude_unset=True))
+        promocao.save()
+        _reload()
+        return promocao.to_dict()
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except (ValidationError, NotUniqueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Erro de validação: {str(e)}"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao atualizar promoção: {str(e)}"
+        )
+
+
+@router.delete("/{promocao_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_role("admin"))])
+async def delete_promocao(promocao_id: str):
+    """Deletar promoção"""
+    try:
+        object_id = validate_object_id(promocao_id, "ID da promoção")
+
+        promocao = Promocao.objects(id=object_id).first()
+        if not promocao:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Promoção não encontrada"
+            )
+
+        promocao.delete()
+        _reload()
+        return None
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao deletar promoção: {str(e)}"
+        )
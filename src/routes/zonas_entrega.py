@@ -0,0 +1,183 @@
+"""
+Rotas para gerenciamento das zonas de entrega
+
+Toda alteração recarrega o índice em memória deste processo; os demais
+processos alcançam pela conferência periódica (DELIVERY_ZONES_REFRESH_SECONDS)
+ou por POST /zonas-entrega/recarregar.
+"""
+from fastapi import APIRouter, HTTPException, Query, status, Depends
+from typing import List, Optional
+from src.models.zona_entrega import ZonaEntrega, FaixaCep
+from src.schemas.zona_entrega_schemas import (
+    ZonaEntregaCreate,
+    ZonaEntregaUpdate,
+    ZonaEntregaResponse,
+    CotacaoEntregaResponse,
+)
+from src.utils.validators import validate_object_id
+from src.utils.dependencies import require_role
+from src.utils.delivery_zones import zone_index, normalize_cep
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout
+from mongoengine.errors import ValidationError, NotUniqueError
+
+router = APIRouter(prefix="/zonas-entrega", tags=["zonas de entrega"])
+
+
+def _apply(zona: ZonaEntrega, data: dict) -> None:
+    for field, value in data.items():
+        if field == "faixas_cep":
+            value = [FaixaCep(**faixa) for faixa in value]
+        setattr(zona, field, value)
+
+
+@router.get("/cotacao", response_model=CotacaoEntregaResponse)
+async def cotar_entrega(
+    cep: Optional[str] = None,
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+):
+    """Taxa e tempo estimado de entrega para um CEP e/ou coordenadas (consulta só o índice em memória)"""
+    if normalize_cep(cep) is None and (latitude is None or longitude is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe um CEP válido ou latitude e longitude"
+        )
+    zona = zone_index.lookup(cep, latitude, longitude)
+    if zona is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Endereço fora da área de entrega"
+        )
+    return {
+        "zona": zona.nome,
+        "taxa_entrega": float(zona.taxa),
+        "tempo_estimado_min": zona.tempo_estimado_min,
+    }
+
+
+@router.get("/", response_model=List[ZonaEntregaResponse], dependencies=[Depends(require_role("admin"))])
+async def get_zonas():
+    """Listar todas as zonas de entrega (inclusive inativas)"""
+    try:
+        return [zona.to_dict() for zona in ZonaEntrega.objects.order_by("-prioridade", "nome")]
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao listar zonas de entrega: {str(e)}"
+        )
+
+
+@router.post("/recarregar", response_model=dict, dependencies=[Depends(require_role("admin"))])
+async def recarregar_zonas():
+    """Recarregar o índice de zonas deste processo a partir do banco"""
+    try:
+        return zone_index.load()
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao recarregar zonas de entrega: {str(e)}"
+        )
+
+
+@router.post("/", response_model=ZonaEntregaResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_role("admin"))])
+async def add_zona(zona_data: ZonaEntregaCreate):
+    """Criar nova zona de entrega"""
+    try:
+        zona = ZonaEntrega()
+        _apply(zona, zona_data.dict())
+        zona.save()
+        zone_index.load()
+        return zona.to_dict()
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except (ValidationError, NotUniqueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Erro de validação: {str(e)}"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao criar zona de entrega: {str(e)}"
+        )
+
+
+@router.put("/{zona_id}", response_model=ZonaEntregaResponse, dependencies=[Depends(require_role("admin"))])
+async def update_zona(zona_id: str, zona_data: ZonaEntregaUpdate):
+    """Atualizar zona de entrega"""
+    try:
+        object_id = validate_object_id(zona_id, "ID da zona")
+
+        zona = ZonaEntrega.objects(id=object_id).first()
+        if not zona:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Zona de entrega não encontrada"
+            )
+
+        _apply(zona, zona_data.dict(exclude_unset=True))
+        zona.save()
+        zone_index.load()
+        return zona.to_dict()
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except (ValidationError, NotUniqueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Erro de validação: {str(e)}"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao atualizar zona de entrega: {str(e)}"
+        )
+
+
+@router.delete("/{zona_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_role("admin"))])
+async def delete_zona(zona_id: str):
+    """Deletar zona de entrega"""
+    try:
+        object_id = validate_object_id(zona_id, "ID da zona")
+
+        zona = ZonaEntrega.objects(id=object_id).first()
+        if not zona:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Zona de entrega não encontrada"
+            )
+
+        zona.delete()
+        zone_index.load()
+        return None
+    except (ConnectionFailure, ServerSelectionTimeoutError, NetworkTimeout):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de banco de dados temporariamente indisponível. Tente novamente em alguns instantes."
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao deletar zona de entrega: {str(e)}"
+        )
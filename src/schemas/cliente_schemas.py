@@ -12,6 +12,8 @@ class EnderecoBase(BaseModel):
     cidade: str = Field(..., min_length=1, max_length=100, description="Cidade")
     cep: str = Field(..., min_length=8, max_length=20, description="CEP")
     complemento: Optional[str] = Field(None, max_length=200, description="Complemento")
+    latitude: Optional[float] = Field(None, ge=-90, le=90, description="Latitude (opcional)")
+    longitude: Optional[float] = Field(None, ge=-180, le=180, description="Longitude (opcional)")
 
 class EnderecoCreate(EnderecoBase):
     pass
@@ -13,6 +13,8 @@ class PedidoCreate(BaseModel):
     metodo_pagamento: Optional[str] = Field(None, max_length=30)
     metodo_entrega: Optional[str] = Field('delivery', description="Método de entrega: 'delivery' ou 'pickup'")
     observacoes: Optional[str] = None
+    # ignorados (mantidos para compatibilidade): a taxa vem da zona de entrega do
+    # endereço e não há desconto definido pelo cliente
     taxa_entrega: float = 0.0
     desconto: float = 0.0
 
@@ -56,6 +58,8 @@ class PedidoResponse(BaseModel):
     taxa_entrega: float
     desconto: float
     total: float
+    zona_entrega: Optional[str] = None
+    tempo_estimado_min: Optional[int] = None
 
     created_at: Optional[str] 
     updated_at: Optional[str]
@@ -2,7 +2,7 @@
 Schemas para Produto
 """
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Dict, Literal
 from datetime import datetime
 from decimal import Decimal
 
@@ -26,6 +26,7 @@ class ProdutoBase(BaseModel):
     image_url: Optional[str] = Field(None, max_length=500, description="URL da imagem do produto")
     status: str = Field("Ativo", description="Status do produto")
     estrelas_kaiserhaus: bool = Field(False, description="Se faz parte das estrelas da Kaiserhaus")
+    estoque: Optional[int] = Field(None, ge=0, description="Unidades em estoque (vazio = sem controle de estoque)")
     acompanhamentos: List[AcompanhamentoCreate] = Field(default=[], description="Lista de acompanhamentos")
 
 class ProdutoCreate(ProdutoBase):
@@ -47,6 +48,7 @@ class ProdutoUpdate(BaseModel):
     image_url: Optional[str] = Field(None, max_length=500, description="URL da imagem do produto")
     status: Optional[str] = Field(None, description="Status do produto")
     estrelas_kaiserhaus: Optional[bool] = Field(None, description="Se faz parte das estrelas da Kaiserhaus")
+    estoque: Optional[int] = Field(None, ge=0, description="Unidades em estoque (null = sem controle de estoque)")
     acompanhamentos: Optional[List[AcompanhamentoCreate]] = Field(None, description="Lista de acompanhamentos")
     
     @validator('status')
@@ -67,12 +69,39 @@ class ProdutoResponse(BaseModel):
     descricao_geral: Optional[str] = None
     preco: float
     preco_promocional: Optional[float] = None
+    # fim da promoção agendada vigente, quando houver
+    promocao_ate: Optional[datetime] = None
     image_url: Optional[str] = None
+    image_variants: Dict[str, Dict[str, str]] = {}
+    image_srcset: Dict[str, str] = {}
     status: str
     estrelas_kaiserhaus: bool
+    # só no detalhe do produto; as listagens (cacheadas) trazem null
+    estoque: Optional[int] = None
     acompanhamentos: List[AcompanhamentoResponse]
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
+
+class ProdutoImportRow(ProdutoUpdate):
+    """Linha da importação em lote: com `id` atualiza o produto; sem `id`, casa pelo título ou cria"""
+    id: Optional[str] = Field(None, description="ID do produto a atualizar")
+    categoria: Optional[str] = Field(None, max_length=100, description="Nome da categoria (alternativa a categoria_id)")
+
+class ImportacaoLinhaResponse(BaseModel):
+    linha: int
+    status: Literal["criado", "atualizado", "erro"]
+    id: Optional[str] = None
+    titulo: Optional[str] = None
+    erro: Optional[str] = None
+
+class ImportacaoProdutosResponse(BaseModel):
+    total: int
+    criados: int
+    atualizados: int
+    erros: int
+    simulado: bool
+    segundos: float
+    linhas: List[ImportacaoLinhaResponse]
@@ -0,0 +1,47 @@
+"""
+Schemas para Promocao
+"""
+from pydantic import BaseModel, Field, validator
+from typing import Optional
+from datetime import datetime, timezone
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Horários com fuso viram UTC sem fuso (como o MongoDB devolve); sem fuso já são UTC"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+class PromocaoBase(BaseModel):
+    preco_promocional: float = Field(..., gt=0, description="Preço do produto durante a promoção")
+    inicio: datetime = Field(..., description="Início da promoção (sem fuso = UTC)")
+    fim: Optional[datetime] = Field(None, description="Fim da promoção, exclusivo (sem fim = até ser desativada)")
+    ativa: bool = Field(True, description="Desative para suspender a promoção sem apagá-la")
+    descricao: Optional[str] = Field(None, max_length=200, description="Descrição interna")
+
+    @validator('inicio', 'fim')
+    def normalize_timezone(cls, v):
+        return _utc_naive(v)
+
+class PromocaoCreate(PromocaoBase):
+    produto_id: str = Field(..., description="ID do produto")
+
+class PromocaoUpdate(BaseModel):
+    preco_promocional: Optional[float] = Field(None, gt=0, description="Preço do produto durante a promoção")
+    inicio: Optional[datetime] = Field(None, description="Início da promoção (sem fuso = UTC)")
+    fim: Optional[datetime] = Field(None, description="Fim da promoção, exclusivo (null = sem fim)")
+    ativa: Optional[bool] = Field(None, description="Desative para suspender a promoção sem apagá-la")
+    descricao: Optional[str] = Field(None, max_length=200, description="Descrição interna")
+
+    @validator('inicio', 'fim')
+    def normalize_timezone(cls, v):
+        return _utc_naive(v)
+
+class PromocaoResponse(PromocaoBase):
+    id: str
+    produto_id: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,44 @@
+"""
+Schemas para ZonaEntrega
+"""
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+
+class FaixaCepSchema(BaseModel):
+    inicio: str = Field(..., pattern=r"^\d{8}$", description="Primeiro CEP da faixa (8 dígitos)")
+    fim: str = Field(..., pattern=r"^\d{8}$", description="Último CEP da faixa (8 dígitos)")
+
+class ZonaEntregaBase(BaseModel):
+    nome: str = Field(..., min_length=1, max_length=100, description="Nome da zona")
+    ativa: bool = Field(True, description="Se a zona está em uso")
+    taxa: float = Field(..., ge=0, description="Taxa de entrega")
+    tempo_estimado_min: int = Field(..., ge=0, description="Tempo base de entrega, em minutos")
+    prioridade: int = Field(0, description="Desempate quando o endereço cai em mais de uma zona (maior vence)")
+    poligono: List[List[float]] = Field(default=[], description="Pontos [longitude, latitude] do contorno")
+    faixas_cep: List[FaixaCepSchema] = Field(default=[], description="Faixas de CEP atendidas")
+
+class ZonaEntregaCreate(ZonaEntregaBase):
+    pass
+
+class ZonaEntregaUpdate(BaseModel):
+    nome: Optional[str] = Field(None, min_length=1, max_length=100, description="Nome da zona")
+    ativa: Optional[bool] = Field(None, description="Se a zona está em uso")
+    taxa: Optional[float] = Field(None, ge=0, description="Taxa de entrega")
+    tempo_estimado_min: Optional[int] = Field(None, ge=0, description="Tempo base de entrega, em minutos")
+    prioridade: Optional[int] = Field(None, description="Desempate quando o endereço cai em mais de uma zona (maior vence)")
+    poligono: Optional[List[List[float]]] = Field(None, description="Pontos [longitude, latitude] do contorno")
+    faixas_cep: Optional[List[FaixaCepSchema]] = Field(None, description="Faixas de CEP atendidas")
+
+class ZonaEntregaResponse(ZonaEntregaBase):
+    id: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class CotacaoEntregaResponse(BaseModel):
+    zona: str
+    taxa_entrega: float
+    tempo_estimado_min: int
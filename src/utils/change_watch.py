@@ -0,0 +1,64 @@
+"""
+Recarga periódica de índices em memória quando a coleção muda no banco
+
+Cada processo (worker do uvicorn) mantém seus próprios índices. As rotas de
+administração atualizam o índice do processo que as atendeu; os demais
+conferem de tempos em tempos uma "impressão digital" barata da coleção
+(quantidade + última alteração) e recarregam quando ela muda.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+
+logger = logging.getLogger(__name__)
+
+
+def collection_fingerprint(document_cls, field: str = "updated_at") -> Tuple[int, Optional[datetime]]:
+    """Quantidade de documentos e maior `field`: muda com criação, edição e remoção"""
+    latest = document_cls.objects.order_by(f"-{field}").only(field).first()
+    return document_cls.objects.count(), getattr(latest, field) if latest else None
+
+
+class ReloadWatcher:
+    """
+    Uso:
+        watcher = ReloadWatcher("zonas", lambda: collection_fingerprint(ZonaEntrega), index.load)
+        watcher.mark(watcher.fingerprint())    # depois de cada carga completa
+        watcher.start(60)
+    """
+
+    def __init__(self, name: str, fingerprint: Callable[[], object], reload: Callable[[], object]):
+        self.name = name
+        self.fingerprint = fingerprint
+        self.reload = reload
+        self._loaded = None
+        self._task: Optional[asyncio.Task] = None
+
+    def mark(self, fingerprint) -> None:
+        """Registra a impressão digital do estado carregado"""
+        self._loaded = fingerprint
+
+    def start(self, interval: float) -> None:
+        if interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await run_in_threadpool(self.fingerprint) != self._loaded:
+                    await run_in_threadpool(self.reload)
+            except Exception as e:
+                logger.warning("Falha ao conferir %s: %s", self.name, e)
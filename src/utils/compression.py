@@ -0,0 +1,125 @@
+"""
+Compressão de respostas HTTP (gzip e Brotli) negociada via Accept-Encoding
+"""
+import gzip
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Brotli é opcional: sem ele, apenas gzip é oferecido
+    brotli = None
+
+
+# Tipos que já são comprimidos (ou não devem ser bufferizados) e não valem a compressão
+INCOMPRESSIBLE_CONTENT_TYPES = ("image/", "video/", "audio/", "application/zip", "text/event-stream")
+
+# Níveis para compressão por requisição (rápidos)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+# Níveis para corpos pré-comprimidos e cacheados (comprimidos uma vez só)
+GZIP_LEVEL_CACHED = 9
+BROTLI_QUALITY_CACHED = 9
+
+
+def available_encodings() -> tuple:
+    """Codificações suportadas, em ordem de preferência"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Escolhe a melhor codificação aceita pelo cliente
+
+    Respeita q-values (q=0 recusa) e, em empate, prefere Brotli a gzip.
+    """
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            accepted[token] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, cached: bool = False) -> bytes:
+    """Comprime um corpo completo na codificação indicada"""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY_CACHED if cached else BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL_CACHED if cached else GZIP_LEVEL)
+    raise ValueError(f"Codificação não suportada: {encoding}")
+
+
+class _SkipIncompressibleMixin:
+    """Não comprime imagens e outros tipos já comprimidos"""
+
+    async def send_with_compression(self, message: Message) -> None:
+        await super().send_with_compression(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if content_type.startswith(INCOMPRESSIBLE_CONTENT_TYPES):
+                self.content_type_is_excluded = True
+
+
+class _GZipResponder(_SkipIncompressibleMixin, GZipResponder):
+    pass
+
+
+class _BrotliResponder(_SkipIncompressibleMixin, IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Middleware de compressão com negociação entre Brotli e gzip
+
+    Respostas menores que `minimum_size` e respostas que já definem
+    Content-Encoding (ex.: corpos pré-comprimidos do cache) passam intactas.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding == "br":
+            responder = _BrotliResponder(self.app, self.minimum_size)
+        elif encoding == "gzip":
+            responder = _GZipResponder(self.app, self.minimum_size, compresslevel=GZIP_LEVEL)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -0,0 +1,214 @@
+"""
+Índice em memória das zonas de entrega
+
+O pedido resolve a zona do endereço sem ir ao banco:
+- faixas de CEP viram segmentos disjuntos ordenados (cada um já com a zona
+  vencedora pela prioridade), consultados por busca binária
+- polígonos ficam numa grade regular de células de CELL_SIZE graus; a
+  consulta olha só os polígonos da célula do ponto (caixa envolvente e depois
+  ray casting)
+
+O índice é imutável: load() monta um novo e troca a referência, então as
+consultas não usam lock. Cada processo carrega as zonas na inicialização,
+recarrega após as rotas de administração e confere periodicamente se o banco
+mudou (DELIVERY_ZONES_REFRESH_SECONDS), para alcançar os outros workers.
+"""
+import bisect
+import logging
+import math
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.models.zona_entrega import ZonaEntrega
+from src.utils.change_watch import ReloadWatcher, collection_fingerprint
+from src.utils.queries import raw_query
+from src.utils.text import digits
+
+
+logger = logging.getLogger(__name__)
+
+# lado da célula da grade, em graus (~5,5 km no equador)
+CELL_SIZE = 0.05
+
+CENTAVOS = Decimal("0.01")
+
+
+class ZoneMatch(NamedTuple):
+    id: str
+    nome: str
+    taxa: Decimal
+    tempo_estimado_min: int
+    prioridade: int
+
+
+class _Polygon(NamedTuple):
+    zone: ZoneMatch
+    points: List[Tuple[float, float]]
+    bbox: Tuple[float, float, float, float]
+
+
+def point_in_polygon(x: float, y: float, points: List[Tuple[float, float]]) -> bool:
+    """Ray casting (pontos exatamente na borda podem cair para qualquer lado)"""
+    inside = False
+    j = len(points) - 1
+    for i in range(len(points)):
+        xi, yi = points[i]
+        xj, yj = points[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def normalize_cep(cep: Optional[str]) -> Optional[int]:
+    """CEP como inteiro de 8 dígitos, ou None se não tiver 8 dígitos"""
+    cep_digits = digits(cep)
+    return int(cep_digits) if len(cep_digits) == 8 else None
+
+
+def _cell(x: float, y: float) -> Tuple[int, int]:
+    return math.floor(x / CELL_SIZE), math.floor(y / CELL_SIZE)
+
+
+class _Snapshot:
+    """Estrutura de consulta montada a partir das zonas ativas"""
+
+    def __init__(self, zonas: List[dict]):
+        self.zones = 0
+        self.polygons = 0
+        intervals: List[Tuple[int, int, ZoneMatch]] = []
+        self.grid: Dict[Tuple[int, int], List[_Polygon]] = {}
+
+        for raw in zonas:
+            zone = ZoneMatch(
+                id=str(raw["_id"]),
+                nome=raw["nome"],
+                taxa=Decimal(str(raw.get("taxa") or 0)).quantize(CENTAVOS),
+                tempo_estimado_min=int(raw.get("tempo_estimado_min") or 0),
+                prioridade=int(raw.get("prioridade") or 0),
+            )
+            self.zones += 1
+            for faixa in raw.get("faixas_cep") or []:
+                intervals.append((int(faixa["inicio"]), int(faixa["fim"]), zone))
+            points = [(float(p[0]), float(p[1])) for p in raw.get("poligono") or []]
+            if len(points) >= 3:
+                self._add_polygon(zone, points)
+
+        # a zona de maior prioridade primeiro em cada célula
+        for cell in self.grid.values():
+            cell.sort(key=lambda polygon: -polygon.zone.prioridade)
+
+        # segmentos disjuntos [starts[i], starts[i+1]) com a zona vencedora de cada um
+        bounds = sorted({start for start, _, _ in intervals} | {end + 1 for _, end, _ in intervals})
+        self.cep_starts: List[int] = []
+        self.cep_zones: List[Optional[ZoneMatch]] = []
+        for start in bounds:
+            best = None
+            for lo, hi, zone in intervals:
+                if lo <= start <= hi and (best is None or zone.prioridade > best.prioridade):
+                    best = zone
+            if self.cep_zones and self.cep_zones[-1] == best:
+                continue
+            self.cep_starts.append(start)
+            self.cep_zones.append(best)
+
+    def _add_polygon(self, zone: ZoneMatch, points: List[Tuple[float, float]]) -> None:
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        polygon = _Polygon(zone, points, (min(xs), min(ys), max(xs), max(ys)))
+        self.polygons += 1
+        x0, y0 = _cell(polygon.bbox[0], polygon.bbox[1])
+        x1, y1 = _cell(polygon.bbox[2], polygon.bbox[3])
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                self.grid.setdefault((cx, cy), []).append(polygon)
+
+    def by_cep(self, cep: int) -> Optional[ZoneMatch]:
+        i = bisect.bisect_right(self.cep_starts, cep) - 1
+        return self.cep_zones[i] if i >= 0 else None
+
+    def by_point(self, longitude: float, latitude: float) -> Optional[ZoneMatch]:
+        for polygon in self.grid.get(_cell(longitude, latitude), ()):
+            min_x, min_y, max_x, max_y = polygon.bbox
+            if min_x <= longitude <= max_x and min_y <= latitude <= max_y and point_in_polygon(
+                longitude, latitude, polygon.points
+            ):
+                return polygon.zone
+        return None
+
+
+class ZoneIndex:
+    """
+    Uso:
+        zone_index.load()
+        zona = zone_index.resolve(endereco)   # ZoneMatch ou None
+    """
+
+    def __init__(self):
+        self._snapshot = _Snapshot([])
+        self.watcher = ReloadWatcher("zonas de entrega", lambda: collection_fingerprint(ZonaEntrega), self.load)
+        self.loaded_at: Optional[datetime] = None
+
+    @property
+    def empty(self) -> bool:
+        """True se não há nenhuma zona ativa (a área de entrega não é restrita)"""
+        return self._snapshot.zones == 0
+
+    def load(self) -> dict:
+        """Relê as zonas ativas do banco e troca o índice"""
+        fingerprint = self.watcher.fingerprint()
+        zonas = raw_query(
+            ZonaEntrega.objects(ativa=True),
+            only=["nome", "taxa", "tempo_estimado_min", "prioridade", "poligono", "faixas_cep"],
+        )
+        self._snapshot = _Snapshot(list(zonas))
+        self.watcher.mark(fingerprint)
+        self.loaded_at = datetime.utcnow()
+        stats = self.stats()
+        logger.info("Zonas de entrega carregadas: %s", stats)
+        return stats
+
+    def lookup(
+        self, cep: Optional[str] = None, latitude: Optional[float] = None, longitude: Optional[float] = None
+    ) -> Optional[ZoneMatch]:
+        """
+        Zona do local: polígono (se houver coordenadas) ou faixa de CEP
+
+        Se as duas casarem vale a de maior prioridade; no empate, o polígono (mais preciso).
+        """
+        snapshot = self._snapshot
+        by_point = None
+        if latitude is not None and longitude is not None:
+            by_point = snapshot.by_point(longitude, latitude)
+        cep_int = normalize_cep(cep)
+        by_cep = snapshot.by_cep(cep_int) if cep_int is not None else None
+        if by_point is None or (by_cep is not None and by_cep.prioridade > by_point.prioridade):
+            return by_cep
+        return by_point
+
+    def resolve(self, endereco) -> Optional[ZoneMatch]:
+        """Zona de um Endereco (modelo do cliente)"""
+        return self.lookup(
+            getattr(endereco, "cep", None), getattr(endereco, "latitude", None), getattr(endereco, "longitude", None)
+        )
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "zonas": snapshot.zones,
+            "poligonos": snapshot.polygons,
+            "segmentos_cep": len(snapshot.cep_starts),
+            "celulas": len(snapshot.grid),
+            "carregado_em": self.loaded_at.isoformat() if self.loaded_at else None,
+        }
+
+    def start(self, interval: float) -> None:
+        """Confere a cada `interval` segundos se as zonas mudaram no banco (alterações feitas por outros processos)"""
+        self.watcher.start(interval)
+
+    async def stop(self) -> None:
+        await self.watcher.stop()
+
+
+zone_index = ZoneIndex()
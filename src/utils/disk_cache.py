@@ -0,0 +1,113 @@
+"""
+Índice LRU de um diretório de cache em disco, limitado em bytes
+
+Usado pelo cache de imagens redimensionadas (/img) e pelo cache local do
+armazenamento remoto de uploads. As entradas são caminhos relativos ao
+diretório (podem ter subdiretórios); quem grava o arquivo chama add() depois
+do rename final, e o índice apaga os menos usados quando passa do limite.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class DiskLRU:
+    """
+    Uso:
+        cache = DiskLRU("/var/cache/app/img", max_size=512 * 1024 * 1024)
+        path = cache.get("abc.webp")          # None se não estiver em cache
+        cache.add("abc.webp", os.path.getsize(cache.path("abc.webp")))
+    """
+
+    def __init__(self, directory: str, max_size: int, skip_dirs: Iterable[str] = ()):
+        self.directory = directory
+        self.max_size = max_size
+        self.total_size = 0
+        # subdiretórios que não fazem parte do cache (ex.: área de staging)
+        self.skip_dirs = set(skip_dirs)
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+    def load(self) -> None:
+        """Indexa o que já está em disco (de execuções anteriores), do mais antigo ao mais recente"""
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for root, dirs, files in os.walk(self.directory):
+            if root == self.directory:
+                dirs[:] = [d for d in dirs if d not in self.skip_dirs]
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(".tmp"):
+                    os.remove(path)
+                    continue
+                st = os.stat(path)
+                found.append((st.st_mtime, os.path.relpath(path, self.directory).replace(os.sep, "/"), st.st_size))
+        with self._lock:
+            self._entries.clear()
+            self.total_size = 0
+            for _, name, size in sorted(found):
+                self._entries[name] = size
+                self.total_size += size
+            self._loaded = True
+        self._evict()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, *name.split("/"))
+
+    def get(self, name: str) -> Optional[str]:
+        """Caminho da entrada (marcada como usada agora) ou None"""
+        self._ensure_loaded()
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        return self.path(name)
+
+    def add(self, name: str, size: int) -> None:
+        self._ensure_loaded()
+        with self._lock:
+            self.total_size += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+        self._evict()
+
+    def discard(self, name: str) -> None:
+        with self._lock:
+            size = self._entries.pop(name, None)
+            if size is None:
+                return
+            self.total_size -= size
+        self._remove(name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load()
+
+    def _evict(self) -> None:
+        # a entrada mais recente fica mesmo que sozinha passe do limite
+        while True:
+            with self._lock:
+                if self.total_size <= self.max_size or len(self._entries) <= 1:
+                    return
+                name, size = self._entries.popitem(last=False)
+                self.total_size -= size
+            self._remove(name)
+
+    def _remove(self, name: str) -> None:
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Falha ao remover %s do cache em %s: %s", name, self.directory, e)
@@ -0,0 +1,241 @@
+"""
+Outbox de emails: enfileiramento persistente e worker assíncrono de envio
+
+As rotas chamam enqueue_email e respondem na hora; o envio (STARTTLS e ida e
+volta SMTP) acontece fora da requisição. Cada job é reivindicado atomicamente
+(find_one_and_update), então vários workers/processos podem consumir a mesma fila.
+Falhas são reagendadas com backoff exponencial até max_tentativas.
+"""
+import asyncio
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from pymongo import ReturnDocument
+
+from src.config.config import get_email_outbox_workers
+from src.models.email_outbox import EmailOutbox
+from src.utils.email_service import email_service
+
+
+logger = logging.getLogger(__name__)
+
+
+async def _send_password_reset(destinatario: str, dados: dict) -> None:
+    await email_service.send_password_reset_email(
+        email=destinatario, token=dados["token"], user_type=dados["user_type"], raise_errors=True
+    )
+
+
+async def _send_registro(destinatario: str, dados: dict) -> None:
+    await email_service.enviar_email_registro(email=destinatario, raise_errors=True, **dados)
+
+
+async def _send_status_pedido(destinatario: str, dados: dict) -> None:
+    await email_service.enviar_email_status_pedido(email=destinatario, raise_errors=True, **dados)
+
+
+def _log_reset_fallback(job: EmailOutbox) -> None:
+    # Mesmo fallback de antes: sem email, o link de reset fica disponível no log do servidor
+    frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
+    logger.warning(f"TOKEN FALLBACK - Email: {job.destinatario} (tipo: {job.dados.get('user_type')})")
+    logger.warning(f"TOKEN FALLBACK - Link: {frontend_url}/redefinir-senha?token={job.dados.get('token')}")
+
+
+# tipo do job -> função que envia (levanta exceção em caso de falha)
+EMAIL_SENDERS: Dict[str, Callable[[str, dict], Awaitable[None]]] = {
+    "reset_senha": _send_password_reset,
+    "registro": _send_registro,
+    "status_pedido": _send_status_pedido,
+}
+
+# tipo do job -> ação quando todas as tentativas falham
+EMAIL_GIVE_UP_HANDLERS: Dict[str, Callable[[EmailOutbox], None]] = {
+    "reset_senha": _log_reset_fallback,
+}
+
+
+class OutboxWorker:
+    """Pool de tarefas asyncio que consome a coleção email_outbox"""
+
+    # backoff: BASE_BACKOFF * 2^(tentativa-1), limitado a MAX_BACKOFF (segundos)
+    BASE_BACKOFF = 30
+    MAX_BACKOFF = 3600
+    SEND_TIMEOUT = 60
+
+    def __init__(self, concurrency: int = 2, poll_interval: float = 5.0, lease_seconds: int = 120):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._tasks = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+        logger.info(f"Outbox de emails iniciado com {self.concurrency} workers")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self.notify()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Acorda os workers deste processo (ex.: logo após enfileirar um job)"""
+        if self._wakeup is None:
+            return
+        # enqueue_email pode ser chamado de rotas síncronas (threadpool); Event não é thread-safe
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wakeup.set()
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def claim(self) -> Optional[EmailOutbox]:
+        """Reivindica atomicamente o próximo job disponível (pendente ou com lease vencido)"""
+        now = datetime.utcnow()
+        raw = EmailOutbox._get_collection().find_one_and_update(
+            {"$or": [
+                {"status": "pendente", "proxima_tentativa": {"$lte": now}},
+                {"status": "enviando", "bloqueado_ate": {"$lte": now}},
+            ]},
+            {
+                "$set": {"status": "enviando", "bloqueado_ate": now + timedelta(seconds=self.lease_seconds), "updated_at": now},
+                "$inc": {"tentativas": 1},
+            },
+            sort=[("proxima_tentativa", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        return EmailOutbox._from_son(raw) if raw else None
+
+    async def process(self, job: EmailOutbox) -> None:
+        sender = EMAIL_SENDERS.get(job.tipo)
+        try:
+            if sender is None:
+                raise ValueError(f"Tipo de email desconhecido: {job.tipo}")
+            await asyncio.wait_for(sender(job.destinatario, job.dados), timeout=self.SEND_TIMEOUT)
+        except Exception as e:
+            self._register_failure(job, e, retry=sender is not None)
+            return
+
+        # Dados (tokens, senha temporária) não ficam guardados depois do envio
+        EmailOutbox.objects(id=job.id).update_one(
+            set__status="enviado",
+            set__enviado_em=datetime.utcnow(),
+            set__updated_at=datetime.utcnow(),
+            set__dados={},
+            unset__bloqueado_ate=True,
+            unset__ultimo_erro=True,
+        )
+        logger.info(f"Email '{job.tipo}' enviado para {job.destinatario} (tentativa {job.tentativas})")
+
+    def _register_failure(self, job: EmailOutbox, error: Exception, retry: bool = True) -> None:
+        erro = str(error) or error.__class__.__name__
+        if not retry or job.tentativas >= job.max_tentativas:
+            # como no envio, os dados (tokens, senha temporária) não ficam guardados; o fallback usa o job em memória
+            EmailOutbox.objects(id=job.id).update_one(
+                set__status="falhou",
+                set__ultimo_erro=erro,
+                set__updated_at=datetime.utcnow(),
+                set__dados={},
+                unset__bloqueado_ate=True,
+            )
+            logger.error(f"Email '{job.tipo}' para {job.destinatario} falhou definitivamente: {erro}")
+            give_up = EMAIL_GIVE_UP_HANDLERS.get(job.tipo)
+            if give_up:
+                give_up(job)
+            return
+
+        delay = min(self.MAX_BACKOFF, self.BASE_BACKOFF * 2 ** (job.tentativas - 1))
+        delay *= 1 + random.random() * 0.1
+        EmailOutbox.objects(id=job.id).update_one(
+            set__status="pendente",
+            set__proxima_tentativa=datetime.utcnow() + timedelta(seconds=delay),
+            set__ultimo_erro=erro,
+            set__updated_at=datetime.utcnow(),
+            unset__bloqueado_ate=True,
+        )
+        logger.warning(f"Email '{job.tipo}' para {job.destinatario} falhou (tentativa {job.tentativas}), nova tentativa em {delay:.0f}s: {erro}")
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                job = self.claim()
+            except Exception as e:
+                logger.error(f"Erro ao buscar job do outbox: {str(e)}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            try:
+                await self.process(job)
+            except Exception as e:
+                # o lease vence e o job volta a ser reivindicado; o worker segue consumindo a fila
+                logger.error(f"Erro ao processar job {job.id} do outbox: {str(e)}")
+
+
+outbox_worker = OutboxWorker(concurrency=get_email_outbox_workers())
+
+
+def enqueue_email(tipo: str, destinatario: str, **dados) -> EmailOutbox:
+    """
+    Enfileira um email para envio em segundo plano
+
+    Args:
+        tipo: chave em EMAIL_SENDERS ("reset_senha", "registro", "status_pedido")
+        destinatario: email do destinatário
+        dados: parâmetros do template (token, nome, senha_temporaria, ...)
+    """
+    if tipo not in EMAIL_SENDERS:
+        raise ValueError(f"Tipo de email desconhecido: {tipo}")
+    job = EmailOutbox(tipo=tipo, destinatario=destinatario, dados=dados)
+    job.save()
+    outbox_worker.notify()
+    return job
+
+
+# status que geram email para o cliente (o pedido nasce "Pendente")
+NOTIFIED_ORDER_STATUSES = ("Em preparo", "Pronto", "Saiu para entrega", "Entregue", "Cancelado")
+
+
+def notify_order_status(pedido) -> None:
+    """
+    Enfileira o email de mudança de status para o cliente do pedido
+
+    Falhas são apenas registradas: a notificação não deve impedir a atualização do pedido.
+    """
+    if pedido.status not in NOTIFIED_ORDER_STATUSES:
+        return
+    try:
+        cliente = pedido.cliente
+        if not cliente or not cliente.email:
+            return
+        enqueue_email(
+            "status_pedido",
+            cliente.email,
+            nome=cliente.nome,
+            pedido_id=str(pedido.id),
+            status=pedido.status,
+            total=float(pedido.total or 0),
+            metodo_entrega=pedido.metodo_entrega or "delivery",
+        )
+    except Exception as e:
+        logger.error(f"Erro ao enfileirar email de status do pedido {pedido.id}: {str(e)}")
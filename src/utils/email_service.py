@@ -4,16 +4,37 @@ Responsável pelo envio de emails de recuperação de senha
 """
 
 import os
-from pathlib import Path
 from typing import Optional
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formataddr, formatdate, make_msgid
+from fastapi_mail import ConnectionConfig
 from fastapi import HTTPException
 import logging
 from datetime import datetime
 
+from src.config.config import get_smtp_pool_size, get_smtp_max_messages_per_connection, get_smtp_idle_timeout
+from src.utils.email_templates import email_templates
+from src.utils.smtp_pool import SMTPPool
+
 
 logger = logging.getLogger(__name__)
 
+ROLE_LABELS = {
+    'admin': 'Administrador',
+    'motoboy': 'Motoboy',
+    'funcionario': 'Funcionário'
+}
+
+# texto exibido ao cliente para cada status do pedido
+STATUS_MESSAGES = {
+    'Em preparo': 'Seu pedido foi confirmado e já está sendo preparado pela nossa cozinha.',
+    'Pronto': 'Seu pedido está pronto!',
+    'Saiu para entrega': 'Seu pedido saiu para entrega e logo chegará até você.',
+    'Entregue': 'Seu pedido foi entregue. Bom apetite!',
+    'Cancelado': 'Seu pedido foi cancelado. Se tiver dúvidas, entre em contato conosco.'
+}
+
 class EmailService:
     
     def __init__(self):
@@ -23,22 +44,38 @@ class EmailService:
             MAIL_FROM=os.getenv("MAIL_FROM"),
             MAIL_PORT=int(os.getenv("MAIL_PORT", 587)),
             MAIL_SERVER=os.getenv("MAIL_SERVER"),
-            MAIL_STARTTLS=True,
-            MAIL_SSL_TLS=False,
-            USE_CREDENTIALS=True,
+            # padrões para SMTP real; o servidor local de testes (scripts/smtp_local.py) usa MAIL_STARTTLS=false
+            MAIL_STARTTLS=os.getenv("MAIL_STARTTLS", "true").lower() == "true",
+            MAIL_SSL_TLS=os.getenv("MAIL_SSL_TLS", "false").lower() == "true",
+            USE_CREDENTIALS=os.getenv("MAIL_USE_CREDENTIALS", "true").lower() == "true",
             VALIDATE_CERTS=True
         )
-        self.fastmail = FastMail(self.config)
+        # conexões SMTP reaproveitadas entre envios (ver src/utils/smtp_pool.py)
+        self.transport = SMTPPool(
+            hostname=self.config.MAIL_SERVER,
+            port=self.config.MAIL_PORT,
+            username=self.config.MAIL_USERNAME if self.config.USE_CREDENTIALS else None,
+            password=self.config.MAIL_PASSWORD if self.config.USE_CREDENTIALS else None,
+            use_tls=self.config.MAIL_SSL_TLS,
+            start_tls=self.config.MAIL_STARTTLS,
+            validate_certs=self.config.VALIDATE_CERTS,
+            size=get_smtp_pool_size(),
+            max_messages=get_smtp_max_messages_per_connection(),
+            idle_timeout=get_smtp_idle_timeout(),
+            timeout=self.config.TIMEOUT
+        )
     
     async def send_password_reset_email(
         self, 
         email: str, 
         token: str, 
-        user_type: str
+        user_type: str,
+        raise_errors: bool = False
     ) -> bool:
         """
     
             a ideia seria retornar um valorr booleano  , pois esria true se enviado com sucesso, false caso contrário
+            com raise_errors=True a exceção é repassada (usado pelo worker do outbox para registrar o erro)
         """
         try:
             subject = "Recuperação de Senha - Kaiserhaus"
@@ -47,35 +84,26 @@ class EmailService:
             frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
             reset_url = f"{frontend_url}/redefinir-senha?token={token}"
             
-            html_body = self._create_reset_email_template(
+            html_body, text_body = email_templates.render_pair(
+                "email_reset_password",
                 email=email,
-                token=token,
-                reset_url=reset_url,
-                user_type=user_type
-            )
-            
-            text_body = self._create_reset_email_text(
-                email=email,
-                token=token,
-                reset_url=reset_url,
-                user_type=user_type
+                user_type=user_type.title(),
+                datetime=self._get_current_time(),
+                reset_url=reset_url
             )
             
-            message = MessageSchema(
-                subject=subject,
-                recipients=[email],
-                body=html_body,
-                subtype="html"
-            )
+            message = self._build_message(subject, email, html_body, text_body)
             
             # aqui eh o envio do email
-            await self.fastmail.send_message(message)
+            await self.transport.send(message)
             
             logger.info(f"Email de reset enviado com sucesso para: {email}")
             return True
             
         except Exception as e:
             logger.error(f"Erro ao enviar email de reset para {email}: {str(e)}")
+            if raise_errors:
+                raise
             return False
     
     async def enviar_email_registro(
@@ -84,10 +112,12 @@ class EmailService:
         nome: str,
         senha_temporaria: str,
         role: str,
-        reset_token: str = None
+        reset_token: str = None,
+        raise_errors: bool = False
     ) -> bool:
         """
         Envia email de boas-vindas para novo funcionário com senha temporária
+        (com raise_errors=True a exceção é repassada em vez de retornar False)
 
         
         """
@@ -99,38 +129,72 @@ class EmailService:
             login_url = f"{frontend_url}/login"
             reset_url = f"{frontend_url}/redefinir-senha?token={reset_token}" if reset_token else ""
             
-            html_body = self._criar_template_email_registro(
+            html_body, text_body = email_templates.render_pair(
+                "email_de_registro",
                 email=email,
                 nome=nome,
                 senha_temporaria=senha_temporaria,
-                role=role,
+                role=ROLE_LABELS.get(role, 'Funcionário'),
                 login_url=login_url,
-                reset_url=reset_url
+                reset_url=reset_url,
+                datetime=self._get_current_time()
             )
             
-            text_body = self._criar_texto_email_registro(
-                email=email,
+            message = self._build_message(subject, email, html_body, text_body)
+            
+            await self.transport.send(message)
+            
+            logger.info(f"Email de boas-vindas enviado com sucesso para: {email}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erro ao enviar email de boas-vindas para {email}: {str(e)}")
+            if raise_errors:
+                raise
+            return False
+    
+    async def enviar_email_status_pedido(
+        self,
+        email: str,
+        nome: str,
+        pedido_id: str,
+        status: str,
+        total: float,
+        metodo_entrega: str = "delivery",
+        raise_errors: bool = False
+    ) -> bool:
+        """
+        Envia ao cliente a notificação de mudança de status do pedido
+        (com raise_errors=True a exceção é repassada em vez de retornar False)
+        """
+        try:
+            subject = f"Pedido #{pedido_id[-6:].upper()}: {status} - Kaiserhaus"
+            
+            frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
+            
+            html_body, text_body = email_templates.render_pair(
+                "email_status_pedido",
                 nome=nome,
-                senha_temporaria=senha_temporaria,
-                role=role,
-                login_url=login_url,
-                reset_url=reset_url
+                numero=pedido_id[-6:].upper(),
+                status=status,
+                mensagem=STATUS_MESSAGES.get(status, ""),
+                total=f"R$ {total:.2f}".replace(".", ","),
+                metodo_entrega=metodo_entrega,
+                pedidos_url=f"{frontend_url}/meus-pedidos",
+                datetime=self._get_current_time()
             )
             
-            message = MessageSchema(
-                subject=subject,
-                recipients=[email],
-                body=html_body,
-                subtype="html"
-            )
+            message = self._build_message(subject, email, html_body, text_body)
             
-            await self.fastmail.send_message(message)
+            await self.transport.send(message)
             
-            logger.info(f"Email de boas-vindas enviado com sucesso para: {email}")
+            logger.info(f"Email de status '{status}' do pedido {pedido_id} enviado para: {email}")
             return True
             
         except Exception as e:
-            logger.error(f"Erro ao enviar email de boas-vindas para {email}: {str(e)}")
+            logger.error(f"Erro ao enviar email de status do pedido {pedido_id} para {email}: {str(e)}")
+            if raise_errors:
+                raise
             return False
     
     def _get_current_time(self) -> str:
@@ -138,146 +202,17 @@ class EmailService:
         now = datetime.now()
         return now.strftime("%d/%m/%Y às %H:%M")
     
-    def _load_template(self, template_name: str) -> str:
-        # carrega template HTML de arquivo
-        template_path = Path(__file__).parent.parent / "templates" / template_name
-        with open(template_path, 'r', encoding='utf-8') as file:
-            return file.read()
-    
-    def _create_reset_email_template(
-        self, 
-        email: str, 
-        token: str, 
-        reset_url: str, 
-        user_type: str
-    ) -> str:
-
-        # carregar template
-        template = self._load_template("email_reset_password.html")
-        
-        template = template.replace("{{ email }}", email)
-        template = template.replace("{{ user_type }}", user_type.title())
-        template = template.replace("{{ datetime }}", self._get_current_time())
-        template = template.replace("{{ reset_url }}", reset_url)
-        
-        return template
-    
-    #caso so o email sem htmlfor enviado, por precaucao
-    def _create_reset_email_text(
-        self, 
-        email: str, 
-        token: str, 
-        reset_url: str, 
-        user_type: str
-    ) -> str:
-        return f"""
-        KAISERHAUS - Recuperação de Senha
-
-        Olá!
-        
-        Recebemos uma solicitação para redefinir a senha da sua conta no Kaiserhaus.
-        Estamos aqui para ajudar você a recuperar o acesso à sua conta de forma segura.
-        
-        INFORMAÇÕES DA SOLICITAÇÃO:
-        Email: {email}
-        Tipo de conta: {user_type.title()}
-        Data/Hora: {self._get_current_time()}
-        
-        Para redefinir sua senha, acesse este link:
-        {reset_url}
-        
-        INFORMAÇÕES IMPORTANTES:
-        - Este link expira em 1 hora por questões de segurança
-        - O link pode ser usado apenas uma vez
-        - Se você não solicitou esta alteração, ignore este email
-        - Nunca compartilhe este link com outras pessoas
-        
-        Este é um email automático, não responda.
-        
-        KAISERHAUS
-        © 2024 Kaiserhaus - Todos os direitos reservados
-        Há mais de 40 anos em São Paulo
-        """
-    
-    def _criar_template_email_registro(
-        self,
-        email: str,
-        nome: str,
-        senha_temporaria: str,
-        role: str,
-        login_url: str,
-        reset_url: str = ""
-    ) -> str:
-        """Cria template HTML para email de boas-vindas"""
-        template = self._load_template("email_de_registro.html")
-        
-        role_pt = {
-            'admin': 'Administrador',
-            'motoboy': 'Motoboy',
-            'funcionario': 'Funcionário'
-        }.get(role, 'Funcionário')
-        
-        template = template.replace("{{ nome }}", nome)
-        template = template.replace("{{ email }}", email)
-        template = template.replace("{{ role }}", role_pt)
-        template = template.replace("{{ senha_temporaria }}", senha_temporaria)
-        template = template.replace("{{ login_url }}", login_url)
-        template = template.replace("{{ reset_url }}", reset_url)
-        template = template.replace("{{ datetime }}", self._get_current_time())
-        
-        return template
-    
-    def _criar_texto_email_registro(
-        self,
-        email: str,
-        nome: str,
-        senha_temporaria: str,
-        role: str,
-        login_url: str,
-        reset_url: str = ""
-    ) -> str:
-        """Cria versão em texto simples do email de boas-vindas"""
-        role_pt = {
-            'admin': 'Administrador',
-            'motoboy': 'Motoboy',
-            'funcionario': 'Funcionário'
-        }.get(role, 'Funcionário')
-        
-        reset_section = f"\n\nOU REDEFINA SUA SENHA AGORA:\n{reset_url}\n" if reset_url else ""
-        
-        return f"""
-        KAISERHAUS - Bem-vindo à Equipe
-        
-        Olá, {nome}!
-        
-        Sua conta foi criada com sucesso no sistema Kaiserhaus.
-        
-        INFORMAÇÕES DA SUA CONTA:
-        Nome: {nome}
-        Email: {email}
-        Cargo: {role_pt}
-        Data de criação: {self._get_current_time()}
-        
-        CREDENCIAIS DE ACESSO:
-        Email: {email}
-        Senha Temporária: {senha_temporaria}
-        
-        Para sua segurança, recomendamos que você altere sua senha no primeiro acesso.
-        
-        COMO ACESSAR:
-        1. Acesse: {login_url}
-        2. Faça login com suas credenciais{reset_section}
-        
-        IMPORTANTE:
-        - Guarde suas credenciais em local seguro
-        - Não compartilhe sua senha com ninguém
-        - Recomendamos alterar a senha temporária no primeiro acesso
-        
-        Este é um email automático, não responda.
-        
-        KAISERHAUS
-        © 2024 Kaiserhaus - Todos os direitos reservados
-        Há mais de 40 anos em São Paulo
-        """
+    def _build_message(self, subject: str, email: str, html_body: str, text_body: str) -> MIMEMultipart:
+        # multipart/alternative: texto primeiro e HTML por último (o cliente mostra a última parte que suporta)
+        # classes MIME* (policy compat32): serializam bem mais rápido que EmailMessage em envios em lote
+        message = MIMEMultipart("alternative")
+        message["Subject"] = subject
+        message["From"] = formataddr((self.config.MAIL_FROM_NAME, self.config.MAIL_FROM)) if self.config.MAIL_FROM_NAME else self.config.MAIL_FROM
+        message["To"] = email
+        message["Date"] = formatdate(localtime=True)
+        message["Message-ID"] = make_msgid()
+        message.attach(MIMEText(text_body, "plain", "utf-8"))
+        message.attach(MIMEText(html_body, "html", "utf-8"))
+        return message
 
 email_service = EmailService()
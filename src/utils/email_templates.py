@@ -0,0 +1,53 @@
+"""
+Templates de email compilados uma única vez
+
+Todos os arquivos de src/templates são compilados pelo Jinja2 no carregamento
+(startup); cada envio só executa o template já compilado. HTML usa autoescape,
+então dados do usuário (nome, email) não injetam marcação. Cada email tem uma
+versão .html e uma .txt com o mesmo nome base.
+"""
+from pathlib import Path
+from typing import Dict, Tuple
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template, select_autoescape
+
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+
+
+class EmailTemplates:
+    """Registro de templates pré-compilados (nome do arquivo -> Template)"""
+
+    def __init__(self, directory: Path = TEMPLATES_DIR):
+        self.env = Environment(
+            loader=FileSystemLoader(str(directory)),
+            autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=False),
+            undefined=StrictUndefined,
+            # templates não mudam com o processo rodando: sem checagem de mtime por render
+            auto_reload=False,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            keep_trailing_newline=True,
+        )
+        self._templates: Dict[str, Template] = {}
+
+    def load(self) -> None:
+        """Compila todos os templates do diretório"""
+        self._templates = {name: self.env.get_template(name) for name in self.env.list_templates(extensions=["html", "txt"])}
+
+    def get(self, name: str) -> Template:
+        template = self._templates.get(name)
+        if template is None:
+            template = self._templates[name] = self.env.get_template(name)
+        return template
+
+    def render(self, name: str, **context) -> str:
+        return self.get(name).render(**context)
+
+    def render_pair(self, base_name: str, **context) -> Tuple[str, str]:
+        """Renderiza (html, texto) de um email a partir do nome base (ex.: "email_reset_password")"""
+        return self.render(f"{base_name}.html", **context), self.render(f"{base_name}.txt", **context)
+
+
+email_templates = EmailTemplates()
+email_templates.load()
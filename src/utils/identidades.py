@@ -0,0 +1,119 @@
+"""
+Serviço de identidades: unicidade global de email e resolução de contas
+
+Toda criação de usuário reserva o email em `identidades` (índice único) antes de
+gravar o documento do usuário, usando o mesmo ObjectId nos dois. Duas inscrições
+simultâneas com o mesmo email não passam juntas: a segunda falha no índice.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from mongoengine.errors import NotUniqueError
+
+from src.models.identidade import Identidade
+
+
+def normalize_email(email: str) -> str:
+    """Normaliza email para comparação (sem espaços nas pontas, minúsculo)"""
+    return (email or "").strip().lower()
+
+
+def resolve_identity(email: str) -> Optional[Identidade]:
+    """Resolve qualquer conta (cliente ou funcionário) com uma consulta indexada"""
+    if not email:
+        return None
+    return Identidade.objects(email=normalize_email(email)).first()
+
+
+def _reserve(email: str, user_type: str, user_id: ObjectId, detail: str) -> Identidade:
+    identidade = Identidade(email=normalize_email(email), user_type=user_type, user_id=user_id)
+    try:
+        identidade.save(force_insert=True)
+    except NotUniqueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+    return identidade
+
+
+@contextmanager
+def new_identity(email: str, user_type: str, detail: str = "Email já cadastrado") -> Iterator[ObjectId]:
+    """
+    Reserva o email e fornece o ObjectId que o novo usuário deve usar
+
+    Uso:
+        with new_identity(email, "cliente") as user_id:
+            Cliente(id=user_id, ...).save(force_insert=True)
+
+    Se a criação do usuário falhar, a reserva é desfeita.
+    """
+    user_id = ObjectId()
+    identidade = _reserve(email, user_type, user_id, detail)
+    try:
+        yield user_id
+    except BaseException:
+        identidade.delete()
+        raise
+
+
+@contextmanager
+def change_identity_email(
+    user_id: ObjectId, user_type: str, old_email: str, new_email: str, detail: str = "Email já cadastrado"
+) -> Iterator[None]:
+    """
+    Reserva o novo email de um usuário existente e libera o antigo após a gravação
+
+    Se o email normalizado não muda (ex.: só maiúsculas) ou não foi informado, nada é reservado.
+    """
+    if not new_email or normalize_email(old_email) == normalize_email(new_email):
+        yield
+        return
+
+    nova = _reserve(new_email, user_type, user_id, detail)
+    try:
+        yield
+    except BaseException:
+        nova.delete()
+        raise
+    Identidade.objects(email=normalize_email(old_email), user_id=user_id).delete()
+
+
+def remove_identity(user_id: ObjectId) -> None:
+    """Libera os emails de um usuário removido"""
+    Identidade.objects(user_id=user_id).delete()
+
+
+def backfill_identities() -> dict:
+    """
+    Cria identidades para usuários gravados antes da coleção existir
+
+    Idempotente e retomável: só as contas sem identidade são consultadas, e cada
+    uma é gravada com um upsert pelo email, então uma execução interrompida no
+    meio é completada pela próxima. Em caso de email repetido entre coleções, o
+    cliente prevalece (mesma precedência do antigo fluxo de recuperação de
+    senha) e o conflito é reportado.
+    """
+    from src.models import Cliente, Funcionario
+    from src.utils.queries import raw_query
+
+    com_identidade = {raw["user_id"] for raw in raw_query(Identidade.objects(), only=["user_id"])}
+    collection = Identidade._get_collection()
+    criadas, conflitos = 0, []
+    for user_type, document_cls in (("cliente", Cliente), ("funcionario", Funcionario)):
+        for raw in raw_query(document_cls.objects(), only=["email"]):
+            email = normalize_email(raw.get("email"))
+            if not email or raw["_id"] in com_identidade:
+                continue
+            result = collection.update_one(
+                {"email": email},
+                {"$setOnInsert": {"user_type": user_type, "user_id": raw["_id"], "created_at": datetime.utcnow()}},
+                upsert=True,
+            )
+            if result.upserted_id is not None:
+                criadas += 1
+                com_identidade.add(raw["_id"])
+            else:
+                # email já reservado por outra conta
+                conflitos.append(email)
+    return {"criadas": criadas, "conflitos": conflitos}
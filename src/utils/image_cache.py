@@ -0,0 +1,84 @@
+"""
+Cache em disco das imagens redimensionadas sob demanda (/img)
+
+Cada combinação (original, largura, altura, fit, formato) vira um arquivo no
+diretório do cache, nomeado pelo hash dos parâmetros. O índice em memória
+guarda os arquivos em ordem de uso (LRU); passando de IMAGE_CACHE_MAX_SIZE os
+menos usados são apagados. Requisições simultâneas da mesma variante esperam
+a mesma renderização, que roda no pool de processos próprio do /img.
+"""
+import asyncio
+import hashlib
+import os
+from typing import Dict, Optional
+
+from src.config.config import get_image_cache_dir, get_image_cache_max_size
+from src.utils.disk_cache import DiskLRU
+from src.utils.image_jobs import resize_jobs
+from src.utils.image_processing import RESIZE_FORMATS, resize_image
+
+
+class ImageResizeCache:
+    """
+    Diretório de imagens renderizadas com índice LRU limitado em bytes
+
+    Uso:
+        path = await image_cache.get_or_render(src_path, 320, None, "inside", "webp")
+    """
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.index = DiskLRU(directory, max_size)
+        self.hits = 0
+        self.misses = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def load(self) -> None:
+        """Indexa o que já está em disco (de execuções anteriores)"""
+        self.index.load()
+
+    def key(self, src_path: str, width: Optional[int], height: Optional[int], fit: str, fmt: str) -> str:
+        """Nome do arquivo em cache; inclui mtime e tamanho do original, então regravá-lo invalida o cache"""
+        st = os.stat(src_path)
+        raw = f"{os.path.basename(src_path)}:{st.st_mtime_ns}:{st.st_size}:{width}:{height}:{fit}:{fmt}"
+        return hashlib.sha256(raw.encode()).hexdigest() + RESIZE_FORMATS[fmt][0]
+
+    async def get_or_render(
+        self, src_path: str, width: Optional[int], height: Optional[int], fit: str, fmt: str
+    ) -> str:
+        """Caminho da variante renderizada, renderizando (uma única vez por chave) se não estiver em cache"""
+        name = self.key(src_path, width, height, fit, fmt)
+        path = self.index.get(name)
+        if path is not None:
+            self.hits += 1
+            return path
+
+        task = self._inflight.get(name)
+        if task is None:
+            self.misses += 1
+            task = asyncio.get_running_loop().create_task(self._render(name, src_path, width, height, fit, fmt))
+            self._inflight[name] = task
+            task.add_done_callback(lambda _: self._inflight.pop(name, None))
+        # shield: se o cliente que disparou a renderização desconectar, os demais continuam esperando por ela
+        return await asyncio.shield(task)
+
+    async def _render(
+        self, name: str, src_path: str, width: Optional[int], height: Optional[int], fit: str, fmt: str
+    ) -> str:
+        dest_path = self.index.path(name)
+        await resize_jobs.run(resize_image, src_path, dest_path, width, height, fit, fmt)
+        self.index.add(name, os.path.getsize(dest_path))
+        return dest_path
+
+    def stats(self) -> dict:
+        return {
+            "arquivos": len(self.index),
+            "bytes": self.index.total_size,
+            "limite_bytes": self.index.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "renderizando": len(self._inflight),
+        }
+
+
+image_cache = ImageResizeCache(directory=get_image_cache_dir(), max_size=get_image_cache_max_size())
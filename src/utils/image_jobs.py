@@ -0,0 +1,186 @@
+"""
+Pool de processos para transformações de imagem
+
+Decodificar, redimensionar e recodificar uma foto grande leva centenas de
+milissegundos de CPU; dentro do handler async isso trava o event loop para
+todas as requisições. Os jobs rodam em um ProcessPoolExecutor com:
+- fila limitada: acima de `max_pending` jobs, novos pedidos são recusados (503)
+- tempo limite por job: dentro do processo (SIGALRM) e na espera do lado async;
+  sem SIGALRM (Windows), um job que estoura o limite faz o pool ser recriado
+- modo assíncrono: o handler pode devolver um job_id e o cliente consulta depois
+
+O estado dos jobs assíncronos fica na memória do processo que os recebeu: com
+vários workers do uvicorn ou vários nós, a consulta (/files/jobs/{job_id}) só
+encontra o job se chegar ao mesmo processo (afinidade de sessão no balanceador,
+ou um único worker atendendo /files).
+"""
+import asyncio
+import inspect
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from src.config.config import get_image_workers, get_image_queue_size, get_image_job_timeout, get_image_resize_workers, get_image_resize_queue_size
+from src.utils.image_processing import HAS_ALARM, ImageJobTimeout, run_with_timeout
+
+
+class ImageJob:
+    """Estado de um job submetido em modo assíncrono"""
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = "pendente"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        # referência à task: o loop só guarda referências fracas e ela poderia ser coletada antes de terminar
+        self.task: Optional[asyncio.Task] = None
+
+    def to_dict(self) -> dict:
+        data = {"job_id": self.id, "status": self.status}
+        if self.status == "concluido":
+            data.update(self.result or {})
+        elif self.status == "falhou":
+            data["erro"] = self.error
+        return data
+
+
+class ImageJobPool:
+    """
+    Executor de jobs de imagem em processos separados
+
+    Uso:
+        result = await image_jobs.run(transform_image, content, dest, 1.0, 0, 0)
+        job = image_jobs.submit(transform_image, ..., on_done=lambda path: {...})
+    """
+
+    # Por quanto tempo jobs assíncronos concluídos ficam consultáveis (segundos)
+    JOB_RETENTION = 3600
+
+    def __init__(self, workers: int, max_pending: int, timeout: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._jobs: Dict[str, ImageJob] = {}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: os filhos não herdam threads/conexões (Mongo, SMTP) do processo da API
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, func, *args):
+        """Executa o job no pool e aguarda o resultado (levanta 503 se a fila estiver cheia, 504 no timeout)"""
+        self._reserve()
+        try:
+            return await self._execute(func, *args)
+        finally:
+            self._pending -= 1
+
+    def submit(self, func, *args, on_done=None) -> ImageJob:
+        """
+        Enfileira o job e retorna imediatamente um ImageJob consultável por get()
+
+        on_done(resultado) pode transformar o retorno da função no dicionário exposto ao cliente
+        (pode ser uma coroutine, ex.: para publicar o resultado no armazenamento).
+        """
+        self._reserve()
+        self._prune()
+        job = ImageJob(uuid.uuid4().hex)
+        self._jobs[job.id] = job
+
+        async def runner():
+            job.status = "processando"
+            try:
+                result = await self._execute(func, *args)
+                if on_done:
+                    result = on_done(result)
+                    if inspect.isawaitable(result):
+                        result = await result
+                job.result = result
+                job.status = "concluido"
+            except HTTPException as e:
+                job.status, job.error = "falhou", e.detail
+            except Exception as e:
+                job.status, job.error = "falhou", str(e)
+            finally:
+                job.finished_at = time.time()
+                job.task = None
+                self._pending -= 1
+
+        job.task = asyncio.get_running_loop().create_task(runner())
+        return job
+
+    def get(self, job_id: str) -> Optional[ImageJob]:
+        return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _reserve(self) -> None:
+        if self._pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Muitas imagens em processamento. Tente novamente em alguns instantes.",
+                headers={"Retry-After": "5"},
+            )
+        self._pending += 1
+
+    async def _execute(self, func, *args):
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, run_with_timeout, self.timeout, func, *args)
+        try:
+            # o limite interno vale por job; aqui cobre também a espera atrás dos jobs à frente na fila
+            rounds = -(-self.max_pending // self.workers)
+            return await asyncio.wait_for(future, timeout=self.timeout * rounds + 5)
+        except (asyncio.TimeoutError, ImageJobTimeout) as e:
+            if isinstance(e, asyncio.TimeoutError) and not HAS_ALARM:
+                # o job travado segue ocupando um processo: descarta o pool (o próximo job cria outro)
+                self._recycle()
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Tempo limite de processamento da imagem excedido",
+            )
+
+    def _recycle(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _prune(self) -> None:
+        limit = time.time() - self.JOB_RETENTION
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < limit]:
+            del self._jobs[job_id]
+
+
+image_jobs = ImageJobPool(
+    workers=get_image_workers(),
+    max_pending=get_image_queue_size(),
+    timeout=get_image_job_timeout(),
+)
+
+# Redimensionamento sob demanda do /img (público): pool e fila próprios, para não disputar com os uploads
+resize_jobs = ImageJobPool(
+    workers=get_image_resize_workers(),
+    max_pending=get_image_resize_queue_size(),
+    timeout=get_image_job_timeout(),
+)
@@ -0,0 +1,315 @@
+"""
+Processamento de imagens executado nos processos do pool (src/utils/image_jobs.py)
+
+Funções de módulo, sem dependência do app (só Pillow e a configuração), para
+serem importadas rápido pelos processos filhos e serializáveis por pickle.
+
+Decodificação (open_image): o limite de pixels é conferido pelo cabeçalho,
+antes de decodificar; JPEGs que serão reduzidos são decodificados direto em
+1/2, 1/4 ou 1/8 da escala (draft do libjpeg) e a orientação EXIF é aplicada
+com um transpose simples.
+"""
+import bisect
+import os
+import signal
+from typing import Dict, Iterable, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from src.config.config import get_image_max_pixels
+
+
+# Larguras (px) das variantes responsivas e formatos gerados para cada uma
+VARIANT_WIDTHS = (160, 320, 640, 1280)
+VARIANT_FORMATS = {
+    # formato -> (extensão, parâmetros do encoder)
+    "webp": (".webp", {"format": "WEBP", "quality": 80, "method": 4}),
+    "jpeg": (".jpg", {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Formatos e modos de enquadramento do redimensionamento sob demanda (/img)
+RESIZE_FORMATS = {**VARIANT_FORMATS, "png": (".png", {"format": "PNG", "optimize": True})}
+RESIZE_FITS = ("inside", "cover", "contain", "fill")
+# Dimensões servidas pelo /img: o pedido é arredondado para a próxima da lista (limita as renderizações por original)
+RESIZE_SIZES = (64, 96, 128, 160, 240, 320, 480, 640, 960, 1280, 1920, 2560)
+
+
+def snap_dimension(value: Optional[int]) -> Optional[int]:
+    """Próxima dimensão de RESIZE_SIZES (a maior, acima dela)"""
+    if value is None:
+        return None
+    return RESIZE_SIZES[min(bisect.bisect_left(RESIZE_SIZES, value), len(RESIZE_SIZES) - 1)]
+
+
+# Tag EXIF de orientação -> transposição que deixa a imagem "em pé" (mesma tabela do ImageOps.exif_transpose)
+EXIF_ORIENTATION = 0x0112
+ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+SWAPS_AXES = (Image.Transpose.TRANSPOSE, Image.Transpose.ROTATE_270, Image.Transpose.TRANSVERSE, Image.Transpose.ROTATE_90)
+
+
+class ImageJobTimeout(Exception):
+    """O job de imagem passou do tempo limite dentro do processo de trabalho"""
+
+
+class ImageTooLarge(ValueError):
+    """A imagem tem mais pixels que IMAGE_MAX_PIXELS (possível bomba de descompressão)"""
+
+
+# SIGALRM não existe no Windows: lá o limite fica só do lado async (ImageJobPool recicla o pool)
+HAS_ALARM = hasattr(signal, "SIGALRM")
+
+
+def _on_alarm(signum, frame):
+    raise ImageJobTimeout("Tempo limite de processamento da imagem excedido")
+
+
+def run_with_timeout(timeout: int, func, *args):
+    """
+    Executa func(*args) no processo de trabalho com limite de tempo
+
+    O SIGALRM interrompe o job dentro do próprio processo, que continua vivo
+    para os próximos jobs (um ProcessPoolExecutor não consegue cancelar um job já em execução).
+    Sem SIGALRM (Windows) o job roda sem limite interno.
+    """
+    if not HAS_ALARM:
+        return func(*args)
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.alarm(max(1, int(timeout)))
+    try:
+        return func(*args)
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def open_image(
+    src_path: str, min_size: Optional[Tuple[Optional[int], Optional[int]]] = None, max_pixels: Optional[int] = None
+) -> Image.Image:
+    """
+    Abre e decodifica a imagem já na orientação EXIF, sem metadados
+
+    min_size: menor tamanho (largura, altura) que a imagem precisa ter depois de
+    orientada; None em uma dimensão = livre. Com ele, JPEGs são decodificados
+    na menor escala do libjpeg que ainda o cubra.
+
+    Raises:
+        ImageTooLarge: se largura x altura passar de max_pixels (padrão IMAGE_MAX_PIXELS)
+    """
+    image = Image.open(src_path)
+    try:
+        _check_pixels(image, max_pixels)
+        transpose = ORIENTATION_TRANSPOSE.get(image.getexif().get(EXIF_ORIENTATION))
+        if min_size and image.format == "JPEG":
+            width, height = min_size[0] or 1, min_size[1] or 1
+            if transpose in SWAPS_AXES:
+                width, height = height, width
+            image.draft(None, (width, height))
+        # load() já fecha o arquivo; close() aqui descartaria os pixels decodificados
+        image.load()
+    except BaseException:
+        image.close()
+        raise
+    if transpose is not None:
+        image = image.transpose(transpose)
+    image.info = {}
+    return image
+
+
+def check_image_pixels(src_path: str, max_pixels: Optional[int] = None) -> Tuple[int, int]:
+    """Confere o limite de pixels lendo só o cabeçalho (não decodifica); retorna (largura, altura)"""
+    with Image.open(src_path) as image:
+        _check_pixels(image, max_pixels)
+        return image.size
+
+
+def _check_pixels(image: Image.Image, max_pixels: Optional[int]) -> None:
+    max_pixels = max_pixels or get_image_max_pixels()
+    if image.width * image.height > max_pixels:
+        raise ImageTooLarge(
+            f"Imagem de {image.width}x{image.height} pixels excede o limite de {max_pixels / 1_000_000:g} megapixels"
+        )
+
+
+def prereduce(image: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """Reduz por fator inteiro (Image.reduce, rápido) mantendo ao menos o dobro de `size` para o resize final"""
+    factor = min(image.width // size[0], image.height // size[1]) // 2
+    return image.reduce(factor) if factor >= 2 else image
+
+
+def flatten_alpha(image: Image.Image) -> Image.Image:
+    """Converte para RGB aplicando fundo branco em imagens com transparência (para JPEG)"""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
+        return background
+    return image
+
+
+def apply_zoom_offset(image: Image.Image, zoom: float, offset_x: float, offset_y: float) -> Image.Image:
+    """Aplica zoom e deslocamento mantendo o tamanho original da imagem"""
+    if zoom == 1.0 and offset_x == 0.0 and offset_y == 0.0:
+        return image
+
+    # Calcular novo tamanho baseado no zoom
+    new_width = int(image.width * zoom)
+    new_height = int(image.height * zoom)
+
+    resized_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+    # Se a imagem redimensionada é menor que a original, centralizar
+    if new_width < image.width or new_height < image.height:
+        final_image = Image.new('RGB', (image.width, image.height), (255, 255, 255))
+        paste_x = max(0, (image.width - new_width) // 2)
+        paste_y = max(0, (image.height - new_height) // 2)
+        final_image.paste(resized_image, (paste_x, paste_y))
+        return final_image
+
+    # Cortar a área deslocada da imagem redimensionada
+    left = max(0, int(offset_x))
+    top = max(0, int(offset_y))
+    return resized_image.crop((left, top, left + image.width, top + image.height))
+
+
+def transform_image(src_path: str, dest_path: str, zoom: float, offset_x: float, offset_y: float) -> Image.Image:
+    """
+    Aplica as transformações do upload à imagem em src_path e grava o resultado em dest_path
+
+    O formato segue a extensão do destino (.png mantém PNG, o resto vira JPEG).
+    A gravação é atômica (arquivo temporário + rename). Retorna a imagem
+    transformada, já decodificada, para gerar as variantes sem reabrir o arquivo.
+    """
+    image = open_image(src_path)
+    image = flatten_alpha(image)
+    image = apply_zoom_offset(image, zoom, offset_x, offset_y)
+
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        if dest_path.lower().endswith('.png'):
+            image.save(tmp_path, 'PNG')
+        else:
+            image.save(tmp_path, 'JPEG', quality=95)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        # inclui ImageJobTimeout: não deixa arquivo parcial em uploads/
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return image
+
+
+def variant_filename(stem: str, width: int, fmt: str) -> str:
+    """Nome do arquivo de uma variante (ex.: "abc123-320.webp")"""
+    return f"{stem}-{width}{VARIANT_FORMATS[fmt][0]}"
+
+
+def generate_variants(
+    src_path: str, variants_dir: str, url_prefix: str, widths: Iterable[int] = VARIANT_WIDTHS
+) -> Dict[str, Dict[str, str]]:
+    """
+    Gera as variantes redimensionadas de uma imagem em WebP e JPEG progressivo
+
+    Metadados (EXIF, ICC, comentários) não são copiados; a orientação EXIF é
+    aplicada antes. Larguras maiores que a original são puladas (sem upscale),
+    mas a menor sempre existe. JPEGs são decodificados direto na menor escala
+    que cobre a maior largura pedida.
+
+    Returns:
+        {"webp": {"160": "/uploads/variants/x-160.webp", ...}, "jpeg": {...}}
+    """
+    stem = os.path.splitext(os.path.basename(src_path))[0]
+    image = open_image(src_path, min_size=(max(widths), None))
+    return write_variants(image, stem, variants_dir, url_prefix, widths)
+
+
+def write_variants(
+    image: Image.Image, stem: str, variants_dir: str, url_prefix: str, widths: Iterable[int] = VARIANT_WIDTHS
+) -> Dict[str, Dict[str, str]]:
+    """Codifica as variantes de uma imagem já decodificada; cada largura é reduzida a partir da anterior"""
+    widths = sorted({w for w in widths if w < image.width} or {min(widths)}, reverse=True)
+    os.makedirs(variants_dir, exist_ok=True)
+
+    variants: Dict[str, Dict[str, str]] = {fmt: {} for fmt in VARIANT_FORMATS}
+    current = image
+    for width in widths:
+        if current.width > width:
+            height = max(1, round(current.height * width / current.width))
+            current = current.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        current.info = {}
+        rgb = None
+        for fmt, (_, params) in VARIANT_FORMATS.items():
+            if fmt == "jpeg" or current.mode not in ("RGB", "RGBA"):
+                rgb = rgb or flatten_alpha(current).convert("RGB")
+                encoded = rgb
+            else:
+                encoded = current
+            name = variant_filename(stem, width, fmt)
+            tmp_path = os.path.join(variants_dir, f"{name}.tmp")
+            encoded.save(tmp_path, **params)
+            os.replace(tmp_path, os.path.join(variants_dir, name))
+            variants[fmt][str(width)] = f"{url_prefix}/{name}"
+    return {fmt: dict(reversed(list(by_width.items()))) for fmt, by_width in variants.items()}
+
+
+def transform_image_with_variants(
+    src_path: str, dest_path: str, zoom: float, offset_x: float, offset_y: float, variants_dir: str, url_prefix: str
+) -> Dict[str, Dict[str, str]]:
+    """transform_image seguido das variantes no mesmo job (sem decodificar de novo); remove src_path ao final"""
+    try:
+        image = transform_image(src_path, dest_path, zoom, offset_x, offset_y)
+    finally:
+        os.remove(src_path)
+    stem = os.path.splitext(os.path.basename(dest_path))[0]
+    return write_variants(image, stem, variants_dir, url_prefix)
+
+
+def resize_image(
+    src_path: str, dest_path: str, width: Optional[int], height: Optional[int], fit: str, fmt: str
+) -> str:
+    """
+    Redimensiona a imagem original para o /img e grava em dest_path no formato `fmt`
+
+    fit:
+        inside  - cabe em width x height mantendo a proporção, sem ampliar
+        cover   - preenche width x height exatos, cortando o excesso pelo centro
+        contain - cabe em width x height e completa com fundo branco
+        fill    - estica para width x height exatos
+    Com só uma das dimensões, a outra segue a proporção (e o fit vira "inside").
+    """
+    image = open_image(src_path, min_size=(width, height))
+
+    if width is None or height is None or fit == "inside":
+        box = (width or image.width, height or image.height)
+        if image.width > box[0] or image.height > box[1]:
+            image.thumbnail(box, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    elif fit == "cover":
+        image = ImageOps.fit(prereduce(image, (width, height)), (width, height), Image.Resampling.LANCZOS)
+    elif fit == "contain":
+        image = ImageOps.pad(
+            flatten_alpha(prereduce(image, (width, height))), (width, height), Image.Resampling.LANCZOS, color=(255, 255, 255)
+        )
+    else:
+        image = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    params = RESIZE_FORMATS[fmt][1]
+    if fmt == "jpeg":
+        image = flatten_alpha(image).convert("RGB")
+
+    tmp_path = f"{dest_path}.tmp"
+    try:
+        image.save(tmp_path, **params)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return dest_path
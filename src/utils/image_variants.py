@@ -0,0 +1,80 @@
+"""
+Variantes responsivas das imagens de produto (srcset)
+
+As variantes ficam no armazenamento de uploads sob "variants/<arquivo>-<largura>.<ext>"
+e são geradas por image_processing.generate_variants (no upload ou pelo
+comando scripts/gerar_variantes.py) em VARIANTS_DIR, de onde publish_variants
+as envia ao armazenamento.
+"""
+import os
+import posixpath
+from typing import Dict, Iterable, Optional
+
+from src.utils.image_processing import VARIANT_FORMATS, VARIANT_WIDTHS, variant_filename
+from src.utils.storage import storage
+
+
+UPLOAD_URL_PREFIX = "/uploads"
+VARIANTS_KEY_PREFIX = "variants"
+# diretório local onde as variantes são geradas (no backend local, o próprio uploads/variants)
+VARIANTS_DIR = storage.staging_dir(VARIANTS_KEY_PREFIX)
+VARIANTS_URL_PREFIX = f"{UPLOAD_URL_PREFIX}/{VARIANTS_KEY_PREFIX}"
+
+
+def url_to_key(url: Optional[str]) -> Optional[str]:
+    """Chave no armazenamento de uma URL /uploads/... (None para URLs externas)"""
+    if not url or not url.startswith(f"{UPLOAD_URL_PREFIX}/"):
+        return None
+    return url[len(UPLOAD_URL_PREFIX) + 1:]
+
+
+def publish_variants(variants: Dict[str, Dict[str, str]]) -> None:
+    """Envia ao armazenamento as variantes geradas em VARIANTS_DIR (no backend local não move nada)"""
+    for by_width in variants.values():
+        for url in by_width.values():
+            name = posixpath.basename(url)
+            storage.put_file(os.path.join(VARIANTS_DIR, name), f"{VARIANTS_KEY_PREFIX}/{name}")
+
+
+def _candidates(image_url: str) -> Dict[tuple, str]:
+    stem = os.path.splitext(os.path.basename(image_url))[0]
+    return {
+        (fmt, width): variant_filename(stem, width, fmt) for fmt in VARIANT_FORMATS for width in VARIANT_WIDTHS
+    }
+
+
+def variants_for_urls(image_urls: Iterable[Optional[str]]) -> Dict[str, Dict[str, Dict[str, str]]]:
+    """
+    Mapa de variantes já geradas de várias URLs de upload, com uma só consulta ao armazenamento
+
+    URLs externas ou sem variantes no armazenamento resultam em {}.
+    """
+    candidates = {url: _candidates(url) for url in set(image_urls) if url_to_key(url)}
+    stored = storage.existing(
+        f"{VARIANTS_KEY_PREFIX}/{name}" for by_key in candidates.values() for name in by_key.values()
+    )
+    result: Dict[str, Dict[str, Dict[str, str]]] = {}
+    for url, by_key in candidates.items():
+        variants = result[url] = {}
+        for (fmt, width), name in by_key.items():
+            if f"{VARIANTS_KEY_PREFIX}/{name}" in stored:
+                variants.setdefault(fmt, {})[str(width)] = f"{VARIANTS_URL_PREFIX}/{name}"
+    return result
+
+
+def variants_for_url(image_url: Optional[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Retorna o mapa de variantes já geradas para a URL de um upload
+
+    URLs externas ou sem variantes no armazenamento resultam em {}.
+    """
+    return variants_for_urls([image_url]).get(image_url, {})
+
+
+def build_srcset(variants: Optional[Dict[str, Dict[str, str]]]) -> Dict[str, str]:
+    """Converte o mapa de variantes em atributos srcset por formato ("url 160w, url 320w, ...")"""
+    return {
+        fmt: ", ".join(f"{url} {width}w" for width, url in sorted(by_width.items(), key=lambda item: int(item[0])))
+        for fmt, by_width in (variants or {}).items()
+        if by_width
+    }
@@ -1,12 +1,37 @@
 """
 Utilitários para criação e validação de JWT
+
+As chaves são carregadas uma vez (TokenService.from_env) e identificadas por
+`kid`, permitindo rotação com várias chaves ativas. Algoritmos assimétricos
+(ES256, EdDSA) permitem que outros nós verifiquem tokens só com a chave pública.
+
+Configuração:
+- JWT_SECRET / JWT_ALGORITHM: chave simétrica única (kid "default"), como antes
+- JWT_KEYS: JSON com a lista de chaves, ex.:
+    [{"kid": "2026-10", "alg": "ES256", "private_key_file": "k.pem", "public_key_file": "k.pub"},
+     {"kid": "default", "alg": "HS256", "secret": "..."}]
+  chaves só com a pública (ou sem `secret`/privada) servem apenas para verificar
+- JWT_ACTIVE_KID: kid usado para assinar (padrão: primeira chave que pode assinar)
 """
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, Optional
+from collections import OrderedDict
+import json
+import logging
 import os
+import threading
+import time
 import jwt
 
 
+logger = logging.getLogger(__name__)
+
+# kid assumido para tokens sem cabeçalho `kid` (emitidos antes da rotação)
+DEFAULT_KID = "default"
+
+SYMMETRIC_ALGORITHMS = ("HS256", "HS384", "HS512")
+
+
 def get_jwt_secret() -> str:
     return os.getenv("JWT_SECRET", "change-me-in-env")
 
@@ -22,19 +47,133 @@ def get_jwt_expires_minutes() -> int:
         return 60
 
 
-def create_access_token(subject: str, claims: Dict[str, Any]) -> str:
-    to_encode = {"sub": subject, **claims}
-    expire = datetime.now(tz=timezone.utc) + timedelta(minutes=get_jwt_expires_minutes())
-    to_encode.update({"exp": expire})
-    token = jwt.encode(to_encode, get_jwt_secret(), algorithm=get_jwt_algorithm())
-    return token
+def _read_file(path: Optional[str]) -> Optional[str]:
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
 
 
-def decode_token(token: str) -> Optional[Dict[str, Any]]:
-    try:
-        decoded = jwt.decode(token, get_jwt_secret(), algorithms=[get_jwt_algorithm()])
-        return decoded
-    except Exception:
-        return None
+class TokenKey:
+    """Chave de assinatura/verificação identificada por kid"""
+
+    def __init__(self, kid: str, algorithm: str, signing_key=None, verifying_key=None):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.verifying_key = verifying_key
+
+    @property
+    def can_sign(self) -> bool:
+        return self.signing_key is not None
+
+    @classmethod
+    def from_config(cls, config: dict) -> "TokenKey":
+        kid = config["kid"]
+        algorithm = config.get("alg", "HS256")
+        if algorithm in SYMMETRIC_ALGORITHMS:
+            secret = config.get("secret") or _read_file(config.get("secret_file"))
+            if not secret:
+                raise ValueError(f"Chave JWT '{kid}' sem segredo")
+            return cls(kid, algorithm, secret, secret)
+
+        # Assimétrica: converte os PEM para objetos de chave uma única vez
+        algo = jwt.get_algorithm_by_name(algorithm)
+        private_pem = config.get("private_key") or _read_file(config.get("private_key_file"))
+        public_pem = config.get("public_key") or _read_file(config.get("public_key_file"))
+        signing_key = algo.prepare_key(private_pem) if private_pem else None
+        if public_pem:
+            verifying_key = algo.prepare_key(public_pem)
+        elif signing_key is not None:
+            verifying_key = signing_key.public_key()
+        else:
+            raise ValueError(f"Chave JWT '{kid}' sem chave pública ou privada")
+        return cls(kid, algorithm, signing_key, verifying_key)
+
 
+class TokenService:
+    """
+    Emissão e verificação de JWT com chaves pré-carregadas
 
+    Verificações bem-sucedidas são memoizadas por token até o seu `exp`, então
+    tokens quentes (o mesmo usuário fazendo várias requisições) não repetem a
+    verificação de assinatura.
+    """
+
+    def __init__(self, keys: Dict[str, TokenKey], active_kid: str, expires_minutes: int = 60, cache_size: int = 10000):
+        if active_kid not in keys or not keys[active_kid].can_sign:
+            raise ValueError(f"Chave ativa '{active_kid}' inexistente ou sem chave de assinatura")
+        self.keys = keys
+        self.active_kid = active_kid
+        self.expires_minutes = expires_minutes
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "TokenService":
+        raw_keys = os.getenv("JWT_KEYS")
+        if raw_keys:
+            keys = {k.kid: k for k in (TokenKey.from_config(c) for c in json.loads(raw_keys))}
+        else:
+            keys = {DEFAULT_KID: TokenKey(DEFAULT_KID, get_jwt_algorithm(), get_jwt_secret(), get_jwt_secret())}
+        active_kid = os.getenv("JWT_ACTIVE_KID") or next((kid for kid, k in keys.items() if k.can_sign), DEFAULT_KID)
+        return cls(keys, active_kid, get_jwt_expires_minutes())
+
+    def create_access_token(self, subject: str, claims: Dict[str, Any]) -> str:
+        key = self.keys[self.active_kid]
+        to_encode = {"sub": subject, **claims}
+        expire = datetime.now(tz=timezone.utc) + timedelta(minutes=self.expires_minutes)
+        to_encode.update({"exp": expire})
+        return jwt.encode(to_encode, key.signing_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Verifica o token e retorna o payload
+
+        Raises:
+            jwt.InvalidTokenError: token malformado, expirado, com kid desconhecido ou assinatura inválida
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(token)
+            if cached is not None:
+                payload, expires_at = cached
+                if expires_at > now:
+                    # LRU: tokens em uso ficam no fim, os esquecidos saem primeiro
+                    self._cache.move_to_end(token)
+                    return payload
+                del self._cache[token]
+
+        kid = jwt.get_unverified_header(token).get("kid", DEFAULT_KID)
+        key = self.keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"kid desconhecido: {kid}")
+        payload = jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+
+        expires_at = payload.get("exp")
+        if expires_at is not None:
+            with self._lock:
+                self._cache[token] = (payload, float(expires_at))
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return payload
+
+    def decode(self, token: str) -> Optional[Dict[str, Any]]:
+        """Como verify, mas retorna None para tokens inválidos"""
+        try:
+            return self.verify(token)
+        except jwt.InvalidTokenError as e:
+            logger.debug(f"Token rejeitado: {str(e)}")
+            return None
+
+
+token_service = TokenService.from_env()
+
+
+def create_access_token(subject: str, claims: Dict[str, Any]) -> str:
+    return token_service.create_access_token(subject, claims)
+
+
+def decode_token(token: str) -> Optional[Dict[str, Any]]:
+    return token_service.decode(token)
@@ -0,0 +1,294 @@
+"""
+Busca textual do cardápio em memória
+
+Cada processo mantém um índice invertido dos produtos (título, descrição de
+capa e nome da categoria), montado com uma só leitura na inicialização e
+atualizado item a item pelas rotas de administração de produtos e
+categorias. A consulta não vai ao banco:
+
+- os termos são dobrados (sem acento, minúsculos), então "pao" casa "Pão"
+- cada termo da consulta casa termos do índice por igualdade, por prefixo
+  (busca binária no vocabulário ordenado) ou por semelhança de trigramas
+  (erros de digitação: "hamburguer" -> "hamburger")
+- o ranking soma a qualidade do casamento ponderada pelo campo (título vale
+  mais que categoria, que vale mais que descrição); produtos que casam todos
+  os termos vêm antes, e só na falta deles entram os que casam parte
+
+Produtos "Inativo" ficam fora do índice. Alterações feitas por outros
+processos são alcançadas pela conferência periódica do banco
+(MENU_SEARCH_REFRESH_SECONDS).
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.models.categoria import Categoria
+from src.models.produto import Produto
+from src.utils.change_watch import ReloadWatcher, collection_fingerprint
+from src.utils.queries import raw_query, fetch_field_map
+from src.utils.text import fold
+
+
+logger = logging.getLogger(__name__)
+
+# peso de cada campo no ranking
+FIELD_WEIGHTS = {"titulo": 3.0, "categoria": 2.0, "descricao_capa": 1.0}
+
+# qualidade do casamento de um termo da consulta com um termo do índice
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.8
+FUZZY_MATCH = 0.7
+
+# semelhança mínima (Jaccard dos trigramas) para aceitar um termo parecido
+FUZZY_THRESHOLD = 0.4
+# termos da consulta menores que isso não usam trigramas (muito ambíguos)
+FUZZY_MIN_LENGTH = 4
+# limite de termos do vocabulário expandidos por prefixo
+PREFIX_EXPANSIONS = 50
+MAX_QUERY_TERMS = 8
+
+# mesmo formato das listagens do cardápio (sem descrição geral nem estoque)
+PAYLOAD_EXCLUDE = ["descricao_geral", "estoque"]
+
+STOPWORDS = frozenset({"a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "com", "sem", "em", "na", "no", "para", "ao"})
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Termos dobrados do texto, sem stopwords ("Pão de Queijo" -> ["pao", "queijo"])"""
+    return [token for token in _TOKEN.findall(fold(text or "")) if token not in STOPWORDS]
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _State:
+    """Índice invertido; load() monta um novo e troca a referência"""
+
+    def __init__(self):
+        self.docs: Dict[str, dict] = {}
+        self.doc_terms: Dict[str, Dict[str, float]] = {}
+        self.doc_titles: Dict[str, str] = {}
+        self.doc_categories: Dict[str, Optional[str]] = {}
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.vocabulary: List[str] = []
+        self.trigram_terms: Dict[str, Set[str]] = defaultdict(set)
+        self.trigram_counts: Dict[str, int] = {}
+
+    def add(self, payload: dict) -> None:
+        pid = payload["id"]
+        self.remove(pid)
+        if payload.get("status") == "Inativo":
+            return
+
+        categoria = payload.get("categoria") or {}
+        terms: Dict[str, float] = {}
+        for field, text in (
+            ("titulo", payload.get("titulo")),
+            ("categoria", categoria.get("nome")),
+            ("descricao_capa", payload.get("descricao_capa")),
+        ):
+            for term in tokenize(text):
+                terms[term] = max(terms.get(term, 0.0), FIELD_WEIGHTS[field])
+
+        self.docs[pid] = payload
+        self.doc_terms[pid] = terms
+        self.doc_titles[pid] = fold(payload.get("titulo"))
+        self.doc_categories[pid] = categoria.get("id")
+        for term, weight in terms.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                bisect.insort(self.vocabulary, term)
+                grams = trigrams(term)
+                self.trigram_counts[term] = len(grams)
+                for gram in grams:
+                    self.trigram_terms[gram].add(term)
+            posting[pid] = weight
+
+    def remove(self, pid: str) -> None:
+        terms = self.doc_terms.pop(pid, None)
+        if terms is None:
+            return
+        del self.docs[pid]
+        del self.doc_titles[pid]
+        del self.doc_categories[pid]
+        for term in terms:
+            posting = self.postings[term]
+            posting.pop(pid, None)
+            if posting:
+                continue
+            del self.postings[term]
+            del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+            del self.trigram_counts[term]
+            for gram in trigrams(term):
+                bucket = self.trigram_terms[gram]
+                bucket.discard(term)
+                if not bucket:
+                    del self.trigram_terms[gram]
+
+    def expand(self, token: str) -> Dict[str, float]:
+        """Termos do índice que casam com o termo da consulta, com a qualidade de cada um"""
+        matches: Dict[str, float] = {}
+        if token in self.postings:
+            matches[token] = EXACT_MATCH
+
+        start = bisect.bisect_left(self.vocabulary, token)
+        for term in self.vocabulary[start:start + PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            matches.setdefault(term, PREFIX_MATCH)
+
+        if len(token) >= FUZZY_MIN_LENGTH:
+            grams = trigrams(token)
+            shared = Counter(term for gram in grams for term in self.trigram_terms.get(gram, ()))
+            for term, common in shared.items():
+                similarity = common / (len(grams) + self.trigram_counts[term] - common)
+                if similarity >= FUZZY_THRESHOLD:
+                    quality = FUZZY_MATCH * similarity
+                    if quality > matches.get(term, 0.0):
+                        matches[term] = quality
+        return matches
+
+    def search(self, query: str, limit: int) -> List[dict]:
+        tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+        if not tokens:
+            return []
+
+        matched: Counter = Counter()
+        scores: Dict[str, float] = defaultdict(float)
+        for token in tokens:
+            best: Dict[str, float] = {}
+            for term, quality in self.expand(token).items():
+                for pid, weight in self.postings[term].items():
+                    score = quality * weight
+                    if score > best.get(pid, 0.0):
+                        best[pid] = score
+            for pid, score in best.items():
+                matched[pid] += 1
+                scores[pid] += score
+
+        if not matched:
+            return []
+        complete = [pid for pid, count in matched.items() if count == len(tokens)]
+        candidates = complete or list(matched)
+
+        folded_query = fold(query)
+
+        def rank(pid: str) -> Tuple[int, float, str]:
+            title = self.doc_titles[pid]
+            bonus = 1.0 if title.startswith(folded_query) else 0.0
+            return -matched[pid], -(scores[pid] + bonus), title
+
+        return [self.docs[pid] for pid in heapq.nsmallest(limit, candidates, key=rank)]
+
+
+class MenuSearchIndex:
+    """
+    Uso:
+        menu_search.load()
+        menu_search.upsert(produto.to_dict())     # após criar/atualizar
+        menu_search.remove(produto_id)            # após deletar
+        menu_search.search("pao de queijo")       # lista no formato de ProdutoResponse
+    """
+
+    def __init__(self):
+        self._state = _State()
+        self._lock = threading.Lock()
+        self.watcher = ReloadWatcher("busca do cardápio", self._fingerprint, self.load)
+        self.loaded_at: Optional[datetime] = None
+
+    @staticmethod
+    def _fingerprint():
+        return collection_fingerprint(Produto), collection_fingerprint(Categoria)
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded_at is not None
+
+    def load(self) -> dict:
+        """Relê todos os produtos (um $in para as categorias) e troca o índice"""
+        fingerprint = self._fingerprint()
+        raws = list(raw_query(Produto.objects(status__ne="Inativo"), exclude=PAYLOAD_EXCLUDE))
+        categorias = fetch_field_map(Categoria, (raw.get("categoria") for raw in raws), "nome")
+        state = _State()
+        for raw in raws:
+            state.add(Produto.raw_to_dict(raw, categorias))
+        with self._lock:
+            self._state = state
+        self.watcher.mark(fingerprint)
+        self.loaded_at = datetime.utcnow()
+        stats = self.stats()
+        logger.info("Índice de busca do cardápio carregado: %s", stats)
+        return stats
+
+    def upsert(self, payload: dict) -> None:
+        """Indexa (ou reindexa) um produto a partir do seu to_dict()"""
+        payload = dict(payload)
+        for field in PAYLOAD_EXCLUDE:
+            payload[field] = None
+        with self._lock:
+            self._state.add(payload)
+
+    def reindex(self, produto_ids: List[str]) -> None:
+        """Relê do banco e reindexa vários produtos (após gravações em lote), com uma consulta para os produtos e uma para as categorias"""
+        if not produto_ids:
+            return
+        raws = list(raw_query(Produto.objects(id__in=produto_ids), exclude=PAYLOAD_EXCLUDE))
+        categorias = fetch_field_map(Categoria, (raw.get("categoria") for raw in raws), "nome")
+        found = set()
+        with self._lock:
+            for raw in raws:
+                payload = Produto.raw_to_dict(raw, categorias)
+                found.add(payload["id"])
+                self._state.add(payload)
+            for produto_id in set(map(str, produto_ids)) - found:
+                self._state.remove(produto_id)
+
+    def remove(self, produto_id: str) -> None:
+        with self._lock:
+            self._state.remove(str(produto_id))
+
+    def update_category(self, categoria_id: str, nome: Optional[str]) -> None:
+        """Reindexa os produtos da categoria renomeada (nome None: categoria removida)"""
+        categoria_id = str(categoria_id)
+        with self._lock:
+            state = self._state
+            pids = [pid for pid, cat in state.doc_categories.items() if cat == categoria_id]
+            for pid in pids:
+                payload = dict(state.docs[pid])
+                payload["categoria"] = {"id": categoria_id, "nome": nome} if nome is not None else None
+                state.add(payload)
+                # a referência continua no produto mesmo com a categoria removida
+                state.doc_categories[pid] = categoria_id
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        with self._lock:
+            return self._state.search(query, limit)
+
+    def stats(self) -> dict:
+        state = self._state
+        return {
+            "produtos": len(state.docs),
+            "termos": len(state.postings),
+            "trigramas": len(state.trigram_terms),
+            "carregado_em": self.loaded_at.isoformat() if self.loaded_at else None,
+        }
+
+    def start(self, interval: float) -> None:
+        """Confere a cada `interval` segundos se produtos ou categorias mudaram no banco (alterações de outros processos)"""
+        self.watcher.start(interval)
+
+    async def stop(self) -> None:
+        await self.watcher.stop()
+
+
+menu_search = MenuSearchIndex()
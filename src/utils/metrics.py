@@ -0,0 +1,300 @@
+"""
+Métricas Prometheus da API (exportadas em /metrics)
+
+- latência das requisições por método, rota (o template, ex. /pedidos/{pedido_id},
+  nunca o caminho com IDs) e status, e requisições em andamento
+- atraso do event loop (quanto um sleep agendado demora além do previsto:
+  sinal de código bloqueante rodando no loop)
+- comandos do MongoDB por coleção e operação (contagem, falhas e duração),
+  capturados por um CommandListener do pymongo, e a espera para obter uma
+  conexão do pool
+- cronômetros dos caminhos críticos (criação de pedido, login, ...) via @timed
+
+Com vários workers do uvicorn, defina PROMETHEUS_MULTIPROC_DIR (diretório
+vazio a cada deploy) para que /metrics some os valores de todos os processos.
+"""
+import asyncio
+import functools
+import inspect
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from pymongo import monitoring
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# requisições fora das métricas de latência (o próprio scrape)
+EXCLUDED_PATHS = {"/metrics"}
+
+# rótulo das requisições que não casaram com nenhuma rota (evita um rótulo por URL)
+UNMATCHED_ROUTE = "<sem rota>"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Duração das requisições HTTP",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requisições HTTP em andamento",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Atraso do event loop em relação ao agendado",
+    buckets=LOOP_LAG_BUCKETS,
+)
+EVENT_LOOP_LAG_LAST = Gauge(
+    "event_loop_lag_last_seconds",
+    "Última medida do atraso do event loop",
+    multiprocess_mode="max",
+)
+MONGO_COMMANDS = Counter(
+    "mongodb_commands_total",
+    "Comandos enviados ao MongoDB",
+    ["collection", "command", "outcome"],
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "Duração dos comandos do MongoDB (ida e volta ao servidor)",
+    ["collection", "command"],
+    buckets=MONGO_BUCKETS,
+)
+MONGO_POOL_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds",
+    "Espera para obter uma conexão do pool do MongoDB",
+    buckets=MONGO_BUCKETS,
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongodb_pool_checkout_failures_total",
+    "Falhas ao obter uma conexão do pool do MongoDB",
+    ["reason"],
+)
+MONGO_POOL_IN_USE = Gauge(
+    "mongodb_pool_connections_in_use",
+    "Conexões do pool do MongoDB emprestadas no momento",
+    multiprocess_mode="livesum",
+)
+OPERATION_DURATION = Histogram(
+    "app_operation_duration_seconds",
+    "Duração dos caminhos críticos da aplicação",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def route_template(scope: Scope, root_path: str) -> str:
+    """Template da rota que atendeu a requisição (preenchido pelo roteamento em scope["route"])"""
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path_format", None) or getattr(route, "path", UNMATCHED_ROUTE)
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:
+        # apps montados (ex. /uploads) não expõem a rota: vale o prefixo da montagem
+        return mounted[len(root_path):] + "/{path}"
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Mede cada requisição HTTP (adicionar por último, para ficar por fora dos demais middlewares)"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            REQUEST_LATENCY.labels(method, route_template(scope, root_path), str(status_code)).observe(
+                time.perf_counter() - start
+            )
+
+
+def _command_collection(command_name: str, command) -> str:
+    """Coleção alvo do comando ("-" para comandos de administração como ping e hello)"""
+    if command_name == "getMore":
+        target = command.get("collection")
+    else:
+        target = command.get(command_name)
+    return target if isinstance(target, str) else "-"
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Conta e cronometra os comandos do MongoDB por coleção e operação"""
+
+    def __init__(self):
+        # o evento de término não traz o comando: guarda a coleção pelo request_id
+        self._pending: Dict[Tuple[object, int], str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self._pending[(event.connection_id, event.request_id)] = _command_collection(event.command_name, event.command)
+
+    def _finished(self, event, outcome: str) -> None:
+        collection = self._pending.pop((event.connection_id, event.request_id), "-")
+        MONGO_COMMANDS.labels(collection, event.command_name, outcome).inc()
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name).observe(event.duration_micros / 1_000_000)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finished(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finished(event, "erro")
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Espera por conexões do pool e conexões emprestadas"""
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        MONGO_POOL_WAIT.observe(event.duration)
+        MONGO_POOL_IN_USE.inc()
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        MONGO_POOL_WAIT.observe(event.duration)
+        MONGO_POOL_CHECKOUT_FAILURES.labels(str(event.reason)).inc()
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        MONGO_POOL_IN_USE.dec()
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+
+def mongo_listeners() -> list:
+    """Listeners para o `event_listeners` da conexão (connect(..., event_listeners=mongo_listeners()))"""
+    return [MongoCommandMetrics(), MongoPoolMetrics()]
+
+
+def timed(operation: str):
+    """
+    Decorador que cronometra a função (síncrona ou assíncrona) em app_operation_duration_seconds
+
+    Exceções contam como outcome="erro" (inclusive HTTPException, ex. login recusado).
+    """
+    def decorator(func):
+        ok = OPERATION_DURATION.labels(operation, "ok")
+        erro = OPERATION_DURATION.labels(operation, "erro")
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException:
+                    erro.observe(time.perf_counter() - start)
+                    raise
+                ok.observe(time.perf_counter() - start)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                erro.observe(time.perf_counter() - start)
+                raise
+            ok.observe(time.perf_counter() - start)
+            return result
+        return wrapper
+
+    return decorator
+
+
+class LoopLagMonitor:
+    """
+    Uso:
+        loop_lag_monitor.start(0.5)   # no startup
+        await loop_lag_monitor.stop()
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, interval: float) -> None:
+        if interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self, interval: float) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - expected)
+            EVENT_LOOP_LAG.observe(lag)
+            EVENT_LOOP_LAG_LAST.set(lag)
+
+
+def render_metrics() -> bytes:
+    """Texto no formato de exposição do Prometheus (soma dos processos no modo multiprocesso)"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def release_process() -> None:
+    """No modo multiprocesso, descarta os medidores "vivos" deste processo (chamar no shutdown)"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,294 @@
+"""
+Importação e atualização de produtos em lote (CSV ou JSON)
+
+O arquivo inteiro é validado em memória e gravado com um só bulk_write:
+
+- cada linha passa pelo schema ProdutoImportRow (mesmas regras das rotas)
+- categorias (por ID ou nome) e produtos existentes (por ID ou título) são
+  resolvidos com uma consulta cada
+- linhas com `id` atualizam só as colunas informadas (ex.: só `preco` para
+  reajustar o cardápio); sem `id`, a linha atualiza o produto de mesmo
+  título ou cria um novo
+- a gravação não é ordenada: uma linha recusada pelo banco não impede as
+  demais, e o relatório traz o resultado de cada linha
+"""
+import csv
+import io
+import json
+import re
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from mongoengine.errors import ValidationError
+from mongoengine.queryset.visitor import Q
+from pydantic import ValidationError as SchemaValidationError
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from src.models.categoria import Categoria
+from src.models.produto import Produto, Acompanhamento
+from src.schemas.produto_schemas import ProdutoImportRow
+from src.utils.image_variants import variants_for_urls
+from src.utils.menu_search import menu_search
+from src.utils.stock import sync_stock_status
+from src.utils.queries import raw_query
+from src.utils.text import fold
+
+
+PRICE_COLUMNS = ("preco", "preco_promocional")
+BOOLEAN_COLUMNS = {"estrelas_kaiserhaus"}
+# colunas que o produto sempre tem: null explícito (JSON) é recusado; os demais campos aceitam null para limpar o valor
+NON_NULLABLE_COLUMNS = ("titulo", "preco", "status", "estrelas_kaiserhaus")
+TRUE_VALUES = {"sim", "s", "true", "1", "x"}
+FALSE_VALUES = {"nao", "n", "false", "0"}
+
+_HEADER = re.compile(r"[^a-z0-9]+")
+
+
+def _column(name: str) -> str:
+    """Cabeçalho da planilha -> nome do campo ("Preço Promocional" -> "preco_promocional")"""
+    return _HEADER.sub("_", fold(name)).strip("_")
+
+
+def _price(value: str) -> str:
+    """Aceita o formato brasileiro: "R$ 1.234,50" -> "1234.50" """
+    value = value.replace("R$", "").strip()
+    if "," in value:
+        value = value.replace(".", "").replace(",", ".")
+    return value
+
+
+def _csv_cell(column: str, value: str):
+    if column in PRICE_COLUMNS:
+        return _price(value)
+    if column in BOOLEAN_COLUMNS:
+        folded = fold(value)
+        if folded in TRUE_VALUES:
+            return True
+        if folded in FALSE_VALUES:
+            return False
+    return value
+
+
+def _parse_csv(text: str) -> List[Tuple[int, dict]]:
+    sample = text[:4096]
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(io.StringIO(text), dialect)
+    header = next(reader, None)
+    if not header:
+        raise ValueError("Arquivo CSV vazio")
+    columns = [_column(name) for name in header]
+    rows = []
+    for cells in reader:
+        if not any(cell.strip() for cell in cells):
+            continue
+        data = {}
+        for column, cell in zip(columns, cells):
+            cell = cell.strip()
+            # célula vazia = coluna não informada (não apaga o valor atual)
+            if column and cell:
+                data[column] = _csv_cell(column, cell)
+        rows.append((reader.line_num, data))
+    return rows
+
+
+def _parse_json(text: str) -> List[Tuple[int, dict]]:
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON inválido: {e}")
+    if isinstance(data, dict):
+        data = data.get("produtos")
+    if not isinstance(data, list):
+        raise ValueError("O JSON deve ser uma lista de produtos ou {\"produtos\": [...]}")
+    return [(posicao, item) for posicao, item in enumerate(data, start=1)]
+
+
+def parse_rows(filename: Optional[str], content_type: Optional[str], content: bytes) -> List[Tuple[int, dict]]:
+    """
+    Lê o arquivo enviado
+
+    Returns:
+        Lista de (linha, dados): linha do arquivo no CSV, posição (1..n) no JSON
+    Raises:
+        ValueError com a mensagem para o usuário
+    """
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        # planilhas exportadas pelo Excel em português
+        text = content.decode("cp1252")
+
+    name = (filename or "").lower()
+    if name.endswith(".json") or "json" in (content_type or "") or text.lstrip()[:1] in ("[", "{"):
+        return _parse_json(text)
+    return _parse_csv(text)
+
+
+def _schema_error(e: SchemaValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" if error["loc"] else error["msg"]
+        for error in e.errors()
+    )
+
+
+def _field_values(row: ProdutoImportRow, variants: Dict[str, dict]) -> dict:
+    """Campos informados na linha, já convertidos para o tipo do modelo (`variants`: saída de variants_for_urls)"""
+    values = row.dict(exclude_unset=True, exclude={"id", "categoria", "categoria_id", "acompanhamentos"})
+    nulos = [field for field in NON_NULLABLE_COLUMNS if field in values and values[field] is None]
+    if nulos:
+        raise ValueError(f"Campos obrigatórios não podem ser nulos: {', '.join(nulos)}")
+    for field in PRICE_COLUMNS:
+        if values.get(field) is not None:
+            values[field] = Decimal(str(values[field]))
+    if row.acompanhamentos is not None:
+        values["acompanhamentos"] = [
+            Acompanhamento(nome=acomp.nome, preco=Decimal(str(acomp.preco))) for acomp in row.acompanhamentos
+        ]
+    if "image_url" in values:
+        values["image_variants"] = variants.get(values["image_url"], {})
+    return values
+
+
+def import_products(rows: List[Tuple[int, dict]], dry_run: bool = False) -> dict:
+    """
+    Valida e grava as linhas (ver docstring do módulo)
+
+    Args:
+        rows: saída de parse_rows
+        dry_run: só valida e informa o que seria criado/atualizado
+
+    Returns:
+        Relatório no formato de ImportacaoProdutosResponse
+    """
+    inicio = time.perf_counter()
+    linhas: List[dict] = []
+    validas: List[Tuple[dict, ProdutoImportRow]] = []
+
+    for linha, data in rows:
+        resultado = {"linha": linha, "status": "erro", "id": None, "titulo": None, "erro": None}
+        linhas.append(resultado)
+        if not isinstance(data, dict):
+            resultado["erro"] = "Linha deve ser um objeto"
+            continue
+        resultado["titulo"] = data.get("titulo")
+        try:
+            validas.append((resultado, ProdutoImportRow(**data)))
+        except SchemaValidationError as e:
+            resultado["erro"] = _schema_error(e)
+
+    # uma consulta para todas as categorias citadas e uma para os produtos existentes
+    categoria_ids = {ObjectId(row.categoria_id) for _, row in validas if row.categoria_id and ObjectId.is_valid(row.categoria_id)}
+    categoria_nomes = {row.categoria for _, row in validas if row.categoria and not row.categoria_id}
+    categorias_por_id: Dict[ObjectId, str] = {}
+    categorias_por_nome: Dict[str, ObjectId] = {}
+    if categoria_ids or categoria_nomes:
+        for raw in raw_query(Categoria.objects(Q(id__in=list(categoria_ids)) | Q(nome__in=list(categoria_nomes))), only=["nome"]):
+            categorias_por_id[raw["_id"]] = raw["nome"]
+            categorias_por_nome[raw["nome"]] = raw["_id"]
+
+    produto_ids = {ObjectId(row.id) for _, row in validas if row.id and ObjectId.is_valid(row.id)}
+    titulos = {row.titulo for _, row in validas if not row.id and row.titulo}
+    existentes = set()
+    por_titulo: Dict[str, ObjectId] = {}
+    if produto_ids or titulos:
+        produtos = Produto.objects(Q(id__in=list(produto_ids)) | Q(titulo__in=list(titulos)))
+        for raw in raw_query(produtos, only=["titulo"]):
+            existentes.add(raw["_id"])
+            # títulos repetidos no banco: vale o produto mais antigo
+            titulo = raw.get("titulo")
+            if titulo not in por_titulo or raw["_id"] < por_titulo[titulo]:
+                por_titulo[titulo] = raw["_id"]
+
+    # variantes de todas as imagens citadas com uma consulta ao armazenamento (no S3, uma listagem em vez de uma por linha)
+    variants = variants_for_urls(row.image_url for _, row in validas if row.image_url)
+
+    agora = datetime.utcnow()
+    operacoes: List[object] = []
+    origem: List[dict] = []
+    vistos: Dict[object, int] = {}
+    estoque_alterado: List[Tuple[dict, ObjectId]] = []
+
+    for resultado, row in validas:
+        try:
+            if row.id:
+                if not ObjectId.is_valid(row.id) or ObjectId(row.id) not in existentes:
+                    raise ValueError("Produto não encontrado")
+                alvo = ObjectId(row.id)
+            elif not row.titulo:
+                raise ValueError("Informe o id ou o título do produto")
+            else:
+                alvo = por_titulo.get(row.titulo)
+
+            chave = alvo if alvo is not None else ("novo", row.titulo)
+            if chave in vistos:
+                raise ValueError(f"Produto repetido no arquivo (linha {vistos[chave]})")
+            vistos[chave] = resultado["linha"]
+
+            categoria = None
+            if row.categoria_id:
+                categoria = ObjectId(row.categoria_id) if ObjectId.is_valid(row.categoria_id) else None
+                if categoria not in categorias_por_id:
+                    raise ValueError("Categoria não encontrada")
+            elif row.categoria:
+                categoria = categorias_por_nome.get(row.categoria)
+                if categoria is None:
+                    raise ValueError(f"Categoria '{row.categoria}' não encontrada")
+
+            values = _field_values(row, variants)
+            if alvo is None:
+                if categoria is None:
+                    raise ValueError("Informe a categoria para criar o produto")
+                if values.get("preco") is None:
+                    raise ValueError("Informe o preço para criar o produto")
+                produto = Produto(id=ObjectId(), categoria=categoria, **values)
+                produto.sync_stock_status()
+                produto.validate()
+                operacoes.append(InsertOne(produto.to_mongo().to_dict()))
+                resultado.update(status="criado", id=str(produto.id))
+            else:
+                campos = {}
+                for field, value in values.items():
+                    if value is not None:
+                        Produto._fields[field].validate(value)
+                    campos[field] = Produto._fields[field].to_mongo(value) if value is not None else None
+                if categoria is not None:
+                    campos["categoria"] = categoria
+                if "status" in values:
+                    campos["esgotado"] = False
+                campos["updated_at"] = agora
+                operacoes.append(UpdateOne({"_id": alvo}, {"$set": campos}))
+                resultado.update(status="atualizado", id=str(alvo))
+                if values.get("estoque") is not None and "status" not in values:
+                    # o status depende do atual: ajustado depois da gravação, como nas rotas
+                    estoque_alterado.append((resultado, alvo))
+            origem.append(resultado)
+        except (ValueError, ValidationError) as e:
+            resultado["erro"] = str(e)
+
+    if operacoes and not dry_run:
+        try:
+            Produto._get_collection().bulk_write(operacoes, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                resultado = origem[error["index"]]
+                resultado.update(status="erro", erro=error.get("errmsg", "Erro ao gravar"))
+        sync_stock_status(alvo for resultado, alvo in estoque_alterado if resultado["status"] != "erro")
+        menu_search.reindex([r["id"] for r in origem if r["status"] != "erro"])
+
+    contagem = {status: sum(1 for r in linhas if r["status"] == status) for status in ("criado", "atualizado", "erro")}
+    return {
+        "total": len(linhas),
+        "criados": contagem["criado"],
+        "atualizados": contagem["atualizado"],
+        "erros": contagem["erro"],
+        "simulado": dry_run,
+        "segundos": round(time.perf_counter() - inicio, 3),
+        "linhas": linhas,
+    }
@@ -0,0 +1,289 @@
+"""
+Perfil de consultas ao MongoDB por requisição (depuração)
+
+Ligado por requisição com o cabeçalho `X-Profile: 1` numa chamada autenticada
+como admin. Um CommandListener do pymongo registra cada comando no perfil da
+requisição corrente (ContextVar, que também acompanha o código síncrono
+levado ao threadpool), e o middleware:
+
+- responde com o cabeçalho `Server-Timing` (tempo total no banco e número de
+  comandos, os comandos mais pesados por coleção e os padrões N+1), visível
+  na aba de rede do navegador
+- agrupa os comandos pelo "formato" (operação, coleção e filtro sem os
+  valores): o mesmo formato repetido PROFILE_N_PLUS_ONE_THRESHOLD vezes ou
+  mais é um N+1 (ex. um find por _id para cada item de uma lista)
+- roda `explain` (queryPlanner, sem reexecutar a consulta) nas consultas
+  acima de PROFILE_SLOW_QUERY_MS e registra no log o plano vencedor
+  (ex. "FETCH <- IXSCAN status_1" ou "COLLSCAN")
+
+Sem o cabeçalho o listener só faz uma leitura da ContextVar por comando.
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from mongoengine.connection import get_connection
+from pymongo import monitoring
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config.config import get_profile_slow_query_ms, get_profile_n_plus_one_threshold
+from src.utils.jwt_utils import decode_token
+from src.utils.metrics import route_template
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ENABLED_VALUES = {"1", "true", "sim"}
+
+# campos de sessão/protocolo que não mudam o formato da consulta (e não vão para o explain)
+NOISE_FIELDS = {
+    "lsid", "$db", "$clusterTime", "txnNumber", "$readPreference", "readConcern", "writeConcern",
+    "batchSize", "singleBatch", "cursor", "comment", "maxTimeMS", "startTransaction", "autocommit",
+}
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# limites por requisição
+MAX_COMMANDS = 10000
+MAX_EXPLAINS = 3
+MAX_SHAPE_LENGTH = 200
+SERVER_TIMING_TOP = 5
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+def query_shape(value) -> str:
+    """Formato de um filtro/comando sem os valores ({"_id": ObjectId(...)} -> "{_id: ?}")"""
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{key}: {query_shape(item)}" for key, item in value.items() if key not in NOISE_FIELDS) + "}"
+    if isinstance(value, (list, tuple)):
+        # listas de tamanhos diferentes ($in, pipelines de inserção) têm o mesmo formato
+        return f"[{query_shape(value[0])}]" if value else "[]"
+    return "?"
+
+
+def _command_target(command_name: str, command) -> str:
+    target = command.get("collection") if command_name == "getMore" else command.get(command_name)
+    return target if isinstance(target, str) else "-"
+
+
+class CommandRecord(NamedTuple):
+    name: str
+    collection: str
+    shape: str
+    duration_ms: float
+    ok: bool
+
+
+class SlowCommand(NamedTuple):
+    record: CommandRecord
+    database: str
+    command: dict
+
+
+class RequestProfile:
+    """Comandos de uma requisição (alimentado pelo listener, possivelmente de várias threads)"""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route = path
+        self.elapsed_ms = 0.0
+        self.commands: List[CommandRecord] = []
+        self.dropped = 0
+        self.slow: List[SlowCommand] = []
+        self._pending: Dict[Tuple[object, int], Tuple[str, str, dict]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                event.database_name,
+                _command_target(event.command_name, event.command),
+                event.command,
+            )
+
+    def finished(self, event, ok: bool, slow_ms: float) -> None:
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+            if pending is None:
+                return
+            if len(self.commands) >= MAX_COMMANDS:
+                self.dropped += 1
+                return
+            database, collection, command = pending
+            shape = query_shape({key: value for key, value in command.items() if key != event.command_name})
+            record = CommandRecord(
+                event.command_name, collection, shape[:MAX_SHAPE_LENGTH], event.duration_micros / 1000, ok
+            )
+            self.commands.append(record)
+            if ok and record.duration_ms >= slow_ms and event.command_name in EXPLAINABLE_COMMANDS and len(self.slow) < MAX_EXPLAINS:
+                self.slow.append(SlowCommand(record, database, dict(command)))
+
+    @property
+    def db_ms(self) -> float:
+        return sum(record.duration_ms for record in self.commands)
+
+    def by_target(self) -> List[Tuple[Tuple[str, str], int, float]]:
+        """(operação, coleção), quantidade e tempo total, do mais pesado para o mais leve"""
+        totals: Dict[Tuple[str, str], List[float]] = {}
+        for record in self.commands:
+            total = totals.setdefault((record.name, record.collection), [0, 0.0])
+            total[0] += 1
+            total[1] += record.duration_ms
+        return sorted(((key, int(count), ms) for key, (count, ms) in totals.items()), key=lambda item: -item[2])
+
+    def repeated(self, threshold: int) -> List[Tuple[CommandRecord, int, float]]:
+        """Formatos repetidos `threshold` vezes ou mais (N+1): exemplo, quantidade e tempo total"""
+        groups: Dict[Tuple[str, str, str], List] = {}
+        for record in self.commands:
+            group = groups.setdefault((record.name, record.collection, record.shape), [record, 0, 0.0])
+            group[1] += 1
+            group[2] += record.duration_ms
+        return sorted(
+            (tuple(group) for group in groups.values() if group[1] >= threshold), key=lambda group: -group[1]
+        )
+
+    def server_timing(self, threshold: int) -> str:
+        """Valor do cabeçalho Server-Timing"""
+        entries = [
+            f'total;dur={self.elapsed_ms:.1f}',
+            f'db;dur={self.db_ms:.1f};desc="MongoDB: {len(self.commands) + self.dropped} comandos"',
+        ]
+        for i, ((name, collection), count, ms) in enumerate(self.by_target()[:SERVER_TIMING_TOP]):
+            entries.append(f'db{i};dur={ms:.1f};desc="{name} {collection} x{count}"')
+        for i, (record, count, ms) in enumerate(self.repeated(threshold)):
+            entries.append(f'n1-{i};dur={ms:.1f};desc="N+1 {record.name} {record.collection} x{count}"')
+        return ", ".join(entries)
+
+
+def plan_summary(explain: dict) -> str:
+    """Plano vencedor de um explain, do estágio final ao inicial ("FETCH <- IXSCAN status_1")"""
+    planner = _find_key(explain, "queryPlanner") or {}
+    plan = planner.get("winningPlan") or {}
+    plan = plan.get("queryPlan", plan)
+    stages = []
+    pending = [plan]
+    while pending:
+        stage = pending.pop(0)
+        if not isinstance(stage, dict) or "stage" not in stage:
+            continue
+        stages.append(f"{stage['stage']} {stage['indexName']}" if stage.get("indexName") else stage["stage"])
+        if "inputStage" in stage:
+            pending.append(stage["inputStage"])
+        pending.extend(stage.get("inputStages") or [])
+    return " <- ".join(stages) or "plano indisponível"
+
+
+def _find_key(value, key: str):
+    """Primeira ocorrência de `key` (o explain de aggregate aninha o queryPlanner nos estágios)"""
+    if isinstance(value, dict):
+        if key in value:
+            return value[key]
+        value = list(value.values())
+    if isinstance(value, list):
+        for item in value:
+            found = _find_key(item, key)
+            if found is not None:
+                return found
+    return None
+
+
+def explain(slow: SlowCommand) -> str:
+    command = {key: value for key, value in slow.command.items() if key not in NOISE_FIELDS}
+    result = get_connection()[slow.database].command({"explain": command, "verbosity": "queryPlanner"})
+    return plan_summary(result)
+
+
+def _admin_requested(scope: Scope) -> bool:
+    """Cabeçalho de perfil presente e token de admin válido (só a assinatura: não consulta o banco)"""
+    headers = Headers(scope=scope)
+    if headers.get(PROFILE_HEADER, "").lower() not in PROFILE_ENABLED_VALUES:
+        return False
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    payload = decode_token(token)
+    return bool(payload) and payload.get("role") == "admin"
+
+
+class QueryProfiler(monitoring.CommandListener):
+    """Listener registrado na conexão; só age dentro de uma requisição perfilada"""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        profile = _current.get()
+        if profile is not None:
+            profile.started(event)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        profile = _current.get()
+        if profile is not None:
+            profile.finished(event, True, get_profile_slow_query_ms())
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        profile = _current.get()
+        if profile is not None:
+            profile.finished(event, False, get_profile_slow_query_ms())
+
+
+def report(profile: RequestProfile) -> None:
+    """Registra no log o resumo, os N+1 e o plano das consultas lentas (roda fora do perfil)"""
+    threshold = get_profile_n_plus_one_threshold()
+    logger.info(
+        "Perfil %s %s: %d comandos, %.1f ms no banco, %.1f ms no total",
+        profile.method, profile.route, len(profile.commands) + profile.dropped, profile.db_ms, profile.elapsed_ms,
+    )
+    for record, count, ms in profile.repeated(threshold):
+        logger.warning(
+            "N+1 em %s %s: %s %s repetido %d vezes (%.1f ms) formato=%s",
+            profile.method, profile.route, record.name, record.collection, count, ms, record.shape,
+        )
+    for slow in profile.slow:
+        try:
+            plano = explain(slow)
+        except Exception as e:
+            plano = f"explain falhou: {e}"
+        logger.warning(
+            "Consulta lenta em %s %s: %s %s %.1f ms plano=%s formato=%s",
+            profile.method, profile.route, slow.record.name, slow.record.collection,
+            slow.record.duration_ms, plano, slow.record.shape,
+        )
+
+
+class ProfilingMiddleware:
+    """Perfila as requisições de admin que pedem `X-Profile: 1` (ver docstring do módulo)"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _admin_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        root_path = scope.get("root_path", "")
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.elapsed_ms = (time.perf_counter() - start) * 1000
+                profile.route = route_template(scope, root_path)
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", profile.server_timing(get_profile_n_plus_one_threshold()))
+            await send(message)
+
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            # depois da resposta e fora do perfil: os explains não entram na contagem
+            await run_in_threadpool(report, profile)
+
+
+query_profiler = QueryProfiler()
@@ -0,0 +1,248 @@
+"""
+Índice em memória das promoções vigentes
+
+As promoções agendadas (modelo Promocao) são carregadas uma vez; o índice
+guarda o conjunto ativo {produto_id: promoção} válido até a próxima borda de
+janela (início ou fim mais próximo). Consultas de preço são um acesso a
+dicionário; quando o relógio passa da borda, a primeira consulta (ou o
+agendador, o que vier antes) recalcula o conjunto, então o preço muda
+exatamente no horário da janela. A cada troca o cache das listagens do
+cardápio é invalidado.
+
+O `preco_promocional` fixo do produto continua valendo como promoção sem
+janela; se houver mais de uma promoção para o produto, vale o menor preço.
+Alterações feitas por outros processos são alcançadas pela conferência
+periódica do banco (PROMOTIONS_REFRESH_SECONDS).
+"""
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional
+
+from mongoengine.queryset.visitor import Q
+
+from src.models.produto import Produto
+from src.models.promocao import Promocao
+from src.utils.change_watch import ReloadWatcher, collection_fingerprint
+from src.utils.queries import raw_query
+from src.utils.response_cache import response_cache, CARDAPIO_CACHE
+
+
+logger = logging.getLogger(__name__)
+
+CENTAVOS = Decimal("0.01")
+
+# espera máxima do agendador sem nenhuma borda à vista (segundos)
+MAX_SLEEP = 3600.0
+
+
+class PromoWindow(NamedTuple):
+    id: str
+    produto_id: str
+    preco: Decimal
+    inicio: datetime
+    fim: Optional[datetime]
+
+
+class ActivePromotion(NamedTuple):
+    id: str
+    preco: Decimal
+    fim: Optional[datetime]
+
+
+def _decimal(value) -> Decimal:
+    return Decimal(str(value)).quantize(CENTAVOS)
+
+
+class PromotionIndex:
+    """
+    Uso:
+        promotion_index.load()
+        preco = promotion_index.preco_efetivo(produto)     # Decimal
+        payload = promotion_index.apply(produto_dict)      # listagens
+    """
+
+    def __init__(self):
+        self._windows: List[PromoWindow] = []
+        # preço promocional fixo dos produtos ativos
+        self._legacy: Dict[str, Decimal] = {}
+        self._active: Dict[str, ActivePromotion] = {}
+        self._valid_until: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.watcher = ReloadWatcher("promoções", self._fingerprint, self.load)
+        self.loaded_at: Optional[datetime] = None
+
+    @staticmethod
+    def _fingerprint():
+        return collection_fingerprint(Promocao), collection_fingerprint(Produto)
+
+    def load(self) -> dict:
+        """Relê as promoções ativas (e os preços promocionais fixos) e recalcula o conjunto vigente"""
+        fingerprint = self._fingerprint()
+        agora = datetime.utcnow()
+        promocoes = Promocao.objects(Q(fim=None) | Q(fim__gt=agora), ativa=True)
+        windows = [
+            PromoWindow(
+                id=str(raw["_id"]),
+                produto_id=str(raw["produto"]),
+                preco=_decimal(raw["preco_promocional"]),
+                inicio=raw["inicio"],
+                fim=raw.get("fim"),
+            )
+            for raw in raw_query(promocoes, only=["produto", "preco_promocional", "inicio", "fim"])
+        ]
+        produtos = Produto.objects(status="Ativo", preco_promocional__gt=Decimal("0.00"))
+        legacy = {
+            str(raw["_id"]): _decimal(raw["preco_promocional"])
+            for raw in raw_query(produtos, only=["preco_promocional"])
+        }
+        with self._lock:
+            self._windows = windows
+            self._legacy = legacy
+            self._recompute(agora)
+        self.watcher.mark(fingerprint)
+        self.loaded_at = agora
+        self._notify()
+        stats = self.stats()
+        logger.info("Promoções carregadas: %s", stats)
+        return stats
+
+    def _recompute(self, now: datetime) -> None:
+        """Conjunto vigente em `now` e a próxima borda (chamado com o lock)"""
+        active: Dict[str, ActivePromotion] = {}
+        pending: List[PromoWindow] = []
+        next_boundary: Optional[datetime] = None
+        for window in self._windows:
+            if window.fim is not None and window.fim <= now:
+                continue
+            pending.append(window)
+            if window.inicio > now:
+                boundary = window.inicio
+            else:
+                current = active.get(window.produto_id)
+                if current is None or window.preco < current.preco:
+                    active[window.produto_id] = ActivePromotion(window.id, window.preco, window.fim)
+                boundary = window.fim
+            if boundary is not None and (next_boundary is None or boundary < next_boundary):
+                next_boundary = boundary
+
+        changed = active != self._active
+        self._windows = pending
+        self._active = active
+        self._valid_until = next_boundary
+        if changed:
+            response_cache.invalidate(CARDAPIO_CACHE)
+
+    def _current(self) -> Dict[str, ActivePromotion]:
+        valid_until = self._valid_until
+        if valid_until is not None and datetime.utcnow() >= valid_until:
+            with self._lock:
+                now = datetime.utcnow()
+                if self._valid_until is not None and now >= self._valid_until:
+                    self._recompute(now)
+        return self._active
+
+    def ativa(self, produto_id: str) -> Optional[ActivePromotion]:
+        """Promoção agendada vigente para o produto, se houver"""
+        return self._current().get(str(produto_id))
+
+    def preco_efetivo(self, produto) -> Decimal:
+        """Preço cobrado agora: o menor entre o preço e as promoções vigentes (agendada ou preço promocional fixo)"""
+        precos = [produto.preco]
+        if produto.preco_promocional:
+            precos.append(produto.preco_promocional)
+        promocao = self.ativa(str(produto.id))
+        if promocao is not None:
+            precos.append(promocao.preco)
+        return min(precos)
+
+    def apply(self, payload: dict) -> dict:
+        """Ajusta `preco_promocional` (e `promocao_ate`) de um produto serializado conforme a promoção vigente"""
+        promocao = self.ativa(payload["id"])
+        if promocao is None:
+            return payload
+        # promoção que não fica abaixo do preço (agendada antes de uma redução) não é publicada
+        if payload.get("preco") is not None and float(promocao.preco) >= payload["preco"]:
+            return payload
+        atual = payload.get("preco_promocional")
+        if atual is not None and atual <= float(promocao.preco):
+            return payload
+        return dict(
+            payload,
+            preco_promocional=float(promocao.preco),
+            promocao_ate=promocao.fim.isoformat() if promocao.fim else None,
+        )
+
+    def produtos_em_promocao(self) -> List[str]:
+        """IDs dos produtos com promoção vigente (agendada ou preço promocional fixo)"""
+        return list(self._current().keys() | self._legacy.keys())
+
+    def sync_product(self, payload: dict) -> None:
+        """Atualiza o preço promocional fixo de um produto após criá-lo ou editá-lo"""
+        produto_id = payload["id"]
+        with self._lock:
+            if payload.get("status") == "Ativo" and payload.get("preco_promocional"):
+                self._legacy[produto_id] = _decimal(payload["preco_promocional"])
+            else:
+                self._legacy.pop(produto_id, None)
+
+    def remove_product(self, produto_id: str) -> None:
+        produto_id = str(produto_id)
+        with self._lock:
+            self._legacy.pop(produto_id, None)
+            self._windows = [w for w in self._windows if w.produto_id != produto_id]
+            self._recompute(datetime.utcnow())
+
+    def stats(self) -> dict:
+        return {
+            "agendadas": len(self._windows),
+            "vigentes": len(self._active),
+            "precos_fixos": len(self._legacy),
+            "proxima_troca": self._valid_until.isoformat() if self._valid_until else None,
+            "carregado_em": self.loaded_at.isoformat() if self.loaded_at else None,
+        }
+
+    def _notify(self) -> None:
+        """Acorda o agendador para considerar novas bordas (seguro a partir de outras threads)"""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        while True:
+            delay = MAX_SLEEP
+            if self._valid_until is not None:
+                delay = min(MAX_SLEEP, max(0.0, (self._valid_until - datetime.utcnow()).total_seconds()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                self._current()
+            except Exception as e:
+                logger.warning("Falha ao atualizar promoções vigentes: %s", e)
+
+    def start(self, interval: float) -> None:
+        """Inicia o agendador das bordas e a conferência do banco a cada `interval` segundos"""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        self.watcher.start(interval)
+
+    async def stop(self) -> None:
+        await self.watcher.stop()
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._loop = None
+
+
+promotion_index = PromotionIndex()
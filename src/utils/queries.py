@@ -0,0 +1,106 @@
+"""
+Utilitários de consulta para endpoints de listagem
+
+As listagens não precisam de Documents completos do mongoengine: basta ler
+os documentos brutos (dict do pymongo) com apenas os campos usados na resposta.
+"""
+import base64
+import binascii
+import json
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+# Tamanho de lote do cursor nas listagens: grande o suficiente para evitar
+# muitos getMore, pequeno o suficiente para não segurar lotes enormes em memória
+LIST_BATCH_SIZE = 200
+
+
+def raw_query(
+    queryset,
+    only: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None,
+    batch_size: int = LIST_BATCH_SIZE,
+) -> Iterator[dict]:
+    """
+    Aplica projeção ao queryset e itera documentos brutos (sem hidratar Documents)
+
+    Args:
+        queryset: QuerySet do mongoengine já filtrado/ordenado
+        only: campos a incluir na projeção
+        exclude: campos a excluir da projeção
+        batch_size: tamanho de lote do cursor
+
+    Returns:
+        Iterador de dicts no formato armazenado no MongoDB
+    """
+    if only:
+        queryset = queryset.only(*only)
+    if exclude:
+        queryset = queryset.exclude(*exclude)
+    return iter(queryset.no_dereference().as_pymongo().batch_size(batch_size))
+
+
+def fetch_field_map(document_cls, ids: Iterable[ObjectId], field: str) -> Dict[ObjectId, object]:
+    """
+    Busca um único campo de vários documentos referenciados com um só `$in`
+
+    Substitui o dereference item a item (N+1) feito pelos ReferenceFields.
+
+    Returns:
+        Dicionário {ObjectId: valor do campo}
+    """
+    unique_ids = {oid for oid in ids if oid is not None}
+    if not unique_ids:
+        return {}
+    docs = raw_query(document_cls.objects(id__in=list(unique_ids)), only=[field])
+    return {doc["_id"]: doc.get(field) for doc in docs}
+
+
+
+def encode_cursor(key: str, last_id: ObjectId) -> str:
+    """Cursor opaco (base64 url-safe) com a chave de ordenação e o _id do último item da página"""
+    raw = json.dumps([key, str(last_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, ObjectId]:
+    """
+    Inverso de encode_cursor
+
+    Raises:
+        ValueError: cursor malformado
+    """
+    try:
+        key, last_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(key, str):
+            raise ValueError("chave do cursor inválida")
+        return key, ObjectId(last_id)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, InvalidId, TypeError, ValueError) as e:
+        raise ValueError(f"Cursor inválido: {e}")
+
+
+def keyset_page(queryset, key_field: str, limit: int, cursor: Optional[str] = None, **projection) -> Tuple[list, Optional[str]]:
+    """
+    Uma página ordenada por (key_field, _id), continuando depois do cursor
+
+    Paginação por chave (keyset) em vez de skip: cada página é uma faixa do
+    índice composto (key_field, _id), com custo constante em qualquer página.
+
+    Returns:
+        (documentos brutos, cursor da próxima página ou None na última)
+    """
+    if cursor:
+        key, last_id = decode_cursor(cursor)
+        queryset = queryset.filter(__raw__={"$or": [
+            {key_field: {"$gt": key}},
+            {key_field: key, "_id": {"$gt": last_id}},
+        ]})
+    queryset = queryset.order_by(key_field, "id").limit(limit + 1)
+    docs = list(raw_query(queryset, **projection))
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1].get(key_field) or "", docs[-1]["_id"])
@@ -0,0 +1,249 @@
+"""
+Limitação de tentativas para login e recuperação de senha
+
+Janela deslizante por IP e por email, com bloqueio progressivo após falhas
+consecutivas. As checagens rodam antes do bcrypt (verify_password) e do envio
+de email, para que uma rajada de tentativas não vire carga de CPU/SMTP.
+
+O estado fica em um backend plugável: MemoryBackend (local, por processo) ou
+MongoBackend (compartilhado entre workers/nós).
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from src.config.config import get_rate_limit_backend
+
+
+class LimiterBackend:
+    """Interface dos backends de estado do limitador"""
+
+    def hit(self, key: str, now: float, window: int) -> int:
+        """Registra uma tentativa e retorna quantas existem na janela"""
+        raise NotImplementedError
+
+    def get_block(self, key: str) -> float:
+        """Retorna o timestamp até o qual a chave está bloqueada (0 se livre)"""
+        raise NotImplementedError
+
+    def add_failure(self, key: str, ttl: int) -> int:
+        """Incrementa e retorna o número de falhas consecutivas"""
+        raise NotImplementedError
+
+    def set_block(self, key: str, until: float, ttl: int) -> None:
+        raise NotImplementedError
+
+    def reset(self, key: str) -> None:
+        """Zera falhas e bloqueio (ex.: após login bem-sucedido)"""
+        raise NotImplementedError
+
+
+class MemoryBackend(LimiterBackend):
+    """Backend local em memória (um estado por processo)"""
+
+    # A cada quantas tentativas as chaves expiradas são varridas
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        # por chave: timestamps na janela e quando a chave expira (último hit + a janela dela)
+        self._hits: Dict[str, Tuple[Deque[float], float]] = {}
+        self._failures: Dict[str, Tuple[int, float]] = {}
+        self._blocks: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._ops = 0
+
+    def hit(self, key: str, now: float, window: int) -> int:
+        with self._lock:
+            hits, _ = self._hits.get(key, (None, 0.0))
+            if hits is None:
+                hits = deque()
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            hits.append(now)
+            self._hits[key] = (hits, now + window)
+            self._ops += 1
+            if self._ops % self.SWEEP_EVERY == 0:
+                self._sweep(now)
+            return len(hits)
+
+    def get_block(self, key: str) -> float:
+        return self._blocks.get(key, 0.0)
+
+    def add_failure(self, key: str, ttl: int) -> int:
+        now = time.time()
+        with self._lock:
+            count, expires_at = self._failures.get(key, (0, 0.0))
+            count = count + 1 if expires_at > now else 1
+            self._failures[key] = (count, now + ttl)
+            return count
+
+    def set_block(self, key: str, until: float, ttl: int) -> None:
+        with self._lock:
+            self._blocks[key] = until
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._failures.pop(key, None)
+            self._blocks.pop(key, None)
+
+    def _sweep(self, now: float) -> None:
+        # cada chave pela própria janela: a varredura disparada por uma regra curta
+        # (login por IP, 60 s) não pode zerar as chaves de regras longas
+        for key in [k for k, (_, expires_at) in self._hits.items() if expires_at <= now]:
+            del self._hits[key]
+        for key in [k for k, (_, expires_at) in self._failures.items() if expires_at <= now]:
+            del self._failures[key]
+        for key in [k for k, until in self._blocks.items() if until <= now]:
+            del self._blocks[key]
+
+
+class MongoBackend(LimiterBackend):
+    """
+    Backend compartilhado em uma coleção do MongoDB
+
+    Cada chave é um documento atualizado atomicamente; um índice TTL em
+    `expira_em` remove chaves inativas.
+    """
+
+    COLLECTION = "rate_limits"
+
+    # Limite de timestamps guardados por chave
+    MAX_HITS = 1000
+
+    def __init__(self):
+        self._collection = None
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            from mongoengine.connection import get_db
+            self._collection = get_db()[self.COLLECTION]
+            self._collection.create_index("expira_em", expireAfterSeconds=0)
+        return self._collection
+
+    def hit(self, key: str, now: float, window: int) -> int:
+        from pymongo import ReturnDocument
+        doc = self.collection.find_one_and_update(
+            {"_id": key},
+            [{"$set": {
+                "hits": {"$slice": [{"$concatArrays": [
+                    {"$filter": {"input": {"$ifNull": ["$hits", []]}, "cond": {"$gt": ["$$this", now - window]}}},
+                    [now],
+                ]}, -self.MAX_HITS]},
+                "expira_em": {"$max": [{"$ifNull": ["$expira_em", None]}, datetime.utcnow() + timedelta(seconds=window)]},
+            }}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            projection={"hits": 1},
+        )
+        return len(doc.get("hits", []))
+
+    def get_block(self, key: str) -> float:
+        doc = self.collection.find_one({"_id": key}, projection={"bloqueado_ate": 1})
+        return (doc or {}).get("bloqueado_ate", 0.0)
+
+    def add_failure(self, key: str, ttl: int) -> int:
+        from pymongo import ReturnDocument
+        doc = self.collection.find_one_and_update(
+            {"_id": key},
+            {"$inc": {"falhas": 1}, "$max": {"expira_em": datetime.utcnow() + timedelta(seconds=ttl)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            projection={"falhas": 1},
+        )
+        return doc["falhas"]
+
+    def set_block(self, key: str, until: float, ttl: int) -> None:
+        self.collection.update_one(
+            {"_id": key},
+            {"$set": {"bloqueado_ate": until}, "$max": {"expira_em": datetime.utcnow() + timedelta(seconds=ttl)}},
+            upsert=True,
+        )
+
+    def reset(self, key: str) -> None:
+        self.collection.update_one({"_id": key}, {"$unset": {"falhas": "", "bloqueado_ate": ""}})
+
+
+def create_backend(name: Optional[str] = None) -> LimiterBackend:
+    """Cria o backend configurado em RATE_LIMIT_BACKEND ("memory" ou "mongo")"""
+    name = (name or get_rate_limit_backend()).lower()
+    if name == "mongo":
+        return MongoBackend()
+    if name == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Backend de rate limit desconhecido: {name}")
+
+
+class LoginThrottle:
+    """
+    Regras de limitação para /auth/login e /auth/esqueci-senha
+
+    - janela deslizante de tentativas por IP e por email
+    - após FAILURE_THRESHOLD falhas seguidas de um email (ou IP), bloqueio
+      que dobra a cada nova falha, até MAX_BACKOFF segundos
+    """
+
+    # (limite, janela em segundos)
+    LOGIN_PER_IP = (30, 60)
+    LOGIN_PER_EMAIL = (10, 300)
+    RESET_PER_IP = (10, 3600)
+    RESET_PER_EMAIL = (3, 900)
+
+    FAILURE_THRESHOLD = 3
+    BASE_BACKOFF = 2
+    MAX_BACKOFF = 900
+    FAILURE_TTL = 3600
+
+    def __init__(self, backend: LimiterBackend):
+        self.backend = backend
+
+    def check_login(self, ip: str, email: str) -> None:
+        """Levanta 429 se o login deste IP/email deve ser recusado antes de verificar a senha"""
+        now = time.time()
+        self._check_block(f"login:ip:{ip}", now)
+        self._check_block(f"login:email:{email.lower()}", now)
+        self._check_window(f"login:ip:{ip}:janela", now, *self.LOGIN_PER_IP)
+        self._check_window(f"login:email:{email.lower()}:janela", now, *self.LOGIN_PER_EMAIL)
+
+    def check_reset(self, ip: str, email: str) -> None:
+        """Levanta 429 se a recuperação de senha deste IP/email deve ser recusada"""
+        now = time.time()
+        self._check_window(f"reset:ip:{ip}:janela", now, *self.RESET_PER_IP)
+        self._check_window(f"reset:email:{email.lower()}:janela", now, *self.RESET_PER_EMAIL)
+
+    def register_failure(self, ip: str, email: str) -> None:
+        """Registra uma senha errada e aplica o bloqueio progressivo"""
+        now = time.time()
+        for key in (f"login:ip:{ip}", f"login:email:{email.lower()}"):
+            failures = self.backend.add_failure(key, self.FAILURE_TTL)
+            if failures >= self.FAILURE_THRESHOLD:
+                delay = min(self.MAX_BACKOFF, self.BASE_BACKOFF * 2 ** (failures - self.FAILURE_THRESHOLD))
+                self.backend.set_block(key, now + delay, self.FAILURE_TTL)
+
+    def register_success(self, ip: str, email: str) -> None:
+        # Só o email é liberado: um login válido não deve zerar as falhas acumuladas pelo IP
+        self.backend.reset(f"login:email:{email.lower()}")
+
+    def _check_block(self, key: str, now: float) -> None:
+        until = self.backend.get_block(key)
+        if until > now:
+            self._reject(until - now)
+
+    def _check_window(self, key: str, now: float, limit: int, window: int) -> None:
+        if self.backend.hit(key, now, window) > limit:
+            self._reject(window)
+
+    @staticmethod
+    def _reject(retry_after: float) -> None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Muitas tentativas. Tente novamente mais tarde.",
+            headers={"Retry-After": str(max(1, int(retry_after)))},
+        )
+
+
+login_throttle = LoginThrottle(create_backend())
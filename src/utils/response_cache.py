@@ -0,0 +1,111 @@
+"""
+Cache em memória de respostas JSON com corpos pré-comprimidos
+
+Usado nas listagens do cardápio: o JSON é serializado e comprimido (gzip/Brotli)
+uma vez só, e cada requisição recebe a variante negociada sem recomprimir.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from src.config.config import get_compression_min_size, get_response_cache_ttl, get_response_cache_max_entries
+from src.utils.compression import available_encodings, choose_encoding, compress
+
+
+# Namespace das listagens do cardápio (produtos e categorias)
+CARDAPIO_CACHE = "cardapio"
+
+
+class CachedBody:
+    """Corpo JSON cacheado com suas variantes comprimidas"""
+
+    def __init__(self, body: bytes, ttl: int):
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self.expires_at = time.monotonic() + ttl
+        self.encoded: Dict[str, bytes] = {}
+        if len(body) >= get_compression_min_size():
+            for encoding in available_encodings():
+                self.encoded[encoding] = compress(body, encoding, cached=True)
+
+    def is_expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def to_response(self, request: Request) -> Response:
+        """Monta a resposta escolhendo a variante aceita pelo cliente"""
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding"}
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=headers)
+
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+        if encoding in self.encoded:
+            headers["Content-Encoding"] = encoding
+            return Response(content=self.encoded[encoding], media_type="application/json", headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """Cache chave -> CachedBody (LRU limitado em entradas), agrupado por namespace para invalidação"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.is_expired():
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, content: Any) -> CachedBody:
+        # Mesmo formato de serialização do JSONResponse do FastAPI
+        body = json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+        entry = CachedBody(body, get_response_cache_ttl())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, namespace: str) -> None:
+        """Remove todas as entradas de um namespace (ex.: após alterar o cardápio)"""
+        prefix = f"{namespace}:"
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+
+response_cache = ResponseCache(max_entries=get_response_cache_max_entries())
+
+
+def cached_json_response(
+    request: Request, namespace: str, build: Callable[[], Any], params: Iterable[str] = ()
+) -> Response:
+    """
+    Retorna a resposta cacheada para a URL da requisição, construindo-a se necessário
+
+    Args:
+        request: requisição atual (caminho vira a chave; Accept-Encoding escolhe a variante)
+        namespace: grupo de invalidação (ex.: "cardapio")
+        build: função que produz o conteúdo quando não há entrada válida
+        params: parâmetros de query que a rota lê; só eles entram na chave
+            (outros, como "?x=1", não criam entradas novas)
+    """
+    query = "&".join(f"{name}={request.query_params.get(name, '')}" for name in sorted(params))
+    key = f"{namespace}:{request.url.path}?{query}"
+    entry = response_cache.get(key)
+    if entry is None:
+        entry = response_cache.set(key, build())
+    return entry.to_response(request)
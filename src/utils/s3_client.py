@@ -0,0 +1,190 @@
+"""
+Cliente S3 mínimo (AWS S3, MinIO e compatíveis) sobre httpx
+
+Só as operações de objeto usadas pelo armazenamento de uploads: PUT, GET,
+HEAD, DELETE e ListObjectsV2. Assinatura AWS Signature V4 com endereçamento
+por caminho (endpoint/bucket/chave), que é o que o MinIO espera. O corpo não
+entra na assinatura (UNSIGNED-PAYLOAD), então uploads grandes são enviados em
+streaming direto do arquivo.
+"""
+import hashlib
+import hmac
+import os
+import time
+import xml.etree.ElementTree as ET
+from calendar import timegm
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+
+S3_NAMESPACE = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+
+
+class S3Error(Exception):
+    """Resposta de erro do serviço S3"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"S3 respondeu {status_code}: {message}")
+        self.status_code = status_code
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+def _quote(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+def _parse_timestamp(value: str) -> float:
+    # "2025-01-31T12:34:56.000Z"
+    return float(timegm(time.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")))
+
+
+class S3Client:
+    """
+    Uso:
+        client = S3Client("http://127.0.0.1:9000", "uploads", "chave", "segredo")
+        client.put_object("abc.jpg", "/tmp/abc.jpg", content_type="image/jpeg")
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        timeout: float = 30.0,
+        max_connections: int = 32,
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.host = urlsplit(self.endpoint_url).netloc
+        self._http = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def close(self) -> None:
+        self._http.close()
+
+    def put_object(self, key: str, path: str, content_type: Optional[str] = None, cache_control: Optional[str] = None) -> None:
+        # Content-Length explícito: sem ele o httpx envia em chunked, que o S3 recusa
+        headers = {"Content-Length": str(os.path.getsize(path))}
+        if content_type:
+            headers["Content-Type"] = content_type
+        if cache_control:
+            headers["Cache-Control"] = cache_control
+        with open(path, "rb") as body:
+            response = self._request("PUT", key, headers=headers, content=body)
+        self._raise_for_status(response)
+
+    def download_object(self, key: str, dest_path: str) -> Optional[Dict[str, str]]:
+        """Grava o objeto em dest_path; retorna os cabeçalhos da resposta ou None se não existir"""
+        url, headers = self._signed("GET", key)
+        with self._http.stream("GET", url, headers=headers) as response:
+            if response.status_code == 404:
+                return None
+            if response.status_code >= 400:
+                response.read()
+                self._raise_for_status(response)
+            with open(dest_path, "wb") as out:
+                for chunk in response.iter_bytes(1024 * 1024):
+                    out.write(chunk)
+            return dict(response.headers)
+
+    def head_object(self, key: str) -> Optional[Dict[str, str]]:
+        response = self._request("HEAD", key)
+        if response.status_code == 404:
+            return None
+        self._raise_for_status(response)
+        return dict(response.headers)
+
+    def delete_object(self, key: str) -> None:
+        response = self._request("DELETE", key)
+        if response.status_code != 404:
+            self._raise_for_status(response)
+
+    def list_objects(self, prefix: str = "") -> Iterator[Tuple[str, int, float]]:
+        """Itera (chave, tamanho, última modificação) de todos os objetos com o prefixo, paginando"""
+        token = None
+        while True:
+            params = {"list-type": "2", "prefix": prefix, "max-keys": "1000"}
+            if token:
+                params["continuation-token"] = token
+            response = self._request("GET", None, params=params)
+            self._raise_for_status(response)
+            root = ET.fromstring(response.content)
+            for item in root.iter(f"{S3_NAMESPACE}Contents"):
+                yield (
+                    item.findtext(f"{S3_NAMESPACE}Key"),
+                    int(item.findtext(f"{S3_NAMESPACE}Size") or 0),
+                    _parse_timestamp(item.findtext(f"{S3_NAMESPACE}LastModified") or "1970-01-01T00:00:00"),
+                )
+            if root.findtext(f"{S3_NAMESPACE}IsTruncated") != "true":
+                return
+            token = root.findtext(f"{S3_NAMESPACE}NextContinuationToken")
+
+    def _request(self, method: str, key: Optional[str], params: Optional[Dict[str, str]] = None, headers=None, content=None):
+        url, signed = self._signed(method, key, params, headers)
+        return self._http.request(method, url, headers=signed, content=content)
+
+    def _signed(
+        self, method: str, key: Optional[str], params: Optional[Dict[str, str]] = None, headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[str, Dict[str, str]]:
+        """URL (com a query string canônica) e cabeçalhos com a assinatura AWS Signature V4"""
+        path = f"/{self.bucket}" + (f"/{key}" if key is not None else "")
+        canonical_uri = _quote(path, safe="/-_.~")
+        canonical_query = "&".join(f"{_quote(k)}={_quote(v)}" for k, v in sorted((params or {}).items()))
+
+        amz_date = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        date = amz_date[:8]
+        signed_headers = {
+            "host": self.host,
+            "x-amz-content-sha256": "UNSIGNED-PAYLOAD",
+            "x-amz-date": amz_date,
+        }
+        names = sorted(signed_headers)
+        canonical_request = "\n".join([
+            method,
+            canonical_uri,
+            canonical_query,
+            "".join(f"{name}:{signed_headers[name]}\n" for name in names),
+            ";".join(names),
+            "UNSIGNED-PAYLOAD",
+        ])
+        scope = f"{date}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()
+        ])
+        signing_key = _hmac(_hmac(_hmac(_hmac(f"AWS4{self.secret_key}".encode(), date), self.region), "s3"), "aws4_request")
+        signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+        result = dict(headers or {})
+        result.update({
+            "x-amz-content-sha256": "UNSIGNED-PAYLOAD",
+            "x-amz-date": amz_date,
+            "Authorization": (
+                f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+                f"SignedHeaders={';'.join(names)}, Signature={signature}"
+            ),
+        })
+        url = f"{self.endpoint_url}{canonical_uri}"
+        return (f"{url}?{canonical_query}" if canonical_query else url), result
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response) -> None:
+        if response.status_code >= 400:
+            message = ""
+            if response.content:
+                try:
+                    message = ET.fromstring(response.content).findtext("Message") or ""
+                except ET.ParseError:
+                    message = response.text[:200]
+            raise S3Error(response.status_code, message or response.reason_phrase)
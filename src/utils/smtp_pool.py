@@ -0,0 +1,161 @@
+"""
+Pool de conexões SMTP persistentes
+
+Cada conexão é aberta, negociada (STARTTLS) e autenticada uma vez e depois
+reutilizada para várias mensagens, em vez de um connect + TLS + AUTH por email.
+Conexões ociosas há mais de `idle_timeout`, que já enviaram `max_messages` ou
+que passaram de `max_lifetime` são encerradas (QUIT) e substituídas.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from email.message import Message
+from typing import Deque, Optional
+
+import aiosmtplib
+
+
+logger = logging.getLogger(__name__)
+
+
+class PooledConnection:
+    """Conexão SMTP aberta e autenticada, com contadores para reciclagem"""
+
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.sent = 0
+
+
+class SMTPPool:
+    """
+    Transporte SMTP com até `size` conexões simultâneas
+
+    Uso:
+        pool = SMTPPool("smtp.exemplo.com", 587, username, password, start_tls=True)
+        await pool.send(message)
+        await pool.close()
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        start_tls: bool = False,
+        validate_certs: bool = True,
+        size: int = 4,
+        max_messages: int = 100,
+        idle_timeout: float = 30.0,
+        max_lifetime: float = 600.0,
+        timeout: float = 60.0,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.validate_certs = validate_certs
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self._idle: Deque[PooledConnection] = deque()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._reaper: Optional[asyncio.Task] = None
+        self.connections_opened = 0
+
+    async def send(self, message: Message) -> None:
+        """Envia a mensagem usando uma conexão do pool"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+            self._reaper = asyncio.create_task(self._reap())
+
+        async with self._slots:
+            conn = await self._acquire()
+            try:
+                await conn.smtp.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                await self._discard(conn)
+                if conn.sent == 0:
+                    raise
+                # o servidor derrubou uma conexão reaproveitada: tenta uma vez com uma nova
+                conn = await self._connect()
+                try:
+                    await conn.smtp.send_message(message)
+                except Exception:
+                    await self._discard(conn)
+                    raise
+            except Exception:
+                await self._discard(conn)
+                raise
+            conn.sent += 1
+            conn.last_used = time.monotonic()
+            self._idle.append(conn)
+
+    async def close(self) -> None:
+        """Encerra todas as conexões ociosas e o reciclador"""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        self._slots = None
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+    def _is_stale(self, conn: PooledConnection, now: float) -> bool:
+        return (
+            not conn.smtp.is_connected
+            or conn.sent >= self.max_messages
+            or now - conn.last_used > self.idle_timeout
+            or now - conn.created_at > self.max_lifetime
+        )
+
+    async def _acquire(self) -> PooledConnection:
+        now = time.monotonic()
+        while self._idle:
+            # LIFO: a conexão usada mais recentemente é a que menos provavelmente expirou no servidor
+            conn = self._idle.pop()
+            if not self._is_stale(conn, now):
+                return conn
+            await self._discard(conn)
+        return await self._connect()
+
+    async def _connect(self) -> PooledConnection:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            validate_certs=self.validate_certs,
+            timeout=self.timeout,
+        )
+        await smtp.connect()
+        if self.username and self.password:
+            await smtp.login(self.username, self.password)
+        self.connections_opened += 1
+        return PooledConnection(smtp)
+
+    async def _discard(self, conn: PooledConnection) -> None:
+        try:
+            if conn.smtp.is_connected:
+                await conn.smtp.quit()
+        except Exception:
+            conn.smtp.close()
+
+    async def _reap(self) -> None:
+        # fecha conexões ociosas para não segurar sockets que o servidor vai derrubar
+        while True:
+            await asyncio.sleep(self.idle_timeout)
+            now = time.monotonic()
+            for conn in [c for c in self._idle if self._is_stale(c, now)]:
+                try:
+                    self._idle.remove(conn)
+                except ValueError:
+                    continue
+                await self._discard(conn)
@@ -0,0 +1,181 @@
+"""
+Servidor estático de /uploads com cache longo e negociação de formato
+
+- Arquivos com nome pelo conteúdo (sha256, variantes "<hash>-<largura>") e os
+  nomes uuid antigos nunca são regravados: vão com `immutable` e max-age de um ano
+- `Accept: image/webp` recebe o irmão .webp do mesmo arquivo quando existe
+  (ex.: variants/<hash>-320.jpg -> <hash>-320.webp), com `Vary: Accept`
+- Tipos comprimíveis (svg, json, txt...) usam irmãos pré-comprimidos .br/.gz
+  conforme o Accept-Encoding
+- Range, ETag e If-None-Match/If-Modified-Since ficam com o FileResponse do
+  Starlette, que usa `http.response.pathsend` (zero-copy) quando o servidor
+  ASGI oferece a extensão
+- Os arquivos vêm do armazenamento configurado (src/utils/storage.py): no
+  backend S3, do cache local de leitura, baixados do bucket no primeiro acesso
+- Atrás do nginx, UPLOADS_ACCEL_REDIRECT delega o envio (sendfile e Range) ao
+  próprio nginx via X-Accel-Redirect. O nginx só repassa Cache-Control/Expires
+  do upstream nesse caso, então o location interno repete os demais (alias
+  para UPLOAD_DIR, ou STORAGE_CACHE_DIR no backend S3):
+
+      location /_uploads/ {
+          internal;
+          alias /srv/app/uploads/;
+          add_header Vary $upstream_http_vary;
+          add_header Content-Encoding $upstream_http_content_encoding;
+      }
+"""
+import errno
+import mimetypes
+import os
+import stat
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from src.config.config import get_uploads_accel_redirect, get_uploads_cache_max_age
+from src.utils.compression import INCOMPRESSIBLE_CONTENT_TYPES, choose_encoding
+from src.utils.storage import IMMUTABLE_CACHE_CONTROL, IMMUTABLE_NAME, LocalStorage, storage as default_storage
+
+
+# extensão pedida -> formatos alternativos (tipo MIME, extensão), em ordem de preferência
+ALTERNATE_FORMATS = {
+    ".jpg": (("image/webp", ".webp"),),
+    ".jpeg": (("image/webp", ".webp"),),
+    ".png": (("image/webp", ".webp"),),
+}
+
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+class _Representation(NamedTuple):
+    full_path: str
+    stat_result: Optional[os.stat_result]
+    media_type: Optional[str] = None
+    content_encoding: Optional[str] = None
+    vary: tuple = ()
+
+
+def accepts_media_type(accept: str, media_type: str) -> bool:
+    """
+    True se o Accept lista o tipo explicitamente (q > 0)
+
+    Curingas (*/*, image/*) não contam: navegadores os enviam mesmo sem
+    suportar o formato.
+    """
+    for part in accept.split(","):
+        token, _, params = part.strip().partition(";")
+        if token.strip().lower() != media_type:
+            continue
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+class UploadsStaticFiles(StaticFiles):
+    """StaticFiles sobre o armazenamento de uploads, com Cache-Control por tipo de nome, negociação e X-Accel-Redirect"""
+
+    def __init__(
+        self,
+        *,
+        directory: Optional[str] = None,
+        storage=None,
+        cache_max_age: Optional[int] = None,
+        accel_redirect: Optional[str] = None,
+    ):
+        # `directory` serve um diretório local qualquer (ex.: benchmarks), sem passar pelo backend configurado
+        self.storage = storage or (LocalStorage(directory) if directory else default_storage)
+        # diretório local de onde os arquivos são servidos (base do X-Accel-Redirect)
+        directory = getattr(self.storage, "root", None) or self.storage.cache.directory
+        super().__init__(directory=directory, check_dir=False)
+        self.cache_max_age = get_uploads_cache_max_age() if cache_max_age is None else cache_max_age
+        self.accel_redirect = get_uploads_accel_redirect() if accel_redirect is None else accel_redirect.rstrip("/")
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        request_headers = Headers(scope=scope)
+        try:
+            representation = await anyio.to_thread.run_sync(
+                self.negotiate, path, request_headers.get("accept", ""), request_headers.get("accept-encoding", "")
+            )
+        except PermissionError:
+            raise HTTPException(status_code=401)
+        except OSError as exc:
+            if exc.errno == errno.ENAMETOOLONG:
+                raise HTTPException(status_code=404)
+            raise exc
+
+        if representation.stat_result is None or not stat.S_ISREG(representation.stat_result.st_mode):
+            raise HTTPException(status_code=404)
+        return self.representation_response(path, representation, request_headers)
+
+    def lookup_path(self, path: str) -> Tuple[str, Optional[os.stat_result]]:
+        return self.storage.lookup(path)
+
+    def negotiate(self, path: str, accept: str, accept_encoding: str) -> _Representation:
+        """Escolhe o arquivo a enviar para `path` (roda em thread: faz stat em disco)"""
+        full_path, stat_result = self.lookup_path(path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return _Representation(full_path, stat_result)
+
+        stem, ext = os.path.splitext(path)
+        alternates = ALTERNATE_FORMATS.get(ext.lower())
+        if alternates:
+            for media_type, alt_ext in alternates:
+                if not accepts_media_type(accept, media_type):
+                    continue
+                alt_path, alt_stat = self.lookup_path(stem + alt_ext)
+                if alt_stat is not None and stat.S_ISREG(alt_stat.st_mode):
+                    return _Representation(alt_path, alt_stat, media_type, vary=("Accept",))
+            return _Representation(full_path, stat_result, vary=("Accept",))
+
+        media_type = mimetypes.guess_type(path)[0] or "text/plain"
+        if media_type.startswith(INCOMPRESSIBLE_CONTENT_TYPES) and media_type != "image/svg+xml":
+            return _Representation(full_path, stat_result)
+
+        encoding = choose_encoding(accept_encoding)
+        if encoding is not None:
+            enc_path, enc_stat = self.lookup_path(path + PRECOMPRESSED_SUFFIXES[encoding])
+            if enc_stat is not None and stat.S_ISREG(enc_stat.st_mode):
+                return _Representation(enc_path, enc_stat, media_type, encoding, vary=("Accept-Encoding",))
+        return _Representation(full_path, stat_result, media_type, vary=("Accept-Encoding",))
+
+    def cache_control(self, path: str) -> str:
+        if IMMUTABLE_NAME.match(os.path.basename(path)):
+            return IMMUTABLE_CACHE_CONTROL
+        return f"public, max-age={self.cache_max_age}"
+
+    def representation_response(self, path: str, representation: _Representation, request_headers: Headers) -> Response:
+        headers: Dict[str, str] = {"Cache-Control": self.cache_control(path)}
+        if representation.vary:
+            headers["Vary"] = ", ".join(representation.vary)
+        if representation.content_encoding:
+            headers["Content-Encoding"] = representation.content_encoding
+
+        response = FileResponse(
+            representation.full_path,
+            stat_result=representation.stat_result,
+            media_type=representation.media_type,
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        if self.accel_redirect:
+            # o nginx envia o arquivo (sendfile, Range); mantém os cabeçalhos calculados aqui
+            relative = os.path.relpath(representation.full_path, self.directory).replace(os.sep, "/")
+            accel_headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+            accel_headers["X-Accel-Redirect"] = f"{self.accel_redirect}/{relative}"
+            return Response(status_code=200, headers=accel_headers)
+        return response
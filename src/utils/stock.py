@@ -0,0 +1,164 @@
+"""
+Controle de estoque dos produtos
+
+`Produto.estoque` é opcional: None = produto sem controle de estoque (só o
+status vale). Com controle, o pedido reserva as unidades com um $inc
+condicional por produto ({"estoque": {"$gte": qtd}}), em ordem: o primeiro
+que não casar interrompe a reserva e as baixas anteriores são desfeitas com
+o $inc inverso. Produtos que chegaram a zero viram "Indisponível" com a
+marca `esgotado`; só esses voltam a "Ativo" quando as unidades retornam (um
+produto desativado à mão continua fora do cardápio).
+"""
+from datetime import datetime
+from typing import Dict
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateMany, UpdateOne
+
+from src.models.pedido import Pedido
+from src.models.produto import Produto
+from src.utils.menu_search import menu_search
+from src.utils.metrics import timed
+from src.utils.response_cache import response_cache, CARDAPIO_CACHE
+
+
+class EstoqueInsuficiente(Exception):
+    """Algum produto do pedido não tem unidades suficientes"""
+
+    def __init__(self, produto_id: ObjectId):
+        super().__init__(f"Estoque insuficiente para o produto {produto_id}")
+        self.produto_id = produto_id
+
+
+def _status_changed(produto_ids) -> None:
+    """Status trocado direto no banco: invalida as listagens e reindexa a busca"""
+    response_cache.invalidate(CARDAPIO_CACHE)
+    menu_search.reindex([str(produto_id) for produto_id in produto_ids])
+
+
+def _restore(quantidades: Dict[ObjectId, int]) -> None:
+    if quantidades:
+        Produto._get_collection().bulk_write(
+            [UpdateOne({"_id": produto_id, "estoque": {"$ne": None}}, {"$inc": {"estoque": qtd}})
+             for produto_id, qtd in quantidades.items()],
+            ordered=False,
+        )
+
+
+@timed("reservar_estoque")
+def reserve_stock(quantidades: Dict[ObjectId, int]) -> Dict[ObjectId, int]:
+    """
+    Baixa o estoque de todos os produtos do pedido, ou de nenhum
+
+    Args:
+        quantidades: {produto_id: unidades} só dos produtos com controle de estoque
+
+    Returns:
+        As unidades efetivamente reservadas (sem os produtos cujo controle de
+        estoque foi desligado depois da leitura)
+    Raises:
+        EstoqueInsuficiente: com o primeiro produto sem unidades suficientes
+            (ou removido); as baixas já feitas são desfeitas antes
+    """
+    reservadas: Dict[ObjectId, int] = {}
+    if not quantidades:
+        return reservadas
+    collection = Produto._get_collection()
+    try:
+        for produto_id, qtd in quantidades.items():
+            result = collection.update_one({"_id": produto_id, "estoque": {"$gte": qtd}}, {"$inc": {"estoque": -qtd}})
+            if result.matched_count:
+                reservadas[produto_id] = qtd
+                continue
+            atual = collection.find_one({"_id": produto_id}, projection={"estoque": 1})
+            if atual is not None and atual.get("estoque") is None:
+                # controle de estoque desligado entre a leitura e a baixa: nada a reservar
+                continue
+            raise EstoqueInsuficiente(produto_id)
+        esgotados = collection.update_many(
+            {"_id": {"$in": list(reservadas)}, "estoque": {"$lte": 0}, "status": "Ativo"},
+            {"$set": {"status": "Indisponível", "esgotado": True, "updated_at": datetime.utcnow()}},
+        )
+    except BaseException:
+        _restore(reservadas)
+        raise
+    if esgotados.modified_count:
+        _status_changed(reservadas)
+    return reservadas
+
+
+def release_stock(quantidades: Dict[ObjectId, int]) -> None:
+    """
+    Devolve unidades reservadas (pedido cancelado ou não gravado)
+
+    Produtos que a própria baixa deixou "Indisponível" (marca `esgotado`) voltam a "Ativo".
+    """
+    if not quantidades:
+        return
+    Produto._get_collection().bulk_write(
+        [
+            UpdateOne({"_id": produto_id, "estoque": {"$ne": None}}, {"$inc": {"estoque": qtd}})
+            for produto_id, qtd in quantidades.items()
+        ] + [
+            UpdateMany(
+                {"_id": {"$in": list(quantidades)}, "estoque": {"$gt": 0}, "status": "Indisponível", "esgotado": True},
+                {"$set": {"status": "Ativo", "esgotado": False, "updated_at": datetime.utcnow()}},
+            )
+        ],
+        ordered=True,
+    )
+    _status_changed(quantidades)
+
+
+def sync_stock_status(produto_ids) -> None:
+    """Mesma regra de Produto.sync_stock_status para produtos gravados direto no banco (estoque zerado: "Indisponível"; reposto: "Ativo" se esgotado)"""
+    produto_ids = list(produto_ids)
+    if not produto_ids:
+        return
+    agora = datetime.utcnow()
+    Produto._get_collection().bulk_write(
+        [
+            UpdateMany(
+                {"_id": {"$in": produto_ids}, "estoque": {"$lte": 0}, "status": "Ativo"},
+                {"$set": {"status": "Indisponível", "esgotado": True, "updated_at": agora}},
+            ),
+            UpdateMany(
+                {"_id": {"$in": produto_ids}, "estoque": {"$gt": 0}, "status": "Indisponível", "esgotado": True},
+                {"$set": {"status": "Ativo", "esgotado": False, "updated_at": agora}},
+            ),
+        ],
+        ordered=False,
+    )
+
+
+def reserved_quantities(raw_pedido: dict) -> Dict[ObjectId, int]:
+    """Unidades que o pedido (documento bruto) baixou do estoque, por produto"""
+    quantidades: Dict[ObjectId, int] = {}
+    for item in raw_pedido.get("itens") or []:
+        if not item.get("estoque_reservado"):
+            continue
+        produto_id = item["produto"]
+        quantidades[produto_id] = quantidades.get(produto_id, 0) + item["quantidade"]
+    return quantidades
+
+
+def cancel_order(pedido_id: ObjectId) -> bool:
+    """
+    Cancela o pedido e devolve o estoque reservado, uma vez só
+
+    A troca de status e a limpeza de `estoque_reservado` dos itens são um
+    único update condicional: com dois cancelamentos simultâneos só um casa
+    (e devolve as unidades).
+
+    Returns:
+        False se o pedido já estava cancelado (ou não existe)
+    """
+    anterior = Pedido._get_collection().find_one_and_update(
+        {"_id": pedido_id, "status": {"$ne": "Cancelado"}},
+        {"$set": {"status": "Cancelado", "itens.$[].estoque_reservado": False, "updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if anterior is None:
+        return False
+    release_stock(reserved_quantities(anterior))
+    return True
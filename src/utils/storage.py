@@ -0,0 +1,335 @@
+"""
+Armazenamento dos uploads: disco local ou bucket S3 (AWS, MinIO e compatíveis)
+
+As rotas de arquivos, o /uploads e o /img só falam com o `storage` deste
+módulo, por chave ("<sha256>.jpg", "variants/<sha256>-320.webp"):
+- LocalStorage: as chaves são arquivos em UPLOAD_DIR (comportamento de um nó só)
+- S3Storage: as chaves são objetos no bucket; leituras passam por um cache
+  local em disco (LRU limitado por STORAGE_CACHE_MAX_SIZE), então imagens
+  quentes são servidas do disco do nó sem ir ao S3
+
+O processamento de imagem continua trabalhando com arquivos locais: o upload
+é gravado em staging_dir(), processado ali e publicado com put_file().
+"""
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import stat
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Set, Tuple
+
+from src.config.config import (
+    get_storage_backend,
+    get_upload_dir,
+    get_s3_endpoint_url,
+    get_s3_bucket,
+    get_s3_access_key,
+    get_s3_secret_key,
+    get_s3_region,
+    get_storage_cache_dir,
+    get_storage_cache_max_size,
+)
+from src.utils.disk_cache import DiskLRU
+from src.utils.s3_client import S3Client
+from src.utils.uploads import commit_temp
+
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# sha256 (uploads atuais) ou uuid4 hex (uploads antigos), com sufixo "-<largura>" nas variantes:
+# nunca são regravados com outro conteúdo
+IMMUTABLE_NAME = re.compile(r"^(?:[0-9a-f]{64}|[0-9a-f]{32})(?:-\d+)?\.[0-9a-z]+$")
+
+# chaves que um upload pode ter (original ou variante): outras nem são consultadas no bucket
+UPLOAD_KEY = re.compile(r"^(?:variants/)?(?:[0-9a-f]{64}|[0-9a-f]{32})(?:-\d+)?\.[0-9a-z]+$")
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    mtime: float
+
+
+def normalize_key(key: str) -> Optional[str]:
+    """Chave relativa com "/" ou None se tentar sair da raiz (.., caminho absoluto, vazia)"""
+    key = key.replace("\\", "/").lstrip("/")
+    normalized = posixpath.normpath(key) if key else ""
+    if not normalized or normalized == "." or normalized.startswith("../") or normalized == "..":
+        return None
+    return normalized
+
+
+class LocalStorage:
+    """Uploads como arquivos num diretório local"""
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, "variants"), exist_ok=True)
+
+    def load(self) -> None:
+        pass
+
+    def staging_dir(self, subdir: str = "") -> str:
+        # no mesmo sistema de arquivos da raiz: publicar é só um rename
+        return os.path.join(self.root, subdir) if subdir else self.root
+
+    def path(self, key: str) -> Optional[str]:
+        key = normalize_key(key)
+        return os.path.join(self.root, *key.split("/")) if key else None
+
+    def lookup(self, key: str) -> Tuple[str, Optional[os.stat_result]]:
+        """(caminho local, stat) da chave; stat None se não existir"""
+        path = self.path(key)
+        if path is None:
+            return "", None
+        try:
+            return path, os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return path, None
+
+    def local_path(self, key: str) -> Optional[str]:
+        path, st = self.lookup(key)
+        return path if st is not None and stat.S_ISREG(st.st_mode) else None
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key) is not None
+
+    def existing(self, keys: Iterable[str]) -> Set[str]:
+        """Quais das chaves existem"""
+        return {key for key in keys if self.exists(key)}
+
+    def put_file(self, src_path: str, key: str, overwrite: bool = True) -> bool:
+        """
+        Publica o arquivo local sob a chave (o arquivo de origem é movido)
+
+        Returns:
+            False se overwrite=False e a chave já existia (a origem é descartada)
+        """
+        dest = self.path(key)
+        if os.path.abspath(src_path) == dest:
+            return True
+        if not overwrite:
+            return commit_temp(src_path, dest)
+        os.replace(src_path, dest)
+        return True
+
+    def delete(self, key: str) -> bool:
+        path = self.path(key)
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def list(self, prefix: str = "") -> Iterator[StoredObject]:
+        """Objetos da raiz e de variants/ (temporários .tmp incluídos, para a coleta de lixo)"""
+        for subdir in ("", "variants"):
+            directory = os.path.join(self.root, subdir) if subdir else self.root
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    key = f"{subdir}/{entry.name}" if subdir else entry.name
+                    if key.startswith(prefix):
+                        st = entry.stat(follow_symlinks=False)
+                        yield StoredObject(key, st.st_size, st.st_mtime)
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "raiz": self.root}
+
+
+class S3Storage:
+    """Uploads num bucket S3, com cache local de leitura (read-through) limitado em bytes"""
+
+    name = "s3"
+
+    # Por quanto tempo (s) uma chave inexistente não é consultada de novo (ex.: irmão .webp que não existe)
+    MISSING_TTL = 60
+    # máximo de chaves inexistentes lembradas (as mais antigas saem primeiro)
+    MISSING_MAX_ENTRIES = 10000
+
+    def __init__(self, client: S3Client, cache_dir: str, cache_max_size: int):
+        self.client = client
+        self.cache = DiskLRU(cache_dir, cache_max_size, skip_dirs=(".staging",))
+        self._staging = os.path.join(cache_dir, ".staging")
+        self._missing: "OrderedDict[str, float]" = OrderedDict()
+        self._missing_lock = threading.Lock()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.join(self._staging, "variants"), exist_ok=True)
+
+    def load(self) -> None:
+        """Indexa o cache local (de execuções anteriores)"""
+        self.cache.load()
+
+    def staging_dir(self, subdir: str = "") -> str:
+        return os.path.join(self._staging, subdir) if subdir else self._staging
+
+    def lookup(self, key: str) -> Tuple[str, Optional[os.stat_result]]:
+        """(caminho no cache local, stat), baixando do bucket na primeira leitura; stat None se não existir"""
+        path = self.local_path(key)
+        if path is None:
+            return "", None
+        try:
+            return path, os.stat(path)
+        except FileNotFoundError:
+            # removido pelo LRU entre o get e o stat
+            return "", None
+
+    def local_path(self, key: str) -> Optional[str]:
+        key = normalize_key(key)
+        if key is None:
+            return None
+        path = self.cache.get(key)
+        if path is not None:
+            self.hits += 1
+            return path
+        if not UPLOAD_KEY.match(key) or self._is_missing(key):
+            return None
+
+        # um download por chave mesmo com várias threads pedindo a mesma imagem
+        with self._key_lock(key):
+            path = self.cache.get(key)
+            if path is not None:
+                self.hits += 1
+                return path
+            self.misses += 1
+            dest = self.cache.path(key)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            tmp = f"{dest}.{uuid.uuid4().hex}.tmp"
+            try:
+                headers = self.client.download_object(key, tmp)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            if headers is None:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                self._mark_missing(key)
+                return None
+            # mtime = última modificação no bucket: o mesmo em todos os nós e entre downloads
+            # (o cache do /img usa o mtime do original na chave)
+            last_modified = headers.get("last-modified")
+            if last_modified:
+                timestamp = parsedate_to_datetime(last_modified).timestamp()
+                os.utime(tmp, (timestamp, timestamp))
+            os.replace(tmp, dest)
+            self.cache.add(key, os.path.getsize(dest))
+            return dest
+
+    def exists(self, key: str) -> bool:
+        key = normalize_key(key)
+        if key is None:
+            return False
+        if self.cache.get(key) is not None:
+            return True
+        if not UPLOAD_KEY.match(key) or self._is_missing(key):
+            return False
+        return self.client.head_object(key) is not None
+
+    def existing(self, keys: Iterable[str]) -> Set[str]:
+        """Quais das chaves existem, com uma listagem pelo prefixo comum em vez de um HEAD por chave"""
+        keys = {normalize_key(key) for key in keys} - {None}
+        if not keys:
+            return set()
+        prefix = os.path.commonprefix(sorted(keys))
+        return {obj.key for obj in self.list(prefix) if obj.key in keys}
+
+    def put_file(self, src_path: str, key: str, overwrite: bool = True) -> bool:
+        """Envia o arquivo local ao bucket e o mantém no cache (acabou de ser enviado, deve ser lido em seguida)"""
+        key = normalize_key(key)
+        if not overwrite and self.exists(key):
+            os.remove(src_path)
+            return False
+        content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+        cache_control = IMMUTABLE_CACHE_CONTROL if IMMUTABLE_NAME.match(posixpath.basename(key)) else None
+        self.client.put_object(key, src_path, content_type=content_type, cache_control=cache_control)
+        with self._missing_lock:
+            self._missing.pop(key, None)
+        dest = self.cache.path(key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.move(src_path, dest)
+        self.cache.add(key, os.path.getsize(dest))
+        return True
+
+    def delete(self, key: str) -> bool:
+        key = normalize_key(key)
+        self.client.delete_object(key)
+        self.cache.discard(key)
+        return True
+
+    def list(self, prefix: str = "") -> Iterator[StoredObject]:
+        for key, size, mtime in self.client.list_objects(prefix):
+            yield StoredObject(key, size, mtime)
+
+    def close(self) -> None:
+        self.client.close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "bucket": self.client.bucket,
+            "cache_arquivos": len(self.cache),
+            "cache_bytes": self.cache.total_size,
+            "cache_limite_bytes": self.cache.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _is_missing(self, key: str) -> bool:
+        with self._missing_lock:
+            return self._missing.get(key, 0) > time.monotonic()
+
+    def _mark_missing(self, key: str) -> None:
+        """Lembra a chave inexistente por MISSING_TTL; a ordem de inserção é a de expiração"""
+        now = time.monotonic()
+        with self._missing_lock:
+            self._missing.pop(key, None)
+            self._missing[key] = now + self.MISSING_TTL
+            while self._missing:
+                oldest, expires = next(iter(self._missing.items()))
+                if expires > now and len(self._missing) <= self.MISSING_MAX_ENTRIES:
+                    break
+                del self._missing[oldest]
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                if len(self._locks) > 1024:
+                    self._locks = {k: v for k, v in self._locks.items() if v.locked()}
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+
+def create_storage():
+    """Backend configurado em STORAGE_BACKEND ("local" ou "s3")"""
+    if get_storage_backend() == "s3":
+        client = S3Client(
+            endpoint_url=get_s3_endpoint_url(),
+            bucket=get_s3_bucket(),
+            access_key=get_s3_access_key(),
+            secret_key=get_s3_secret_key(),
+            region=get_s3_region(),
+        )
+        return S3Storage(client, cache_dir=get_storage_cache_dir(), cache_max_size=get_storage_cache_max_size())
+    return LocalStorage(get_upload_dir())
+
+
+storage = create_storage()
@@ -0,0 +1,26 @@
+"""
+Normalização de texto para busca
+
+Nomes em português aparecem com e sem acento ("João", "Joao") e com
+maiúsculas variadas; telefones, com ou sem máscara. As chaves de busca
+guardam a forma dobrada (sem acentos, minúscula, espaços simples) para que
+a consulta por prefixo use o índice sem regex case-insensitive.
+"""
+import re
+import unicodedata
+
+
+_SPACES = re.compile(r"\s+")
+_NON_DIGITS = re.compile(r"\D")
+
+
+def fold(text: str) -> str:
+    """Remove acentos, passa para minúsculas e colapsa espaços ("  José  da Silva" -> "jose da silva")"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _SPACES.sub(" ", stripped.casefold()).strip()
+
+
+def digits(text: str) -> str:
+    """Só os dígitos ("(11) 98765-4321" -> "11987654321")"""
+    return _NON_DIGITS.sub("", text or "")
@@ -0,0 +1,169 @@
+"""
+Coleta de lixo de uploads órfãos
+
+Arquivos do armazenamento de uploads (e suas variantes em variants/) que nenhum
+produto referencia — imagem trocada, produto apagado, upload nunca salvo —
+são removidos depois de um período de carência. Temporários abandonados
+(.upload-*.tmp, *.tmp) entram na mesma regra.
+
+O conjunto de referências é montado uma vez, lendo só `image_url` dos
+produtos em lotes do cursor; antes de apagar cada lote a referência é
+conferida de novo no banco, para não apagar a imagem de um produto salvo
+durante a varredura.
+"""
+import logging
+import os
+import re
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from src.models import Produto
+from src.utils.image_variants import UPLOAD_URL_PREFIX, VARIANTS_KEY_PREFIX
+from src.utils.queries import raw_query
+from src.utils.storage import storage as default_storage
+
+
+logger = logging.getLogger(__name__)
+
+GC_BATCH_SIZE = 500
+
+# "<stem>-<largura>.<ext>" -> stem do original
+VARIANT_NAME = re.compile(r"^(?P<stem>.+)-\d+\.[0-9a-z]+$")
+
+
+class OrphanFile:
+    """Arquivo candidato à remoção"""
+
+    def __init__(self, key: str, name: str, stem: Optional[str], size: int, mtime: float):
+        self.key = key
+        self.name = name
+        # stem do original a que o arquivo pertence (None para temporários)
+        self.stem = stem
+        self.size = size
+        self.mtime = mtime
+
+
+def _url_stem(url: Optional[str]) -> Optional[str]:
+    if not url or not url.startswith(f"{UPLOAD_URL_PREFIX}/"):
+        return None
+    return os.path.splitext(os.path.basename(url))[0]
+
+
+def referenced_stems() -> Set[str]:
+    """Stems (nome sem extensão) das imagens de uploads/ usadas por algum produto"""
+    stems: Set[str] = set()
+    produtos = Produto.objects(image_url__startswith=f"{UPLOAD_URL_PREFIX}/")
+    for doc in raw_query(produtos, only=["image_url"], batch_size=1000):
+        stem = _url_stem(doc.get("image_url"))
+        if stem:
+            stems.add(stem)
+    return stems
+
+
+def _still_referenced(stems: Set[str]) -> Set[str]:
+    """Quais desses stems passaram a ser usados por algum produto (uma consulta por lote)"""
+    if not stems:
+        return set()
+    pattern = f"^{re.escape(UPLOAD_URL_PREFIX)}/(?:{'|'.join(re.escape(s) for s in stems)})\\."
+    produtos = Produto.objects(__raw__={"image_url": {"$regex": pattern}})
+    return {_url_stem(doc.get("image_url")) for doc in raw_query(produtos, only=["image_url"])}
+
+
+def scan_uploads(storage) -> Iterator[OrphanFile]:
+    """Percorre a raiz e variants/ do armazenamento (outros prefixos são ignorados)"""
+    for obj in storage.list():
+        directory, _, name = obj.key.rpartition("/")
+        if name.endswith(".tmp"):
+            stem = None
+        elif name.startswith("."):
+            continue
+        elif directory == VARIANTS_KEY_PREFIX:
+            match = VARIANT_NAME.match(name)
+            if not match:
+                continue
+            stem = match.group("stem")
+        elif directory:
+            continue
+        else:
+            stem = os.path.splitext(name)[0]
+        yield OrphanFile(obj.key, name, stem, obj.size, obj.mtime)
+
+
+def collect_orphans(
+    storage=None,
+    grace_hours: float = 24.0,
+    batch_size: int = GC_BATCH_SIZE,
+    dry_run: bool = True,
+    pause: float = 0.0,
+    on_orphan: Optional[Callable[[OrphanFile], None]] = None,
+) -> Dict[str, object]:
+    """
+    Remove (ou, com dry_run, só lista) os uploads sem referência mais velhos que a carência
+
+    Args:
+        grace_hours: arquivos modificados há menos tempo que isso nunca são removidos
+        batch_size: arquivos por lote (uma conferência no banco por lote)
+        pause: espera em segundos entre lotes, para não saturar o disco (ou o bucket)
+        on_orphan: chamado para cada arquivo removido (ou que seria removido)
+
+    Returns:
+        Resumo com contagens e bytes recuperados
+    """
+    storage = storage or default_storage
+    inicio = time.perf_counter()
+    limite = time.time() - grace_hours * 3600
+    referenced = referenced_stems()
+
+    resumo = {
+        "dry_run": dry_run,
+        "referenciados": len(referenced),
+        "analisados": 0,
+        "em_uso": 0,
+        "recentes": 0,
+        "orfaos": 0,
+        "removidos": 0,
+        "falhas": 0,
+        "bytes_recuperados": 0,
+        "lotes": 0,
+    }
+
+    def processar(lote: List[OrphanFile]) -> None:
+        resumo["lotes"] += 1
+        em_uso = _still_referenced({f.stem for f in lote if f.stem})
+        for orphan in lote:
+            if orphan.stem in em_uso:
+                resumo["em_uso"] += 1
+                continue
+            resumo["orfaos"] += 1
+            if not dry_run:
+                try:
+                    if not storage.delete(orphan.key):
+                        continue
+                    resumo["removidos"] += 1
+                except Exception as e:
+                    resumo["falhas"] += 1
+                    logger.warning("Falha ao remover %s: %s", orphan.name, e)
+                    continue
+            resumo["bytes_recuperados"] += orphan.size
+            if on_orphan:
+                on_orphan(orphan)
+
+    lote: List[OrphanFile] = []
+    for found in scan_uploads(storage):
+        resumo["analisados"] += 1
+        if found.stem in referenced:
+            resumo["em_uso"] += 1
+        elif found.mtime > limite:
+            resumo["recentes"] += 1
+        else:
+            lote.append(found)
+            if len(lote) >= batch_size:
+                processar(lote)
+                lote = []
+                if pause:
+                    time.sleep(pause)
+    if lote:
+        processar(lote)
+
+    resumo["segundos"] = round(time.perf_counter() - inicio, 3)
+    return resumo
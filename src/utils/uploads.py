@@ -0,0 +1,131 @@
+"""
+Gravação de uploads em streaming, com limite de tamanho e nome pelo conteúdo
+
+O arquivo é copiado em blocos para um temporário enquanto o SHA-256 é
+calculado; passando de UPLOAD_MAX_SIZE a cópia é abortada (413). O nome final
+é o hash do conteúdo, então reenviar a mesma imagem não duplica nada em disco.
+"""
+import hashlib
+import os
+import uuid
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.config.config import get_upload_max_size
+
+
+CHUNK_SIZE = 1024 * 1024
+
+# extensões equivalentes normalizadas (mesmo conteúdo -> mesmo nome)
+EXTENSION_ALIASES = {".jpeg": ".jpg", ".jpe": ".jpg", ".tif": ".tiff"}
+
+
+def upload_extension(filename: Optional[str], default: str = ".jpg") -> str:
+    ext = os.path.splitext(filename or "")[1].lower() or default
+    return EXTENSION_ALIASES.get(ext, ext)
+
+
+def _too_large(max_size: int) -> HTTPException:
+    limit = f"{max_size // (1024 * 1024)} MB" if max_size >= 1024 * 1024 else f"{max_size // 1024} KB"
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Arquivo excede o tamanho máximo de {limit}",
+    )
+
+
+async def stream_to_temp(file: UploadFile, directory: str, max_size: Optional[int] = None) -> Tuple[str, str, int]:
+    """
+    Copia o upload em blocos para um arquivo temporário em `directory`
+
+    Returns:
+        (caminho do temporário, sha256 hex, tamanho em bytes)
+    Raises:
+        HTTPException 413 se passar de max_size (o temporário é removido)
+    """
+    max_size = max_size or get_upload_max_size()
+    tmp_path = os.path.join(directory, f".upload-{uuid.uuid4().hex}.tmp")
+    digest = hashlib.sha256()
+    size = 0
+    out = await run_in_threadpool(open, tmp_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise _too_large(max_size)
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        out.close()
+        os.remove(tmp_path)
+        raise
+    out.close()
+    return tmp_path, digest.hexdigest(), size
+
+
+def commit_temp(tmp_path: str, dest_path: str) -> bool:
+    """
+    Move o temporário para o nome definitivo
+
+    Returns:
+        False se o destino já existia (upload duplicado: o temporário é descartado)
+    """
+    if os.path.exists(dest_path):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, dest_path)
+    return True
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Recusa corpos maiores que o limite nas rotas de upload antes do parse do multipart
+
+    O Starlette grava o multipart inteiro (em memória/disco temporário) antes do
+    handler rodar; este middleware corta pelo Content-Length e, em corpos sem
+    Content-Length (chunked), conforme os bytes chegam.
+    """
+
+    # folga para os cabeçalhos do multipart e campos de formulário
+    MULTIPART_OVERHEAD = 64 * 1024
+
+    def __init__(self, app: ASGIApp, path_prefix: str = "/files/upload", max_size: Optional[int] = None):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.max_size = max_size or get_upload_max_size()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.max_size + self.MULTIPART_OVERHEAD
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _too_large(self.max_size)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        error = _too_large(self.max_size)
+        response = JSONResponse({"detail": error.detail}, status_code=error.status_code, headers={"Connection": "close"})
+        await response(scope, receive, send)